@@ -5,12 +5,30 @@ Tracks performance, predictions, and system health metrics
 
 import json
 import logging
+import threading
+import time
+from collections import deque
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any, Optional
 
+import numpy as np
 import psutil
 
+from monitoring.prometheus import (
+    BATCH_SIZE_BUCKETS,
+    LATENCY_BUCKETS,
+    STAGE_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    render,
+)
+from monitoring.ring import PredictionRing
+from monitoring.shared import create_store
+from monitoring.sketch import DEFAULT_QUANTILES, WindowedSketch, quantile_label
+from monitoring.system import SystemSampler, system_sampler
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,19 +68,130 @@ class ModelMetrics:
     failed_predictions: int
     avg_processing_time_ms: float
     last_used: str
+    total_processing_time_ms: float = 0.0
 
 
-class MetricsCollector:
-    """Centralized metrics collection and reporting"""
+@dataclass
+class CacheMetrics:
+    """Prediction cache lookups for one model"""
+
+    model_name: str
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Per-model totals in the metric store
+MODEL_TOTAL, MODEL_SUCCESSFUL, MODEL_FAILED, MODEL_TIME_MS, MODEL_LAST_USED = range(5)
+# Ring buffer window aggregates in the metric store
+RING_SIZE, RING_SUCCESSFUL, RING_LATENCY_MS = range(3)
+
 
-    def __init__(self):
-        self.prediction_metrics: list[PredictionMetrics] = []
-        self.system_metrics: list[SystemMetrics] = []
-        self.model_metrics: dict[str, ModelMetrics] = {}
+class MetricsCollector:
+    """
+    Centralized metrics collection and reporting.
+
+    Recent predictions live in a fixed-size ring buffer with running
+    aggregates and system snapshots in a bounded deque, so recording and
+    summarising cost O(1) and memory stays constant under any load. A lock
+    makes the collector safe to use from worker threads.
+
+    Latency percentiles come from mergeable quantile sketches per model and
+    per (endpoint, model), each over a sliding window and the lifetime.
+
+    Counters, histograms, sketches and the ring's aggregates are arrays in
+    a metric store. With ``METRICS_MULTIPROC_DIR`` set that is a per-worker
+    memory-mapped file, so each worker records into its own memory without
+    cross-process locks and every read (summary, /metrics) sums all
+    workers. Recent prediction records, system snapshots and gauges stay
+    per process.
+    """
+
+    def __init__(
+        self,
+        sampler: Optional[SystemSampler] = None,
+        capacity: int = 1000,
+        latency_window_seconds: float = 60.0,
+        store=None,
+    ):
+        self.sampler = sampler or system_sampler
+        self.store = store if store is not None else create_store()
+        self.capacity = capacity
+        self.latency_window_seconds = latency_window_seconds
+        self.model_latency: dict[str, WindowedSketch] = {}
+        self.request_latency: dict[tuple[str, str], WindowedSketch] = {}
+        self._lock = threading.Lock()
+        self.predictions = PredictionRing(capacity)
+        self.system_metrics: deque[SystemMetrics] = deque(maxlen=100)
         self.startup_time = datetime.now()
+        self.store.on_fork(self._after_fork)
 
         # Initialize model metrics
         self._init_model_metrics()
+        self._init_prometheus_metrics()
+
+    def _after_fork(self):
+        """A forked worker starts with empty per-process state"""
+        self._lock = threading.Lock()
+        self.predictions = PredictionRing(self.capacity)
+        self.model_latency = {}
+        self.request_latency = {}
+
+    def _init_prometheus_metrics(self):
+        """Create the metric families exposed on /metrics"""
+        self.requests_total = Counter(
+            "ml_api_requests_total",
+            "HTTP requests by endpoint, model and status code",
+            ("endpoint", "model", "status"),
+            store=self.store,
+        )
+        self.request_duration = Histogram(
+            "ml_api_request_duration_seconds",
+            "HTTP request latency by endpoint and model",
+            ("endpoint", "model"),
+            LATENCY_BUCKETS,
+            store=self.store,
+        )
+        self.stage_duration = Histogram(
+            "ml_api_request_stage_seconds",
+            "Time spent per pipeline stage by endpoint and model",
+            ("endpoint", "model", "stage"),
+            STAGE_BUCKETS,
+            store=self.store,
+        )
+        self.batch_size = Histogram(
+            "ml_api_batch_size",
+            "Rows per scored batch by source and model",
+            ("source", "model"),
+            BATCH_SIZE_BUCKETS,
+            store=self.store,
+        )
+        self.model_loaded = Gauge(
+            "ml_api_model_loaded",
+            "Whether the model is loaded (1) or not (0)",
+            ("model",),
+        )
+        self.model_load_seconds = Gauge(
+            "ml_api_model_load_seconds", "Time taken to load the model", ("model",)
+        )
+        self.model_size_bytes = Gauge(
+            "ml_api_model_size_bytes", "Size of the model artifact", ("model",)
+        )
+        self.model_warmup_seconds = Gauge(
+            "ml_api_model_warmup_seconds",
+            "Time taken by the startup warm-up batches of the model",
+            ("model",),
+        )
+        self.model_evictions = Counter(
+            "ml_api_model_evictions_total",
+            "Models unloaded to stay within the model memory budget",
+            ("model",),
+        )
+        self._process = psutil.Process()
 
     def _init_model_metrics(self):
         """Initialize metrics for all available models"""
@@ -74,14 +203,39 @@ class MetricsCollector:
             "logistic_regression",
         ]
         for model in models:
-            self.model_metrics[model] = ModelMetrics(
-                model_name=model,
-                total_predictions=0,
-                successful_predictions=0,
-                failed_predictions=0,
-                avg_processing_time_ms=0.0,
-                last_used="Never",
+            self.store.array(f"model|{model}", 5)
+
+    @property
+    def model_metrics(self) -> dict[str, ModelMetrics]:
+        """Per-model totals summed across workers"""
+        totals: dict[str, np.ndarray] = {}
+        for worker in self.store.collect("model|"):
+            for name, values in worker.items():
+                if name in totals:
+                    last_used = max(
+                        totals[name][MODEL_LAST_USED], values[MODEL_LAST_USED]
+                    )
+                    totals[name] += values
+                    totals[name][MODEL_LAST_USED] = last_used
+                else:
+                    totals[name] = values
+
+        metrics = {}
+        for name, values in totals.items():
+            total = int(values[MODEL_TOTAL])
+            metrics[name] = ModelMetrics(
+                model_name=name,
+                total_predictions=total,
+                successful_predictions=int(values[MODEL_SUCCESSFUL]),
+                failed_predictions=int(values[MODEL_FAILED]),
+                # True mean over all predictions
+                avg_processing_time_ms=values[MODEL_TIME_MS] / total if total else 0.0,
+                last_used=datetime.fromtimestamp(values[MODEL_LAST_USED]).isoformat()
+                if values[MODEL_LAST_USED]
+                else "Never",
+                total_processing_time_ms=float(values[MODEL_TIME_MS]),
             )
+        return metrics
 
     def record_prediction(
         self,
@@ -95,70 +249,286 @@ class MetricsCollector:
     ):
         """Record metrics for a prediction request"""
         try:
-            metric = PredictionMetrics(
-                timestamp=datetime.now().isoformat(),
-                model_name=model_name,
-                processing_time_ms=processing_time_ms,
-                prediction=prediction,
-                probability=probability,
-                confidence_level=confidence_level,
-                success=success,
-                error_message=error_message,
-            )
+            with self._lock:
+                ring = self.predictions
+                ring.append(
+                    model_name,
+                    processing_time_ms,
+                    prediction,
+                    probability,
+                    confidence_level,
+                    success,
+                    error_message,
+                )
+                ring_totals = self.store.array("ring|totals", 3)
+                ring_totals[RING_SIZE] = ring.size
+                ring_totals[RING_SUCCESSFUL] = ring.success_count
+                ring_totals[RING_LATENCY_MS] = ring.latency_sum_ms
+
+                # Update model metrics
+                model_totals = self.store.array(f"model|{model_name}", 5)
+                model_totals[MODEL_TOTAL] += 1
+                model_totals[MODEL_SUCCESSFUL if success else MODEL_FAILED] += 1
+                model_totals[MODEL_TIME_MS] += processing_time_ms
+                model_totals[MODEL_LAST_USED] = time.time()
+
+                self._sketch("model", self.model_latency, model_name).add(
+                    processing_time_ms
+                )
 
-            self.prediction_metrics.append(metric)
+        except Exception as e:
+            logger.error(f"Failed to record prediction metrics: {e}")
 
-            # Update model metrics
-            if model_name in self.model_metrics:
-                model_metric = self.model_metrics[model_name]
-                model_metric.total_predictions += 1
-                model_metric.last_used = datetime.now().isoformat()
+    def _sketch(self, family: str, sketches: dict, key) -> WindowedSketch:
+        """Get or create this worker's latency sketch (caller holds the lock)"""
+        sketch = sketches.get(key)
+        if sketch is None:
+            prefix = f"latency|{family}|{json.dumps(key)}|"
+            sketch = sketches[key] = WindowedSketch(
+                self.latency_window_seconds,
+                allocate=lambda part, size: self.store.array(prefix + part, size),
+            )
+        return sketch
+
+    def _merged_sketches(self, family: str) -> dict[Any, WindowedSketch]:
+        """Latency sketches of one family merged across workers"""
+        merged: dict[Any, WindowedSketch] = {}
+        for worker in self.store.collect(f"latency|{family}|"):
+            states: dict[str, dict[str, np.ndarray]] = {}
+            for name, values in worker.items():
+                key, part = name.rsplit("|", 1)
+                states.setdefault(key, {})[part] = values
+            for key, parts in states.items():
+                key = json.loads(key)
+                key = tuple(key) if isinstance(key, list) else key
+                if key not in merged:
+                    merged[key] = WindowedSketch(self.latency_window_seconds)
+                merged[key].merge(
+                    WindowedSketch(
+                        self.latency_window_seconds,
+                        allocate=lambda part, size, parts=parts: parts[part],
+                    )
+                )
+        return merged
+
+    def get_latency_metrics(self, qs=DEFAULT_QUANTILES) -> dict[str, Any]:
+        """Latency percentiles (ms) per model and per endpoint and model"""
+        models = {
+            name: sketch.summary(qs)
+            for name, sketch in self._merged_sketches("model").items()
+        }
+        endpoints: dict[str, dict] = {}
+        for (endpoint, model), sketch in self._merged_sketches("request").items():
+            endpoints.setdefault(endpoint, {})[model or "all"] = sketch.summary(qs)
+        return {"models": models, "endpoints": endpoints}
+
+    def latency_sketch_states(self) -> dict[str, Any]:
+        """Lifetime sketch states, mergeable with other exports"""
+        return {
+            "models": {
+                name: sketch.lifetime.to_dict()
+                for name, sketch in self._merged_sketches("model").items()
+            },
+            "endpoints": {
+                f"{endpoint} {model}".strip(): sketch.lifetime.to_dict()
+                for (endpoint, model), sketch in self._merged_sketches(
+                    "request"
+                ).items()
+            },
+        }
+
+    @property
+    def prediction_metrics(self) -> list[PredictionMetrics]:
+        """Predictions currently held in this worker's ring buffer, oldest first"""
+        with self._lock:
+            records = self.predictions.latest()
+        return [PredictionMetrics(**record) for record in records]
+
+    def record_cache_lookup(self, model_name: str, hit: bool):
+        """Record a prediction cache hit or miss"""
+        with self._lock:
+            self.store.array(f"cache|{model_name}", 2)[0 if hit else 1] += 1
+
+    @property
+    def cache_metrics(self) -> dict[str, CacheMetrics]:
+        """Cache hits and misses per model, summed across workers"""
+        totals: dict[str, np.ndarray] = {}
+        for worker in self.store.collect("cache|"):
+            for name, values in worker.items():
+                totals[name] = totals[name] + values if name in totals else values
+        return {
+            name: CacheMetrics(name, int(values[0]), int(values[1]))
+            for name, values in totals.items()
+        }
+
+    def get_cache_metrics(self) -> dict[str, Any]:
+        """Hit and miss counts and rates, overall and per model"""
+        cache_metrics = list(self.cache_metrics.values())
+        hits = sum(m.hits for m in cache_metrics)
+        misses = sum(m.misses for m in cache_metrics)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0,
+            "models": {
+                metric.model_name: {
+                    "hits": metric.hits,
+                    "misses": metric.misses,
+                    "hit_rate": round(metric.hit_rate, 4),
+                }
+                for metric in cache_metrics
+            },
+        }
 
-                if success:
-                    model_metric.successful_predictions += 1
-                else:
-                    model_metric.failed_predictions += 1
+    def record_request(
+        self, endpoint: str, model: str, status: int, duration_seconds: float
+    ):
+        """Record one HTTP request for the Prometheus endpoint"""
+        self.requests_total.inc((endpoint, model, str(status)))
+        self.request_duration.observe((endpoint, model), duration_seconds)
+        with self._lock:
+            sketch = self._sketch("request", self.request_latency, (endpoint, model))
+            sketch.add(duration_seconds * 1000)
+
+    def record_stages(self, endpoint: str, model: str, stages: list[tuple[str, float]]):
+        """Record the per-stage durations (seconds) of one request"""
+        for stage, seconds in stages:
+            self.stage_duration.observe((endpoint, model, stage), seconds)
+
+    def get_stage_timings(self) -> dict[str, Any]:
+        """
+        Per-model, per-stage call count, total and mean time in milliseconds,
+        from the request stage spans summed over endpoints
+        """
+        totals: dict[str, dict[str, list]] = {}
+        for (_, model, stage), (count, seconds) in self.stage_duration.totals().items():
+            entry = totals.setdefault(model, {}).setdefault(stage, [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds * 1000
+        return {
+            model: {
+                stage: {
+                    "count": count,
+                    "total_ms": round(total_ms, 3),
+                    "avg_ms": round(total_ms / count, 4),
+                }
+                for stage, (count, total_ms) in stages.items()
+                if count
+            }
+            for model, stages in totals.items()
+        }
 
-                # Update average processing time
-                if model_metric.avg_processing_time_ms == 0:
-                    model_metric.avg_processing_time_ms = processing_time_ms
-                else:
-                    model_metric.avg_processing_time_ms = (
-                        model_metric.avg_processing_time_ms + processing_time_ms
-                    ) / 2
+    def record_batch_size(self, source: str, model_name: str, size: int):
+        """Record the number of rows scored together"""
+        self.batch_size.observe((source, model_name), size)
 
-            # Keep only last 1000 predictions to prevent memory issues
-            if len(self.prediction_metrics) > 1000:
-                self.prediction_metrics = self.prediction_metrics[-1000:]
+    def record_model_load(
+        self,
+        model_name: str,
+        load_seconds: float,
+        size_bytes: int = 0,
+        loaded: bool = True,
+    ):
+        """Record a model (re)load"""
+        self.model_loaded.set((model_name,), 1 if loaded else 0)
+        self.model_load_seconds.set((model_name,), load_seconds)
+        self.model_size_bytes.set((model_name,), size_bytes)
+
+    def record_model_warmup(self, model_name: str, warmup_seconds: float):
+        """Record how long a model's startup warm-up took"""
+        self.model_warmup_seconds.set((model_name,), warmup_seconds)
+
+    def record_model_eviction(self, model_name: str):
+        """Record a model unloaded by the model manager"""
+        self.model_loaded.set((model_name,), 0)
+        self.model_evictions.inc((model_name,))
+
+    def _runtime_metrics(self) -> list[Gauge]:
+        """Process and system gauges, read when the endpoint is scraped"""
+        process = Gauge("process_resident_memory_bytes", "Resident memory size")
+        cpu = Counter("process_cpu_seconds_total", "User and system CPU time")
+        threads = Gauge("process_threads", "Number of OS threads")
+        started = Gauge("process_start_time_seconds", "Process start time (epoch)")
+        system = Gauge(
+            "ml_api_system_usage_percent", "Sampled host utilisation", ("resource",)
+        )
+        staleness = Gauge(
+            "ml_api_system_snapshot_age_seconds", "Age of the system snapshot"
+        )
+        quantiles = Gauge(
+            "ml_api_request_latency_quantile_seconds",
+            "Sketched request latency quantiles over the sliding window",
+            ("endpoint", "model", "quantile"),
+        )
+        cache = Counter(
+            "ml_api_prediction_cache_lookups_total",
+            "Prediction cache lookups by model and result",
+            ("model", "result"),
+        )
+
+        with self._process.oneshot():
+            process.set(value=self._process.memory_info().rss)
+            times = self._process.cpu_times()
+            cpu.inc(amount=times.user + times.system)
+            threads.set(value=self._process.num_threads())
+            started.set(value=self._process.create_time())
+
+        snapshot = self.sampler.snapshot
+        system.set(("cpu",), snapshot.cpu_percent)
+        system.set(("memory",), snapshot.memory_percent)
+        system.set(("disk",), snapshot.disk_percent)
+        staleness.set(value=snapshot.staleness_seconds)
+
+        for name, metric in self.cache_metrics.items():
+            cache.inc((name, "hit"), metric.hits)
+            cache.inc((name, "miss"), metric.misses)
+
+        for endpoint, by_model in self.get_latency_metrics()["endpoints"].items():
+            for model, summary in by_model.items():
+                model = "" if model == "all" else model
+                for q in DEFAULT_QUANTILES:
+                    label = quantile_label(q)
+                    quantiles.set(
+                        (endpoint, model, str(q)), summary["window"][label] / 1000
+                    )
 
-        except Exception as e:
-            logger.error(f"Failed to record prediction metrics: {e}")
+        return [process, cpu, threads, started, system, staleness, quantiles, cache]
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return render(
+            [
+                self.requests_total,
+                self.request_duration,
+                self.stage_duration,
+                self.batch_size,
+                self.model_loaded,
+                self.model_load_seconds,
+                self.model_size_bytes,
+                self.model_warmup_seconds,
+                self.model_evictions,
+                *self._runtime_metrics(),
+            ]
+        )
 
     def record_system_metrics(self):
-        """Record current system metrics"""
+        """Record the latest system snapshot from the background sampler"""
         try:
             current_time = datetime.now()
             uptime = (current_time - self.startup_time).total_seconds()
-
-            # Get system metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage("/")
+            snapshot = self.sampler.snapshot
 
             metric = SystemMetrics(
-                timestamp=current_time.isoformat(),
-                cpu_percent=cpu_percent,
-                memory_percent=memory.percent,
-                memory_used_mb=memory.used / (1024 * 1024),
-                disk_percent=(disk.used / disk.total) * 100,
+                timestamp=snapshot.timestamp,
+                cpu_percent=snapshot.cpu_percent,
+                memory_percent=snapshot.memory_percent,
+                memory_used_mb=snapshot.memory_used_mb,
+                disk_percent=snapshot.disk_percent,
                 uptime_seconds=uptime,
             )
 
-            self.system_metrics.append(metric)
-
-            # Keep only last 100 system metrics
-            if len(self.system_metrics) > 100:
-                self.system_metrics = self.system_metrics[-100:]
+            with self._lock:
+                self.system_metrics.append(metric)
 
         except Exception as e:
             logger.error(f"Failed to record system metrics: {e}")
@@ -169,26 +539,38 @@ class MetricsCollector:
             current_time = datetime.now()
             uptime = (current_time - self.startup_time).total_seconds()
 
-            # Calculate prediction summary
-            total_predictions = len(self.prediction_metrics)
-            successful_predictions = len(
-                [m for m in self.prediction_metrics if m.success]
+            # Prediction summary from the live workers' ring buffer aggregates
+            ring_totals = [
+                worker["totals"]
+                for worker in self.store.collect("ring|", live_only=True)
+                if "totals" in worker
+            ]
+            total_predictions = int(sum(t[RING_SIZE] for t in ring_totals))
+            successful_predictions = int(sum(t[RING_SUCCESSFUL] for t in ring_totals))
+            avg_processing_time = (
+                sum(t[RING_LATENCY_MS] for t in ring_totals) / total_predictions
+                if total_predictions
+                else 0.0
             )
+            models = {
+                name: {
+                    "total_predictions": metric.total_predictions,
+                    "successful_predictions": metric.successful_predictions,
+                    "failed_predictions": metric.failed_predictions,
+                    "avg_processing_time_ms": round(metric.avg_processing_time_ms, 2),
+                    "last_used": metric.last_used,
+                }
+                for name, metric in self.model_metrics.items()
+            }
             failed_predictions = total_predictions - successful_predictions
 
-            avg_processing_time = 0.0
-            if total_predictions > 0:
-                avg_processing_time = (
-                    sum(m.processing_time_ms for m in self.prediction_metrics)
-                    / total_predictions
-                )
-
-            # Get latest system metrics
-            latest_system = self.system_metrics[-1] if self.system_metrics else None
+            # Latest system snapshot from the background sampler
+            snapshot = self.sampler.snapshot
 
             summary = {
                 "timestamp": current_time.isoformat(),
                 "uptime_seconds": round(uptime, 2),
+                "workers": self.store.workers(),
                 "predictions": {
                     "total": total_predictions,
                     "successful": successful_predictions,
@@ -200,34 +582,16 @@ class MetricsCollector:
                     else 0,
                     "avg_processing_time_ms": round(avg_processing_time, 2),
                 },
-                "models": {
-                    name: {
-                        "total_predictions": metric.total_predictions,
-                        "successful_predictions": metric.successful_predictions,
-                        "failed_predictions": metric.failed_predictions,
-                        "avg_processing_time_ms": round(
-                            metric.avg_processing_time_ms, 2
-                        ),
-                        "last_used": metric.last_used,
-                    }
-                    for name, metric in self.model_metrics.items()
-                },
+                "models": models,
+                "latency_ms": self.get_latency_metrics(),
+                "cache": self.get_cache_metrics(),
                 "system": {
-                    "cpu_percent": round(latest_system.cpu_percent, 2)
-                    if latest_system
-                    else 0,
-                    "memory_percent": round(latest_system.memory_percent, 2)
-                    if latest_system
-                    else 0,
-                    "memory_used_mb": round(latest_system.memory_used_mb, 2)
-                    if latest_system
-                    else 0,
-                    "disk_percent": round(latest_system.disk_percent, 2)
-                    if latest_system
-                    else 0,
-                }
-                if latest_system
-                else {},
+                    "cpu_percent": round(snapshot.cpu_percent, 2),
+                    "memory_percent": round(snapshot.memory_percent, 2),
+                    "memory_used_mb": round(snapshot.memory_used_mb, 2),
+                    "disk_percent": round(snapshot.disk_percent, 2),
+                    "staleness_seconds": round(snapshot.staleness_seconds, 3),
+                },
             }
 
             return summary
@@ -239,19 +603,20 @@ class MetricsCollector:
     def export_metrics(self, filepath: str):
         """Export all metrics to a JSON file"""
         try:
-            export_data = {
-                "export_timestamp": datetime.now().isoformat(),
-                "summary": self.get_summary_metrics(),
-                "prediction_metrics": [
-                    asdict(m) for m in self.prediction_metrics[-100:]
-                ],  # Last 100
-                "system_metrics": [
-                    asdict(m) for m in self.system_metrics[-50:]
-                ],  # Last 50
-                "model_metrics": {
-                    name: asdict(metric) for name, metric in self.model_metrics.items()
-                },
+            summary = self.get_summary_metrics()
+            with self._lock:
+                export_data = {
+                    "export_timestamp": datetime.now().isoformat(),
+                    "summary": summary,
+                    "prediction_metrics": self.predictions.latest(100),  # Last 100
+                    "system_metrics": [
+                        asdict(m) for m in list(self.system_metrics)[-50:]
+                    ],  # Last 50
+                }
+            export_data["model_metrics"] = {
+                name: asdict(metric) for name, metric in self.model_metrics.items()
             }
+            export_data["latency_sketches"] = self.latency_sketch_states()
 
             with open(filepath, "w") as f:
                 json.dump(export_data, f, indent=2, default=str)
@@ -272,6 +637,56 @@ def record_prediction(*args, **kwargs):
     metrics_collector.record_prediction(*args, **kwargs)
 
 
+def record_cache_lookup(model_name: str, hit: bool):
+    """Record a prediction cache hit or miss"""
+    metrics_collector.record_cache_lookup(model_name, hit)
+
+
+def get_cache_metrics():
+    """Get prediction cache hit/miss metrics"""
+    return metrics_collector.get_cache_metrics()
+
+
+def record_request(*args, **kwargs):
+    """Record an HTTP request for Prometheus"""
+    metrics_collector.record_request(*args, **kwargs)
+
+
+def record_stages(endpoint: str, model_name: str, stages: list[tuple[str, float]]):
+    """Record per-stage durations of one request"""
+    metrics_collector.record_stages(endpoint, model_name, stages)
+
+
+def get_stage_timings():
+    """Get the per-model stage timing breakdown"""
+    return metrics_collector.get_stage_timings()
+
+
+def record_batch_size(source: str, model_name: str, size: int):
+    """Record the number of rows scored together"""
+    metrics_collector.record_batch_size(source, model_name, size)
+
+
+def record_model_load(*args, **kwargs):
+    """Record a model (re)load"""
+    metrics_collector.record_model_load(*args, **kwargs)
+
+
+def record_model_warmup(model_name: str, warmup_seconds: float):
+    """Record how long a model's startup warm-up took"""
+    metrics_collector.record_model_warmup(model_name, warmup_seconds)
+
+
+def record_model_eviction(model_name: str):
+    """Record a model unloaded by the model manager"""
+    metrics_collector.record_model_eviction(model_name)
+
+
+def render_prometheus() -> str:
+    """Render all metrics for Prometheus"""
+    return metrics_collector.render_prometheus()
+
+
 def record_system_metrics():
     """Record system metrics"""
     metrics_collector.record_system_metrics()
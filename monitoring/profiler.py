@@ -0,0 +1,147 @@
+"""
+On-Demand Sampling Profiler
+Time-boxed statistical sampling of every thread's stack, as collapsed stacks
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any
+
+# Stacks beyond the distinct-stack budget are counted under this frame
+TRUNCATED_STACK = "[truncated]"
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+@dataclass
+class ProfileResult:
+    """Aggregated samples of one profiling run"""
+
+    duration_seconds: float
+    rate_hz: float
+    samples: int = 0
+    sampling_seconds: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def overhead_ratio(self) -> float:
+        """Fraction of the run the sampler spent walking stacks"""
+        return (
+            self.sampling_seconds / self.duration_seconds
+            if self.duration_seconds
+            else 0.0
+        )
+
+    def collapsed(self) -> str:
+        """``frame;frame;frame count`` lines, the input format of flamegraph tools"""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "duration_seconds": round(self.duration_seconds, 3),
+            "rate_hz": self.rate_hz,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "overhead_ratio": round(self.overhead_ratio, 4),
+            "stacks": dict(self.stacks.most_common()),
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler built on ``sys._current_frames()``.
+
+    A run samples the stack of every other thread ``rate_hz`` times a
+    second for ``duration_seconds`` and counts identical stacks, so the
+    cost depends on the rate and thread count, not on the code being
+    profiled. Duration, rate, stack depth and the number of distinct
+    stacks are capped, and only one run may be active at a time. If a
+    sample takes longer than the interval, later samples are skipped
+    rather than queued.
+    """
+
+    def __init__(
+        self,
+        max_duration_seconds: float = 30.0,
+        max_rate_hz: float = 1000.0,
+        max_depth: int = 64,
+        max_stacks: int = 5000,
+    ):
+        self.max_duration_seconds = max_duration_seconds
+        self.max_rate_hz = max_rate_hz
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self._running = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def _stack(self, frame: FrameType, thread_name: str) -> str:
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(f"thread:{thread_name}")
+        return ";".join(reversed(frames))
+
+    def profile(self, duration_seconds: float, rate_hz: float = 100.0) -> ProfileResult:
+        """Sample all other threads from the calling thread (blocks for the run)"""
+        if not 0 < duration_seconds <= self.max_duration_seconds:
+            raise ValueError(
+                f"duration_seconds must be in (0, {self.max_duration_seconds}]"
+            )
+        if not 0 < rate_hz <= self.max_rate_hz:
+            raise ValueError(f"rate_hz must be in (0, {self.max_rate_hz}]")
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+
+        try:
+            result = ProfileResult(duration_seconds=duration_seconds, rate_hz=rate_hz)
+            interval = 1.0 / rate_hz
+            own_thread = threading.get_ident()
+            start = time.perf_counter()
+            deadline = start + duration_seconds
+            next_sample = start
+
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now < next_sample:
+                    time.sleep(min(next_sample, deadline) - now)
+                    continue
+
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_thread:
+                        continue
+                    stack = self._stack(frame, names.get(ident, str(ident)))
+                    if (
+                        stack not in result.stacks
+                        and len(result.stacks) >= self.max_stacks
+                    ):
+                        stack = TRUNCATED_STACK
+                    result.stacks[stack] += 1
+                result.samples += 1
+
+                finished = time.perf_counter()
+                result.sampling_seconds += finished - now
+                # Skip missed ticks instead of sampling back-to-back
+                next_sample += interval
+                if next_sample < finished:
+                    next_sample = finished + interval
+
+            result.duration_seconds = time.perf_counter() - start
+            return result
+        finally:
+            self._running.release()
@@ -0,0 +1,307 @@
+"""
+Prometheus Exposition
+Fixed-bucket counters, gauges and histograms rendered in the text format
+"""
+
+import inspect
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Container, Iterable
+from typing import Optional
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from monitoring.shared import LocalStore
+from monitoring.spans import RequestTimer, activate, deactivate
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# Pipeline stage latency buckets in seconds
+STAGE_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+# Rows per scored batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 100, 250, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """
+    Labelled metric family; children are keyed by label-value tuples.
+
+    Each child is a float64 array from a metric store. With a shared
+    :class:`~monitoring.shared.MmapStore` every worker writes its own
+    arrays and rendering sums them across workers.
+    """
+
+    kind = "untyped"
+    child_size = 1
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple = (), store=None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._store = store if store is not None else LocalStore()
+        self._children: dict[tuple, np.ndarray] = {}
+        self._store.on_fork(self._children.clear)
+
+    def _child(self, labels: tuple) -> np.ndarray:
+        """This worker's array for ``labels`` (caller holds the lock)"""
+        child = self._children.get(labels)
+        if child is None:
+            key = f"{self.name}|{json.dumps(list(labels))}"
+            child = self._children[labels] = self._store.array(key, self.child_size)
+        return child
+
+    def _collect(self) -> dict[tuple, np.ndarray]:
+        """Children summed across every worker's store"""
+        totals: dict[tuple, np.ndarray] = {}
+        for worker in self._store.collect(f"{self.name}|"):
+            for key, values in worker.items():
+                labels = tuple(json.loads(key))
+                if labels in totals:
+                    totals[labels] += values
+                else:
+                    totals[labels] = values
+        return totals
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1.0):
+        with self._lock:
+            self._child(labels)[0] += amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, values in self._collect().items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(values[0])}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set (per process, not summed)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+
+    def set(self, labels: tuple = (), value: float = 0.0):
+        with self._lock:
+            self._child(labels)[0] = value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram per label set (bucket counts, sum and count)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+        store=None,
+    ):
+        super().__init__(name, documentation, labelnames, store)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (+Inf last), then the sum
+        self.child_size = len(self.buckets) + 2
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._child(labels)
+            child[index] += 1
+            child[-1] += value
+
+    def totals(self) -> dict[tuple, tuple[int, float]]:
+        """``(count, sum)`` per label set, across every worker"""
+        return {
+            labels: (int(values[:-1].sum()), float(values[-1]))
+            for labels, values in self._collect().items()
+        }
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        bucket_names = (*self.labelnames, "le")
+        for labels, values in self._collect().items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), values[:-1]):
+                cumulative += int(count)
+                label_text = _format_labels(
+                    bucket_names, (*labels, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def render(metrics: Iterable[_Metric]) -> str:
+    """Prometheus text exposition of ``metrics``"""
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording request counts and latency per route and model.
+
+    Requests are labelled by route template (so path parameters do not
+    create new series) and, for routes taking a ``model_name`` query
+    parameter, by the model served. Model names outside ``known_models``
+    are reported as ``unknown`` to keep label cardinality bounded.
+
+    Each request also gets a :class:`~monitoring.spans.RequestTimer`. When a
+    handler records stages on it, the time from the last stage to the
+    response start is added as ``serialize``, the stages are sent in a
+    ``Server-Timing`` header (unless ``server_timing`` is False) and
+    passed to ``collector.record_stages``.
+    """
+
+    def __init__(
+        self,
+        app,
+        collector,
+        known_models: Optional[Container] = None,
+        server_timing: bool = True,
+    ):
+        self.app = app
+        self.collector = collector
+        self.known_models = known_models
+        self.server_timing = server_timing
+        self._route_paths: dict = {}
+        self._model_defaults: dict = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        timer = RequestTimer()
+        token = activate(timer)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timer.stages:
+                    timer.lap("serialize")
+                    if self.server_timing:
+                        header = (b"server-timing", timer.server_timing().encode())
+                        message = {
+                            **message,
+                            "headers": [*message.get("headers", []), header],
+                        }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            deactivate(token)
+            endpoint, model = self._labels(scope)
+            self.collector.record_request(
+                endpoint, model, status_code, time.perf_counter() - start
+            )
+            if timer.stages:
+                self.collector.record_stages(endpoint, model, timer.stages)
+
+    def _labels(self, scope) -> tuple[str, str]:
+        endpoint_fn = scope.get("endpoint")
+        if endpoint_fn is None:
+            return "unmatched", ""
+
+        if endpoint_fn not in self._route_paths:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint_fn:
+                    self._route_paths[endpoint_fn] = route.path
+                    break
+            else:
+                self._route_paths[endpoint_fn] = "unmatched"
+            parameter = inspect.signature(endpoint_fn).parameters.get("model_name")
+            if parameter is None:
+                self._model_defaults[endpoint_fn] = None
+            elif isinstance(parameter.default, str):
+                self._model_defaults[endpoint_fn] = parameter.default
+            else:
+                self._model_defaults[endpoint_fn] = "unknown"
+
+        default_model = self._model_defaults[endpoint_fn]
+        if default_model is None:
+            return self._route_paths[endpoint_fn], ""
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        model = query.get("model_name", [default_model])[0]
+        if self.known_models is not None and model not in self.known_models:
+            model = "unknown"
+        return self._route_paths[endpoint_fn], model
@@ -0,0 +1,123 @@
+"""
+Prediction Ring Buffer
+Fixed-capacity, array-backed store of recent predictions with running totals
+"""
+
+import time
+from array import array
+from datetime import datetime
+from typing import Optional
+
+CONFIDENCE_LEVELS = ("Low", "Medium", "High")
+
+# Bits of the per-prediction flags column
+SUCCESS_FLAG = 1
+POSITIVE_FLAG = 2
+
+
+class PredictionRing:
+    """
+    The most recent ``capacity`` predictions in preallocated columns.
+
+    Appending overwrites the oldest slot once full and keeps the window's
+    count, success count and latency sum up to date incrementally, so both
+    recording and summarising are O(1) with constant memory. Callers are
+    responsible for locking.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        # Typed arrays: contiguous like NumPy, but cheap per-element writes
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.latencies_ms = array("d", bytes(8 * capacity))
+        self.probabilities = array("d", bytes(8 * capacity))
+        self.flags = array("B", bytes(capacity))
+        self.model_ids = array("h", bytes(2 * capacity))
+        self.confidence_ids = array("b", bytes(capacity))
+        self.errors: list[Optional[str]] = [None] * capacity
+
+        self.model_names: list[str] = []
+        self._model_ids: dict[str, int] = {}
+
+        self.next = 0
+        self.size = 0
+        self.total_appended = 0
+
+        # Running aggregates over the slots currently held
+        self.latency_sum_ms = 0.0
+        self.success_count = 0
+
+    def _model_id(self, model_name: str) -> int:
+        model_id = self._model_ids.get(model_name)
+        if model_id is None:
+            model_id = self._model_ids[model_name] = len(self.model_names)
+            self.model_names.append(model_name)
+        return model_id
+
+    def append(
+        self,
+        model_name: str,
+        processing_time_ms: float,
+        prediction: bool,
+        probability: float,
+        confidence_level: str,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ):
+        """Store one prediction, evicting the oldest once the ring is full"""
+        i = self.next
+        if self.size == self.capacity:
+            self.latency_sum_ms -= self.latencies_ms[i]
+            self.success_count -= self.flags[i] & SUCCESS_FLAG
+        else:
+            self.size += 1
+
+        self.timestamps[i] = timestamp if timestamp is not None else time.time()
+        self.latencies_ms[i] = processing_time_ms
+        self.probabilities[i] = probability
+        self.flags[i] = (SUCCESS_FLAG if success else 0) | (
+            POSITIVE_FLAG if prediction else 0
+        )
+        self.model_ids[i] = self._model_id(model_name)
+        self.confidence_ids[i] = (
+            CONFIDENCE_LEVELS.index(confidence_level)
+            if confidence_level in CONFIDENCE_LEVELS
+            else -1
+        )
+        self.errors[i] = error_message
+
+        self.latency_sum_ms += processing_time_ms
+        self.success_count += 1 if success else 0
+        self.next = (i + 1) % self.capacity
+        self.total_appended += 1
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.latency_sum_ms / self.size if self.size else 0.0
+
+    def latest(self, n: Optional[int] = None) -> list[dict]:
+        """The newest ``n`` predictions (default: all held), oldest first"""
+        n = self.size if n is None else min(n, self.size)
+        slots = [(self.next - n + k) % self.capacity for k in range(n)]
+        records = []
+        for i in slots:
+            confidence_id = self.confidence_ids[i]
+            records.append(
+                {
+                    "timestamp": datetime.fromtimestamp(self.timestamps[i]).isoformat(),
+                    "model_name": self.model_names[self.model_ids[i]],
+                    "processing_time_ms": self.latencies_ms[i],
+                    "prediction": bool(self.flags[i] & POSITIVE_FLAG),
+                    "probability": self.probabilities[i],
+                    "confidence_level": CONFIDENCE_LEVELS[confidence_id]
+                    if confidence_id >= 0
+                    else "",
+                    "success": bool(self.flags[i] & SUCCESS_FLAG),
+                    "error_message": self.errors[i],
+                }
+            )
+        return records
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,223 @@
+"""
+Multi-Process Metric Storage
+Per-worker float64 arrays in memory-mapped files, aggregated at read time
+"""
+
+import glob
+import logging
+import mmap
+import os
+import struct
+from typing import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by all workers of one deployment (empty it on restart)
+MULTIPROC_DIR_ENV = "METRICS_MULTIPROC_DIR"
+
+DEFAULT_SIZE_BYTES = 16 * 1024 * 1024
+
+# File header: bytes in use. Entry: key length, value count, key, values
+_HEADER = struct.Struct("<Q")
+_ENTRY = struct.Struct("<II")
+
+
+def _padded(n: int) -> int:
+    """Round up to 8 bytes so float64 values stay aligned"""
+    return (n + 7) & ~7
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LocalStore:
+    """
+    Single-process store: named NumPy arrays in this process's memory.
+
+    Used when no multi-process directory is configured, so a single worker
+    pays nothing for the shared backend.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._arrays: dict[str, np.ndarray] = {}
+
+    def array(self, key: str, size: int) -> np.ndarray:
+        """Zero-initialised float64 array for ``key`` (created once)"""
+        values = self._arrays.get(key)
+        if values is None:
+            values = self._arrays[key] = np.zeros(size, dtype=np.float64)
+        return values
+
+    def collect(self, prefix: str, live_only: bool = False) -> list[dict]:
+        """Per-worker copies of the arrays whose key starts with ``prefix``"""
+        return [
+            {
+                key[len(prefix) :]: values.copy()
+                for key, values in list(self._arrays.items())
+                if key.startswith(prefix)
+            }
+        ]
+
+    def on_fork(self, callback: Callable[[], None]):
+        """Forked children keep a private copy; nothing to reset"""
+
+    def workers(self) -> int:
+        return 1
+
+
+class MmapStore:
+    """
+    One append-only memory-mapped file per worker process.
+
+    Each worker only ever writes to its own file, so recording is a plain
+    in-place array update with no cross-process locking. An entry is
+    written in full before the header's used-bytes count is advanced, so
+    readers (any worker serving /metrics or /health) parse every file in
+    the directory without coordination and sum the values at read time.
+    Files of exited workers are kept, so counters stay monotonic across
+    worker restarts; ``live_only`` skips them for point-in-time values.
+    """
+
+    shared = True
+
+    def __init__(self, directory: str, size_bytes: int = DEFAULT_SIZE_BYTES):
+        self.directory = directory
+        self.size_bytes = size_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._mm = None
+        self._used = 0
+        self._views: dict[str, np.ndarray] = {}
+        self._fork_callbacks: list[Callable[[], None]] = []
+        self._full = False
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"worker_{pid}.db")
+
+    def _open(self):
+        fd = os.open(self._path(os.getpid()), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # A leftover file from a recycled pid starts over
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, self.size_bytes)
+            self._mm = mmap.mmap(fd, self.size_bytes)
+        finally:
+            os.close(fd)
+        self._used = _HEADER.size
+        _HEADER.pack_into(self._mm, 0, self._used)
+
+    def _after_fork(self):
+        """Children must not write into the parent's file"""
+        self._mm = None
+        self._used = 0
+        self._views = {}
+        self._full = False
+        for callback in self._fork_callbacks:
+            callback()
+
+    def on_fork(self, callback: Callable[[], None]):
+        """Run ``callback`` in forked children so cached arrays are dropped"""
+        self._fork_callbacks.append(callback)
+
+    def array(self, key: str, size: int) -> np.ndarray:
+        """Zero-initialised float64 array for ``key`` in this worker's file"""
+        values = self._views.get(key)
+        if values is not None:
+            return values
+        if self._mm is None:
+            self._open()
+
+        encoded = key.encode("utf-8")
+        offset = self._used
+        values_offset = offset + _ENTRY.size + _padded(len(encoded))
+        end = values_offset + 8 * size
+        if end > self.size_bytes:
+            if not self._full:
+                logger.warning(
+                    f"⚠️ Metrics file full ({self.size_bytes} bytes); "
+                    f"new series are no longer shared across workers"
+                )
+                self._full = True
+            values = self._views[key] = np.zeros(size, dtype=np.float64)
+            return values
+
+        _ENTRY.pack_into(self._mm, offset, len(encoded), size)
+        self._mm[offset + _ENTRY.size : offset + _ENTRY.size + len(encoded)] = encoded
+        values = np.ndarray(
+            (size,), dtype=np.float64, buffer=self._mm, offset=values_offset
+        )
+        # Publish the entry only once it is complete
+        self._used = end
+        _HEADER.pack_into(self._mm, 0, self._used)
+        self._views[key] = values
+        return values
+
+    @staticmethod
+    def _read(path: str, prefix: str) -> dict[str, np.ndarray]:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return {}
+            (used,) = _HEADER.unpack(header)
+            data = f.read(max(0, used - _HEADER.size))
+
+        entries = {}
+        position = 0
+        while position + _ENTRY.size <= len(data):
+            key_length, size = _ENTRY.unpack_from(data, position)
+            key_start = position + _ENTRY.size
+            values_start = key_start + _padded(key_length)
+            position = values_start + 8 * size
+            if position > len(data):
+                break
+            key = data[key_start : key_start + key_length].decode("utf-8")
+            if key.startswith(prefix):
+                entries[key[len(prefix) :]] = np.frombuffer(
+                    data, dtype=np.float64, count=size, offset=values_start
+                ).copy()
+        return entries
+
+    def _files(self, live_only: bool) -> list[str]:
+        paths = sorted(glob.glob(os.path.join(self.directory, "worker_*.db")))
+        if not live_only:
+            return paths
+        own = os.getpid()
+        return [
+            path
+            for path in paths
+            if (pid := int(os.path.basename(path)[7:-3])) == own or _pid_alive(pid)
+        ]
+
+    def collect(self, prefix: str, live_only: bool = False) -> list[dict]:
+        """Per-worker arrays whose key starts with ``prefix`` (prefix removed)"""
+        workers = []
+        for path in self._files(live_only):
+            try:
+                workers.append(self._read(path, prefix))
+            except OSError as e:
+                logger.warning(f"⚠️ Could not read metrics file {path}: {e}")
+        return workers
+
+    def workers(self) -> int:
+        """Number of live worker processes with a metrics file"""
+        return len(self._files(live_only=True))
+
+
+def create_store():
+    """Shared mmap store if ``METRICS_MULTIPROC_DIR`` is set, else local"""
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if directory:
+        logger.info(f"✅ Multi-process metrics in {directory}")
+        return MmapStore(directory)
+    return LocalStore()
@@ -0,0 +1,234 @@
+"""
+Streaming Quantile Sketches
+Mergeable log-bucketed latency histograms with sliding and lifetime windows
+"""
+
+import math
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def quantile_label(q: float) -> str:
+    """0.5 -> "p50", 0.999 -> "p999" """
+    return "p" + f"{q * 100:g}".replace(".", "")
+
+
+def sketch_state_size(
+    relative_accuracy: float = 0.01, min_value: float = 1e-3, max_value: float = 1e5
+) -> int:
+    """Length of a sketch's state array: the running sum plus one per bucket"""
+    log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+    offset = math.floor(math.log(min_value) / log_gamma)
+    return math.ceil(math.log(max_value) / log_gamma) - offset + 2
+
+
+def _zeros(name: str, size: int) -> np.ndarray:
+    return np.zeros(size, dtype=np.float64)
+
+
+class QuantileSketch:
+    """
+    HDR-style histogram with logarithmically spaced buckets.
+
+    Any value in ``[min_value, max_value]`` is reported within
+    ``relative_accuracy`` of its true value, using a fixed number of
+    buckets (about 900 at 1 % accuracy over eight decades). Sketches with
+    the same parameters merge exactly by adding bucket counts, so
+    per-worker or per-interval sketches can be combined at read time.
+
+    All state lives in one float64 array (``[sum, counts...]``), which may
+    be supplied by the caller, e.g. a view into a shared metrics file.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 1e-3,
+        max_value: float = 1e5,
+        state: Optional[np.ndarray] = None,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._offset = math.floor(math.log(min_value) / self._log_gamma)
+        size = sketch_state_size(relative_accuracy, min_value, max_value)
+        if state is None:
+            state = np.zeros(size, dtype=np.float64)
+        elif len(state) != size:
+            raise ValueError(f"Sketch state must have {size} values, got {len(state)}")
+        self.state = state
+        self.counts = state[1:]
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def sum(self) -> float:
+        return float(self.state[0])
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        if value >= self.max_value:
+            return len(self.counts) - 1
+        return math.ceil(math.log(value) / self._log_gamma) - self._offset
+
+    def _value(self, index: int) -> float:
+        """Representative value of a bucket (within the relative accuracy)"""
+        upper = self._gamma ** (index + self._offset)
+        return 2 * upper / (1 + self._gamma)
+
+    def add(self, value: float, count: int = 1):
+        self.counts[self._index(value)] += count
+        self.state[0] += value * count
+
+    def merge(self, other: "QuantileSketch"):
+        """Add another sketch with the same parameters into this one"""
+        if len(other.state) != len(self.state):
+            raise ValueError("Cannot merge sketches with different parameters")
+        self.state += other.state
+
+    def clear(self):
+        self.state[:] = 0.0
+
+    def copy(self) -> "QuantileSketch":
+        return QuantileSketch(
+            self.relative_accuracy,
+            self.min_value,
+            self.max_value,
+            self.state.copy(),
+        )
+
+    def quantiles(self, qs=DEFAULT_QUANTILES) -> dict[str, float]:
+        """Estimated quantiles, e.g. ``{"p50": 3.1, "p99": 18.4}``"""
+        count = self.count
+        if count == 0:
+            return {quantile_label(q): 0.0 for q in qs}
+        cumulative = np.cumsum(self.counts)
+        # Rank of the q-quantile among ``count`` sorted values (1-based)
+        ranks = [max(1, math.ceil(q * count)) for q in qs]
+        indices = np.searchsorted(cumulative, ranks, side="left")
+        return {
+            quantile_label(q): round(self._value(int(i)), 4)
+            for q, i in zip(qs, indices)
+        }
+
+    def summary(self, qs=DEFAULT_QUANTILES) -> dict:
+        count = self.count
+        return {
+            "count": count,
+            "mean": round(self.sum / count, 4) if count else 0.0,
+            **self.quantiles(qs),
+        }
+
+    def to_dict(self) -> dict:
+        """Sparse, JSON-friendly state for shipping between processes"""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "buckets": {int(i): int(self.counts[i]) for i in nonzero},
+            "sum": self.sum,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(state["relative_accuracy"], state["min_value"], state["max_value"])
+        for index, count in state["buckets"].items():
+            sketch.counts[int(index)] = count
+        sketch.state[0] = state["sum"]
+        return sketch
+
+
+class WindowedSketch:
+    """
+    Lifetime sketch plus a sliding window of recent observations.
+
+    The window is split into ``slices`` sub-sketches that rotate as time
+    passes; reading the window merges the slices that are still current,
+    so memory stays bounded and old observations age out in steps of
+    ``window_seconds / slices``.
+
+    ``allocate(name, size)`` supplies the state arrays ("lifetime",
+    "slice0".., "epochs"); by default they are private NumPy arrays.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        slices: int = 6,
+        clock=time.monotonic,
+        allocate: Callable[[str, int], np.ndarray] = _zeros,
+        **sketch_kwargs,
+    ):
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self._clock = clock
+        size = sketch_state_size(**sketch_kwargs)
+        self.lifetime = QuantileSketch(
+            **sketch_kwargs, state=allocate("lifetime", size)
+        )
+        self._slices = [
+            QuantileSketch(**sketch_kwargs, state=allocate(f"slice{i}", size))
+            for i in range(slices)
+        ]
+        # Epoch + 1 of each slice's contents (0: never used)
+        self._slice_epochs = allocate("epochs", slices)
+
+    def _current_slice(self, now: float) -> QuantileSketch:
+        epoch = int(now // self.slice_seconds)
+        i = epoch % len(self._slices)
+        if self._slice_epochs[i] != epoch + 1:
+            self._slices[i].clear()
+            self._slice_epochs[i] = epoch + 1
+        return self._slices[i]
+
+    def add(self, value: float, now: Optional[float] = None):
+        now = self._clock() if now is None else now
+        self._current_slice(now).add(value)
+        self.lifetime.add(value)
+
+    def merge(self, other: "WindowedSketch"):
+        """
+        Fold in another sketch on the same clock (e.g. another worker's).
+
+        Slices holding the same epoch are added; a newer slice replaces an
+        older one in the same position, as rotation would have.
+        """
+        self.lifetime.merge(other.lifetime)
+        for i, (mine, theirs) in enumerate(zip(self._slices, other._slices)):
+            if other._slice_epochs[i] > self._slice_epochs[i]:
+                mine.clear()
+                mine.merge(theirs)
+                self._slice_epochs[i] = other._slice_epochs[i]
+            elif other._slice_epochs[i] == self._slice_epochs[i]:
+                mine.merge(theirs)
+
+    def window(self, now: Optional[float] = None) -> QuantileSketch:
+        """Merged sketch of the slices inside the sliding window"""
+        now = self._clock() if now is None else now
+        oldest = int(now // self.slice_seconds) - len(self._slices) + 1
+        merged = QuantileSketch(
+            self.lifetime.relative_accuracy,
+            self.lifetime.min_value,
+            self.lifetime.max_value,
+        )
+        for epoch, sketch in zip(self._slice_epochs, self._slices):
+            if epoch - 1 >= oldest:
+                merged.merge(sketch)
+        return merged
+
+    def summary(self, qs=DEFAULT_QUANTILES) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "window": self.window().summary(qs),
+            "lifetime": self.lifetime.summary(qs),
+        }
@@ -0,0 +1,74 @@
+"""
+Request Stage Spans
+Per-request stage timer reported as a Server-Timing header and stage histograms
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Optional
+
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar(
+    "request_timer", default=None
+)
+
+
+class RequestTimer:
+    """
+    Stage timer for one request.
+
+    ``lap(stage)`` closes a stage that began at the previous lap (or when
+    the request arrived), so a handler marks the end of each step with a
+    single ``perf_counter`` call and a list append. ``span(stage)`` times
+    a nested block instead.
+    """
+
+    __slots__ = ("start", "_mark", "stages")
+
+    def __init__(self):
+        self.start = self._mark = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+
+    def lap(self, stage: str) -> float:
+        """Record the time since the last mark as ``stage``; returns seconds"""
+        now = time.perf_counter()
+        elapsed = now - self._mark
+        self._mark = now
+        self.stages.append((stage, elapsed))
+        return elapsed
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Record the duration of the enclosed block as ``stage``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._mark = time.perf_counter()
+            self.stages.append((stage, self._mark - start))
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the request arrived"""
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: every stage plus the total"""
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages]
+        parts.append(f"total;dur={self.elapsed_ms():.3f}")
+        return ", ".join(parts)
+
+
+def activate(timer: RequestTimer) -> Token:
+    """Make ``timer`` the current request's timer"""
+    return _current_timer.set(timer)
+
+
+def deactivate(token: Token):
+    _current_timer.reset(token)
+
+
+def current_timer() -> RequestTimer:
+    """The running request's timer (a detached one outside a request)"""
+    timer = _current_timer.get()
+    return timer if timer is not None else RequestTimer()
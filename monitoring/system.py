@@ -0,0 +1,100 @@
+"""
+Background System Sampler
+Refreshes CPU, memory and disk snapshots off the request path
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """Point-in-time system utilisation"""
+
+    timestamp: str
+    cpu_percent: float
+    memory_percent: float
+    memory_used_mb: float
+    disk_percent: float
+    sampled_at: float  # time.monotonic() of the sample
+
+    @property
+    def staleness_seconds(self) -> float:
+        """Age of this snapshot"""
+        return time.monotonic() - self.sampled_at
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        del data["sampled_at"]
+        data["staleness_seconds"] = round(self.staleness_seconds, 3)
+        return data
+
+
+class SystemSampler:
+    """
+    Periodically samples system utilisation into a shared snapshot.
+
+    Readers get the latest ``snapshot`` (a single attribute read), so health
+    probes never wait on psutil. CPU usage is measured over the interval
+    between samples rather than by sleeping inside the probe.
+    """
+
+    def __init__(self, interval_seconds: float = 5.0, disk_path: str = "/"):
+        self.interval_seconds = interval_seconds
+        self.disk_path = disk_path
+        self._task: Optional[asyncio.Task] = None
+
+        # Prime cpu_percent so the next non-blocking call has a baseline
+        psutil.cpu_percent(interval=None)
+        self.snapshot = self.sample()
+
+    def sample(self) -> SystemSnapshot:
+        """Take a new snapshot and publish it"""
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        snapshot = SystemSnapshot(
+            timestamp=datetime.now().isoformat(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=memory.percent,
+            memory_used_mb=memory.used / (1024 * 1024),
+            disk_percent=(disk.used / disk.total) * 100,
+            sampled_at=time.monotonic(),
+        )
+        self.snapshot = snapshot
+        return snapshot
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.sample)
+            except Exception as e:
+                logger.warning(f"⚠️ System sampling failed: {e}")
+
+    def start(self):
+        """Start sampling on the running event loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self.sample()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"✅ System sampler started ({self.interval_seconds}s interval)")
+
+    def stop(self):
+        """Stop the sampling task"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Global sampler instance shared by the API and the metrics collector
+system_sampler = SystemSampler(
+    interval_seconds=float(os.environ.get("SYSTEM_SAMPLE_INTERVAL_SECONDS", 5))
+)
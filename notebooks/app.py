@@ -12,19 +12,24 @@
 # - feature_scaler.pkl: ./feature_scaler.pkl (current directory)
 # - models: ./models/ (models subdirectory)
 # =============================================================================
+import asyncio
+import functools
+import hmac
 import logging
 import os
 import sys
+import threading
 import time
 from datetime import datetime
+from typing import Optional
 
 import joblib
-import pandas as pd
-import psutil
+import numpy as np
 import uvicorn
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field, validator
 
 # VERSION: 2.0 - File paths fixed for Azure deployment
@@ -33,6 +38,46 @@ from pydantic import BaseModel, Field, validator
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from monitoring.metrics import (  # noqa: E402
+    get_cache_metrics,
+    get_stage_timings,
+    metrics_collector,
+    record_batch_size,
+    record_cache_lookup,
+    record_model_eviction,
+    record_model_load,
+    record_model_warmup,
+    record_prediction,
+    render_prometheus,
+)
+from monitoring.profiler import ProfilerBusyError, SamplingProfiler  # noqa: E402
+from monitoring.prometheus import CONTENT_TYPE, PrometheusMiddleware  # noqa: E402
+from monitoring.spans import RequestTimer, current_timer  # noqa: E402
+from monitoring.system import system_sampler  # noqa: E402
+from serving.batch import invalid_rows  # noqa: E402
+from serving.cache import PredictionCache, artifact_version  # noqa: E402
+from serving.executor import InferenceExecutor  # noqa: E402
+from serving.features import (  # noqa: E402
+    FeatureExtractor,
+    FeatureSchemaError,
+    model_feature_names,
+    scaler_params,
+)
+from serving.models import ModelLoadError, ModelManager  # noqa: E402
+from serving.responses import FastJSONResponse  # noqa: E402
+from serving.static import StaticResponses  # noqa: E402
+from serving.trees import DEFAULT_MAX_ROWS  # noqa: E402
+from serving.validation import (  # noqa: E402
+    BatchTooLargeError,
+    ColumnarValidator,
+    array_request_body,
+)
+from serving.warmup import (  # noqa: E402
+    DEFAULT_WARMUP_BATCHES,
+    StartupWarmup,
+    synthetic_columns,
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -55,7 +100,7 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Handle startup events and model loading"""
-    global startup_time, models, feature_names, feature_scaler
+    global startup_time, warmup_task
 
     startup_time = datetime.now()
     logger.info("🚀 FastAPI application starting up...")
@@ -63,6 +108,8 @@ async def startup_event():
     logger.info(f"🔧 Environment PORT: {os.environ.get('PORT', 'Not set')}")
     logger.info(f"🔧 Python path: {sys.path}")
 
+    system_sampler.start()
+
     try:
         # Load models and features
         logger.info("📦 Loading ML models and features...")
@@ -72,45 +119,17 @@ async def startup_event():
         if os.path.exists("models"):
             logger.info(f"📁 Files in models directory: {os.listdir('models')}")
 
-        # Load feature scaler
-        if os.path.exists("feature_scaler.pkl"):
-            feature_scaler = joblib.load("feature_scaler.pkl")
-            logger.info("✅ Feature scaler loaded successfully")
-        else:
-            logger.warning("⚠️ Feature scaler not found")
-
-        # Load feature names
-        if os.path.exists("feature_names.pkl"):
-            feature_names = joblib.load("feature_names.pkl")
-            logger.info(f"✅ Feature names loaded: {len(feature_names)} features")
-        else:
-            logger.warning("⚠️ Feature names not found")
-
-        # Load models
-        model_files = {
-            "logistic_regression": "models/logistic_regression.pkl",
-            "xgboost": "models/xgboost.pkl",
-            "lightgbm": "models/lightgbm.pkl",
-            "catboost": "models/catboost.pkl",
-        }
+        load_models()
 
-        for model_name, model_path in model_files.items():
-            try:
-                if os.path.exists(model_path):
-                    models[model_name] = joblib.load(model_path)
-                    logger.info(f"✅ {model_name} model loaded successfully")
-                else:
-                    logger.warning(f"⚠️ {model_name} model not found at {model_path}")
-            except Exception as e:
-                logger.error(f"❌ Failed to load {model_name} model: {e}")
-                # Continue loading other models instead of crashing
-                continue
-
-        logger.info(
-            f"🎯 Startup completed. Models loaded: {len([m for m in models.values() if m is not None])}"
-        )
-        logger.info("🚀 FastAPI app is ready to serve requests!")
+        # Models load and warm up while the server already answers /health;
+        # /ready stays 503 until they are done
+        warmup_task = asyncio.create_task(warm_up_models())
+        logger.info("🎯 Startup completed, warming up models in the background")
 
+    except FeatureSchemaError as e:
+        # A schema mismatch would fail every request, so refuse to start
+        logger.error(f"❌ Feature schema mismatch: {e}")
+        raise
     except Exception as e:
         logger.error(f"❌ Startup failed: {e}")
         logger.error(f"❌ Exception details: {type(e).__name__}: {str(e)}")
@@ -118,6 +137,15 @@ async def startup_event():
         logger.warning("⚠️ Continuing with partial model loading...")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop warm-up, the system sampler and the inference worker pools"""
+    if warmup_task is not None:
+        warmup_task.cancel()
+    system_sampler.stop()
+    inference_executor.shutdown()
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -132,8 +160,170 @@ models = {}
 feature_names = []
 feature_scaler = None
 model_metadata = {}
+feature_extractors = {}
+base_extractor = None
+model_versions = {}
 startup_time = None
 
+# Inference runs on per-model worker pools so it never blocks the event loop
+inference_executor = InferenceExecutor(
+    kind=os.environ.get("INFERENCE_EXECUTOR", "thread"),
+    workers=int(os.environ.get("INFERENCE_WORKERS", 0)) or None,
+    native_threads=int(os.environ.get("INFERENCE_NATIVE_THREADS", 1)),
+    tree_max_rows=int(os.environ.get("TREE_BACKEND_MAX_ROWS", DEFAULT_MAX_ROWS)),
+)
+
+# Models scored by the compiled NumPy tree backend (comma-separated names)
+TREE_BACKEND_MODELS = {
+    name.strip()
+    for name in os.environ.get("TREE_BACKEND_MODELS", "").split(",")
+    if name.strip()
+}
+
+# Models scored by the closed-form linear scorer (comma-separated names)
+LINEAR_FAST_PATH_MODELS = {
+    name.strip()
+    for name in os.environ.get("LINEAR_FAST_PATH_MODELS", "logistic_regression").split(
+        ","
+    )
+    if name.strip()
+}
+
+# Model artifacts, registered at startup and loaded on first use
+MODEL_FILES = {
+    "logistic_regression": "models/logistic_regression.pkl",
+    "xgboost": "models/xgboost.pkl",
+    "lightgbm": "models/lightgbm.pkl",
+    "catboost": "models/catboost.pkl",
+}
+
+# Models loaded during startup ("all" or comma-separated names); the others
+# load on their first request
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "all")
+
+# Artifacts load concurrently on MODEL_LOAD_WORKERS threads at startup, then
+# every preloaded model scores synthetic batches of MODEL_WARMUP_BATCHES
+# rows (comma-separated) before /ready reports ready
+startup_warmup = StartupWarmup(
+    batch_sizes=[
+        int(size)
+        for size in os.environ.get(
+            "MODEL_WARMUP_BATCHES", ",".join(map(str, DEFAULT_WARMUP_BATCHES))
+        ).split(",")
+        if size.strip()
+    ],
+    workers=int(os.environ.get("MODEL_LOAD_WORKERS", 4)),
+    on_warm=record_model_warmup,
+)
+warmup_task = None
+
+# Guards models/model_metadata and the static payloads built from them
+model_registry_lock = threading.Lock()
+
+
+def load_model(model_name: str, model_path: str):
+    """Load one model artifact and serve it from the inference executor"""
+    load_start = time.perf_counter()
+    try:
+        model = joblib.load(model_path)
+        extractor = base_extractor.select(
+            model_feature_names(model, feature_names), PatientData.model_fields
+        )
+        linear = model_name in LINEAR_FAST_PATH_MODELS
+        # The closed-form scorer folds the scaler into its weights, so its
+        # extractor leaves the features raw
+        feature_extractors[model_name] = extractor.unscaled() if linear else extractor
+        inference_executor.register(
+            model_name,
+            model,
+            model_path,
+            compile_trees=model_name in TREE_BACKEND_MODELS,
+            linear_fast_path=linear,
+            scaler=(extractor.center, extractor.scale) if linear else None,
+        )
+        version = artifact_version(model_path)
+    except Exception:
+        inference_executor.unregister(model_name)
+        record_model_load(model_name, 0.0, loaded=False)
+        raise
+
+    # Get model size
+    model_size = os.path.getsize(model_path) / (1024 * 1024)  # MB
+
+    # Preloads run on several threads: the metadata goes in before the model
+    # is published, and the static payloads are rebuilt under the same lock.
+    # Metadata describes the artifact, so reloading an evicted model leaves
+    # /models (and its ETag) unchanged
+    with model_registry_lock:
+        new_version = model_versions.get(model_name) != version
+        if new_version:
+            model_metadata[model_name] = {
+                "size_mb": model_size,
+                "type": type(model).__name__,
+                "loaded_at": datetime.now().isoformat(),
+            }
+            prediction_cache.invalidate(model_name)
+            model_versions[model_name] = version
+        models[model_name] = model
+        if new_version:
+            static_responses.refresh()
+
+    record_model_load(
+        model_name, time.perf_counter() - load_start, os.path.getsize(model_path)
+    )
+    logger.info(f"✅ Loaded {model_name} model ({model_size:.2f} MB)")
+    return model
+
+
+def unload_model(model_name: str):
+    """Stop serving an unloaded model; its extractor and cache entries stay valid"""
+    inference_executor.unregister(model_name)
+    with model_registry_lock:
+        models.pop(model_name, None)
+    record_model_eviction(model_name)
+
+
+# Loads models on demand and, beyond MODEL_MEMORY_BUDGET_MB (0 = no budget),
+# unloads the least recently used idle ones
+model_manager = ModelManager(
+    load_model,
+    unload_model,
+    budget_bytes=int(float(os.environ.get("MODEL_MEMORY_BUDGET_MB", 0)) * 1024 * 1024),
+)
+
+# Scoring entry points that load the model if needed and keep it resident
+# for the duration of the call
+score_model = model_manager.leased(inference_executor.score)
+predict_model_proba = model_manager.leased(inference_executor.predict_proba)
+
+
+# Cache of recent predictions, keyed by model version and feature vector
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", 300)),
+)
+
+# Batch bodies are validated column-wise ("columnar") or per row ("pydantic")
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 0)) or None
+BATCH_VALIDATION = os.environ.get("BATCH_VALIDATION", "columnar")
+
+# On-demand sampling profiler behind /admin/profile (off unless enabled)
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN", "")
+profiler = SamplingProfiler(
+    max_duration_seconds=float(os.environ.get("PROFILER_MAX_SECONDS", 30)),
+    max_rate_hz=float(os.environ.get("PROFILER_MAX_RATE_HZ", 250)),
+)
+
+# Request counts and latency per endpoint and model for /metrics, plus
+# per-stage Server-Timing headers and histograms for instrumented handlers
+app.add_middleware(
+    PrometheusMiddleware,
+    collector=metrics_collector,
+    known_models=model_manager,
+    server_timing=os.environ.get("SERVER_TIMING_ENABLED", "true").lower() == "true",
+)
+
 
 # Pydantic models for input validation
 class PatientData(BaseModel):
@@ -190,6 +380,14 @@ class PatientData(BaseModel):
         return v
 
 
+batch_validator = ColumnarValidator(
+    PatientData,
+    max_rows=BATCH_MAX_SIZE,
+    mode=BATCH_VALIDATION,
+    non_negative_message="Value must be non-negative",
+)
+
+
 class PredictionResponse(BaseModel):
     """Standardized prediction response model"""
 
@@ -202,6 +400,8 @@ class PredictionResponse(BaseModel):
     model_used: str
     processing_time_ms: float
     message: str
+    threshold_used: float
+    cached: bool = False
 
 
 class HealthResponse(BaseModel):
@@ -211,9 +411,11 @@ class HealthResponse(BaseModel):
     timestamp: str
     uptime_seconds: float
     models_loaded: int
+    models_registered: int = 0
     memory_usage_mb: float
     cpu_usage_percent: float
     disk_usage_percent: float
+    metrics_staleness_seconds: float = 0.0
 
 
 class ModelInfo(BaseModel):
@@ -227,57 +429,120 @@ class ModelInfo(BaseModel):
     model_size_mb: float
 
 
-# Dependency for request timing
-async def get_request_timing():
-    return {"start_time": time.time()}
+# Dependency for request timing (the stage timer started by the middleware)
+async def get_request_timing() -> RequestTimer:
+    return current_timer()
+
+
+def _confidence_level(probability: float) -> str:
+    """Confidence band of a readmission probability"""
+    if probability > 0.8 or probability < 0.2:
+        return "High"
+    elif probability > 0.6 or probability < 0.4:
+        return "Medium"
+    return "Low"
+
+
+def _risk_factors(patient: "PatientData") -> list[str]:
+    """Identify risk factors based on engineered features"""
+    risk_factors = []
+    if patient.num_medications > 10:
+        risk_factors.append("High medication count")
+    if patient.time_in_hospital > 14:
+        risk_factors.append("Extended hospital stay")
+    if patient.number_diagnoses > 5:
+        risk_factors.append("Multiple diagnoses")
+    if patient.clinical_risk_score > 7:
+        risk_factors.append("High clinical risk score")
+    if patient.service_utilization_score > 7:
+        risk_factors.append("High service utilization")
+    if patient.age_midpoint > 70:
+        risk_factors.append("Advanced age group")
+    return risk_factors
+
+
+async def ensure_model(model_name: str, timer: Optional[RequestTimer] = None):
+    """Load a registered model on first use (503 if its artifact fails to load)"""
+    try:
+        loaded = await model_manager.ensure(model_name)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    if loaded and timer is not None:
+        timer.lap("load")
 
 
 def load_models():
-    """Load trained models and preprocessing artifacts"""
-    global models, feature_names, feature_scaler, model_metadata
+    """Load preprocessing artifacts, register the models and preload the warm-up list"""
+    global feature_names, feature_scaler, base_extractor
 
     try:
-        # Load feature names and scaler - use the full feature names that match the training data
-        feature_names = joblib.load("feature_names.pkl")
-        feature_scaler = joblib.load("feature_scaler.pkl")
+        # Load feature names and scaler concurrently - use the full feature
+        # names that match the training data
+        artifacts = startup_warmup.load_artifacts(
+            {
+                "feature_names": functools.partial(joblib.load, "feature_names.pkl"),
+                "feature_scaler": functools.partial(joblib.load, "feature_scaler.pkl"),
+            }
+        )
+        feature_names = artifacts["feature_names"]
+        feature_scaler = artifacts["feature_scaler"]
         logger.info(f"✅ Loaded {len(feature_names)} feature names")
 
-        # Load only small models (exclude large ones)
-        model_files = {
-            "logistic_regression": "models/logistic_regression.pkl",
-            "xgboost": "models/xgboost.pkl",
-            "lightgbm": "models/lightgbm.pkl",
-            "catboost": "models/catboost.pkl",
-        }
+        # Compile the request -> feature buffer mapping once, with the
+        # scaler's exact parameters, so schema problems surface here and not
+        # per request. Features stay float64 as scaler.transform returns
+        # them: LightGBM compares thresholds in double precision
+        center, scale = scaler_params(feature_scaler, feature_names)
+        base_extractor = FeatureExtractor(
+            feature_names,
+            PatientData.model_fields,
+            center=center,
+            scale=scale,
+            dtype=np.float64,
+        )
 
-        for model_name, model_path in model_files.items():
-            try:
-                if os.path.exists(model_path):
-                    model = joblib.load(model_path)
-                    models[model_name] = model
-
-                    # Get model size
-                    model_size = os.path.getsize(model_path) / (1024 * 1024)  # MB
-                    logger.info(f"✅ Loaded {model_name} model ({model_size:.2f} MB)")
-
-                    # Store metadata
-                    model_metadata[model_name] = {
-                        "size_mb": model_size,
-                        "type": type(model).__name__,
-                        "loaded_at": datetime.now().isoformat(),
-                    }
-                else:
-                    logger.warning(f"⚠️ Model file not found: {model_path}")
-            except Exception as e:
-                logger.error(f"❌ Failed to load {model_name}: {str(e)}")
+        # Register every artifact; the warm-up list loads in the background
+        # (warm_up_models) and the other models on their first request
+        for model_name, model_path in MODEL_FILES.items():
+            if os.path.exists(model_path):
+                model_manager.register(model_name, model_path)
+            else:
+                logger.warning(f"⚠️ Model file not found: {model_path}")
+        logger.info(f"🎯 Registered {len(model_manager)} models")
 
-        logger.info(f"🎯 Successfully loaded {len(models)} models")
+        # Metadata payloads only change when the models do
+        static_responses.refresh()
 
     except Exception as e:
         logger.error(f"❌ Critical error loading models: {str(e)}")
         raise
 
 
+async def warm_model(model_name: str, n_rows: int):
+    """Score a synthetic batch of ``n_rows`` once on every worker of the model's pool"""
+    block = feature_extractors[model_name].columns(
+        synthetic_columns(PatientData, n_rows)
+    )
+    await asyncio.gather(
+        *(
+            predict_model_proba(model_name, block)
+            if n_rows == 1
+            else score_model(model_name, block)
+            for _ in range(inference_executor.workers)
+        )
+    )
+
+
+async def warm_up_models():
+    """Load the warm-up list concurrently and warm each model before /ready"""
+    preload = (
+        model_manager.names()
+        if MODEL_PRELOAD.strip().lower() == "all"
+        else [name.strip() for name in MODEL_PRELOAD.split(",") if name.strip()]
+    )
+    await startup_warmup.warm_up(model_manager, preload, warm_model)
+
+
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -286,19 +551,19 @@ async def health_check():
         current_time = datetime.now()
         uptime = (current_time - startup_time).total_seconds() if startup_time else 0
 
-        # System metrics
-        memory = psutil.virtual_memory()
-        cpu_percent = psutil.cpu_percent(interval=1)
-        disk = psutil.disk_usage("/")
+        # System metrics from the background sampler (never blocks the probe)
+        snapshot = system_sampler.snapshot
 
         return HealthResponse(
-            status="healthy" if models else "degraded",
+            status="healthy" if model_manager else "degraded",
             timestamp=current_time.isoformat(),
             uptime_seconds=round(uptime, 2),
             models_loaded=len([m for m in models.values() if m is not None]),
-            memory_usage_mb=round(memory.used / (1024 * 1024), 2),
-            cpu_usage_percent=round(cpu_percent, 2),
-            disk_usage_percent=round((disk.used / disk.total) * 100, 2),
+            models_registered=len(model_manager),
+            memory_usage_mb=round(snapshot.memory_used_mb, 2),
+            cpu_usage_percent=round(snapshot.cpu_percent, 2),
+            disk_usage_percent=round(snapshot.disk_percent, 2),
+            metrics_staleness_seconds=round(snapshot.staleness_seconds, 3),
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -307,22 +572,91 @@ async def health_check():
         ) from e
 
 
+def _training_results() -> dict:
+    """Per-model metrics from training_results.pkl (read once per build)"""
+    training_results_path = os.path.join(
+        os.path.dirname(__file__), "..", "models", "training_results.pkl"
+    )
+    try:
+        if os.path.exists(training_results_path):
+            return joblib.load(training_results_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read training results: {e}")
+    return {}
+
+
+def _model_info(model_name: str, training_results: dict) -> ModelInfo:
+    """/models entry; artifact details are known once the model has loaded"""
+    metadata = model_metadata.get(model_name, {})
+    return ModelInfo(
+        model_name=model_name,
+        model_type=metadata.get("type", "Unknown"),
+        performance_metrics={
+            metric: value
+            for metric, value in training_results.get(model_name, {}).items()
+            if isinstance(value, (int, float))
+        },
+        training_date=metadata.get("loaded_at", "Unknown"),
+        feature_count=len(feature_names) if feature_names else 0,
+        model_size_mb=metadata.get("size_mb", 0),
+    )
+
+
+def build_static_payloads() -> dict:
+    """
+    Payloads of the metadata endpoints, serialized once per model load.
+
+    They carry no timestamp: a cached body would repeat its build time under
+    an unchanged ETag. The response Date header gives the current time.
+    """
+    training_results = _training_results()
+    payloads = {
+        "/": {
+            "message": "Diabetic Readmission ML Pipeline API",
+            "version": "2.0.0",
+            "status": "operational",
+            "docs": "/docs",
+            "health": "/health",
+            "models": "/models",
+            "deployment": "Railway Production",
+        },
+        # Every registered model, loaded or not: it can be requested either
+        # way, and residency is reported by /health and /models/memory
+        "/models": [
+            _model_info(model_name, training_results).model_dump(mode="json")
+            for model_name in model_manager.names()
+        ],
+    }
+    if feature_names:
+        payloads["/feature-names"] = {
+            "feature_count": len(feature_names),
+            "features": list(feature_names),
+            "description": "List of engineered features expected by the ML model",
+        }
+    return payloads
+
+
+# Precomputed metadata responses with strong ETags (rebuilt by load_models)
+static_responses = StaticResponses(build_static_payloads)
+
+
+def static_response(path: str, request: Request) -> Response:
+    """Cached metadata body, or 304 if the client already has this version"""
+    return static_responses.get(path).response(request.headers.get("if-none-match"))
+
+
 # Feature names endpoint
 @app.get("/feature-names")
-async def get_feature_names():
+async def get_feature_names(request: Request):
     """Get the list of feature names expected by the model"""
     try:
-        if not feature_names:
+        if static_responses.get("/feature-names") is None:
             raise HTTPException(
                 status_code=500,
                 detail="Feature names not loaded. Please check if models are properly initialized.",
             )
 
-        return {
-            "feature_count": len(feature_names),
-            "features": feature_names,
-            "description": "List of engineered features expected by the ML model",
-        }
+        return static_response("/feature-names", request)
     except Exception as e:
         logger.error(f"Failed to get feature names: {e}")
         raise HTTPException(
@@ -332,46 +666,10 @@ async def get_feature_names():
 
 # Model information endpoint
 @app.get("/models", response_model=list[ModelInfo])
-async def get_models_info():
+async def get_models_info(request: Request):
     """Get information about all loaded models"""
     try:
-        model_info_list = []
-
-        for model_name, model in models.items():
-            if model is not None:
-                # Get model type
-                model_type = type(model).__name__
-
-                # Get performance metrics from training results
-                performance_metrics = {}
-                try:
-                    training_results_path = os.path.join(
-                        os.path.dirname(__file__),
-                        "..",
-                        "models",
-                        "training_results.pkl",
-                    )
-                    if os.path.exists(training_results_path):
-                        training_results = joblib.load(training_results_path)
-                        if model_name in training_results:
-                            performance_metrics = training_results[model_name]
-                except Exception:
-                    pass
-
-                model_info_list.append(
-                    ModelInfo(
-                        model_name=model_name,
-                        model_type=model_type,
-                        performance_metrics=performance_metrics,
-                        training_date=model_metadata[model_name].get(
-                            "loaded_at", "Unknown"
-                        ),
-                        feature_count=len(feature_names) if feature_names else 0,
-                        model_size_mb=model_metadata[model_name].get("size_mb", 0),
-                    )
-                )
-
-        return model_info_list
+        return static_response("/models", request)
     except Exception as e:
         logger.error(f"Failed to get model info: {e}")
         raise HTTPException(
@@ -379,162 +677,285 @@ async def get_models_info():
         ) from e
 
 
+# Per-model timing breakdown endpoint
+@app.get("/models/timing")
+async def get_models_timing():
+    """Get the cumulative per-model stage timings of the prediction endpoints"""
+    return {
+        "timings": get_stage_timings(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Model residency endpoint
+@app.get("/models/memory")
+async def get_models_memory():
+    """Get the model memory budget and which models are resident"""
+    return {
+        **model_manager.stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Sampling profiler endpoint
+@app.get("/admin/profile", include_in_schema=False)
+async def profile_endpoint(
+    seconds: float = 5.0,
+    rate_hz: float = 100.0,
+    output: str = "collapsed",
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample every thread's stack for ``seconds``; returns collapsed stacks"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if PROFILER_TOKEN and not hmac.compare_digest(x_admin_token or "", PROFILER_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if output not in ("collapsed", "json"):
+        raise HTTPException(
+            status_code=400, detail="output must be 'collapsed' or 'json'"
+        )
+
+    try:
+        # The sampler sleeps between samples on a worker thread, so the
+        # event loop keeps serving (and being profiled) meanwhile
+        result = await asyncio.to_thread(profiler.profile, seconds, rate_hz)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    logger.info(
+        f"🔍 Profiled {result.samples} samples over {result.duration_seconds:.1f}s "
+        f"({result.overhead_ratio:.1%} sampling overhead)"
+    )
+    if output == "json":
+        return result.to_dict()
+    return Response(content=result.collapsed(), media_type="text/plain")
+
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text format (scraped by monitoring/prometheus.yml)"""
+    return Response(content=render_prometheus(), media_type=CONTENT_TYPE)
+
+
+# Latency percentile endpoint
+@app.get("/metrics/latency")
+async def get_latency_metrics():
+    """Get p50/p90/p99/p999 latency per model and endpoint (sliding and lifetime)"""
+    return {
+        **metrics_collector.get_latency_metrics(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Prediction cache metrics endpoint
+@app.get("/metrics/cache")
+async def get_cache_metrics_endpoint():
+    """Get prediction cache occupancy and hit/miss rates"""
+    return {
+        "cache": prediction_cache.stats(),
+        "lookups": get_cache_metrics(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
 # Prediction endpoint
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_readmission(
     patient: PatientData,
     model_name: str = "xgboost",
-    timing: dict = Depends(get_request_timing),
+    threshold: float = 0.5,
+    timer: RequestTimer = Depends(get_request_timing),
 ):
     """Predict diabetic readmission risk for a patient"""
-    start_time = timing["start_time"]
-
     try:
+        # Body parsing and pydantic validation ran before the handler
+        timer.lap("validate")
+
         # Validate model selection
-        if model_name not in models or models[model_name] is None:
-            available_models = list(models.keys())
+        if model_name not in model_manager:
+            available_models = model_manager.names()
             raise HTTPException(
                 status_code=400,
                 detail=f"Model '{model_name}' not available. Available models: {available_models}",
             )
 
-        # Prepare input data - ensure correct feature order
-        patient_dict = patient.dict()
-        input_data = pd.DataFrame([patient_dict])
-
-        # Ensure features are in the correct order as expected by the model
-        if feature_names:
-            # Check if we have all required features
-            missing_features = [f for f in feature_names if f not in input_data.columns]
-            if missing_features:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Missing required features: {missing_features}",
-                )
-
-            # Select only the features that the model expects
-            input_data = input_data[feature_names]
-            logger.info(f"✅ Selected {len(input_data.columns)} features for prediction")
-
-        # Validate feature count
-        if len(input_data.columns) != len(feature_names):
-            logger.warning(
-                f"Feature count mismatch: expected {len(feature_names)}, got {len(input_data.columns)}"
-            )
+        # Validate threshold
+        if not 0 <= threshold <= 1:
             raise HTTPException(
-                status_code=400,
-                detail=f"Feature count mismatch: expected {len(feature_names)}, got {len(input_data.columns)}",
+                status_code=400, detail="Threshold must be between 0 and 1"
             )
 
-        # Scale features if scaler is available
-        if feature_scaler is not None:
-            input_data = feature_scaler.transform(input_data)
-            logger.info(f"✅ Features scaled using {type(feature_scaler).__name__}")
+        await ensure_model(model_name, timer)
 
-        # Make prediction
-        model = models[model_name]
-        prediction = model.predict(input_data)[0]
+        # Write the (scaled) features straight into the model's input buffer
+        input_data = feature_extractors[model_name].row(patient)
+        timer.lap("features")
 
-        # Get probability if available
-        probability = None
-        if hasattr(model, "predict_proba"):
-            probability = model.predict_proba(input_data)[0][1]
-        elif hasattr(model, "predict_proba"):
-            probability = model.predict_proba(input_data)[0][1]
+        # Serve repeated requests for the same encounter from the cache
+        cache_key, probability = None, None
+        if prediction_cache.enabled:
+            cache_key = prediction_cache.key(
+                model_name, model_versions.get(model_name, ""), threshold, input_data
+            )
+            probability = prediction_cache.get(cache_key)
+            record_cache_lookup(model_name, probability is not None)
+            timer.lap("cache")
+        cached = probability is not None
+
+        # Make prediction - run the model once and derive the class from the
+        # positive-class probability instead of calling predict() as well
+        if not cached:
+            probability = await predict_model_proba(model_name, input_data)
+            timer.lap("inference")
+            if cache_key is not None:
+                prediction_cache.put(cache_key, probability)
+        prediction = probability >= threshold
 
         # Determine confidence level
-        if probability is not None:
-            if probability > 0.8 or probability < 0.2:
-                confidence_level = "High"
-            elif probability > 0.6 or probability < 0.4:
-                confidence_level = "Medium"
-            else:
-                confidence_level = "Low"
-        else:
-            confidence_level = "Unknown"
+        confidence_level = _confidence_level(probability)
 
         # Identify risk factors based on engineered features
-        risk_factors = []
-        if patient.num_medications > 10:
-            risk_factors.append("High medication count")
-        if patient.time_in_hospital > 14:
-            risk_factors.append("Extended hospital stay")
-        if patient.number_diagnoses > 5:
-            risk_factors.append("Multiple diagnoses")
-        if patient.clinical_risk_score > 7:
-            risk_factors.append("High clinical risk score")
-        if patient.service_utilization_score > 7:
-            risk_factors.append("High service utilization")
-        if patient.age_midpoint > 70:
-            risk_factors.append("Advanced age group")
+        risk_factors = _risk_factors(patient)
 
         # Calculate processing time
-        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        processing_time = timer.elapsed_ms()
+
+        record_prediction(
+            model_name, processing_time, bool(prediction), probability, confidence_level
+        )
 
         # Generate response
-        response = PredictionResponse(
-            patient_id=f"PAT_{int(time.time())}",
-            timestamp=datetime.now().isoformat(),
-            readmission_risk=bool(prediction),
-            probability=float(probability) if probability is not None else 0.0,
-            confidence_level=confidence_level,
-            risk_factors=risk_factors,
-            model_used=model_name,
-            processing_time_ms=round(processing_time, 2),
-            message="High risk of readmission"
+        # Built to the PredictionResponse schema; encoded once, not re-validated
+        response = {
+            "patient_id": f"PAT_{int(time.time())}",
+            "timestamp": datetime.now().isoformat(),
+            "readmission_risk": bool(prediction),
+            "probability": float(probability),
+            "confidence_level": confidence_level,
+            "risk_factors": risk_factors,
+            "model_used": model_name,
+            "processing_time_ms": round(processing_time, 2),
+            "message": "High risk of readmission"
             if prediction
             else "Low risk of readmission",
-        )
+            "threshold_used": float(threshold),
+            "cached": cached,
+        }
+        timer.lap("postprocess")
 
         logger.info(
-            f"✅ Prediction completed for patient {response.patient_id} using {model_name}"
+            f"✅ Prediction completed for patient {response['patient_id']} using {model_name}"
         )
-        return response
+        return FastJSONResponse(response)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
+        record_prediction(
+            model_name,
+            timer.elapsed_ms(),
+            False,
+            0.0,
+            "",
+            success=False,
+            error_message=str(e),
+        )
         raise HTTPException(
             status_code=500, detail=f"Prediction failed: {str(e)}"
         ) from e
 
 
 # Batch prediction endpoint
-@app.post("/predict/batch")
-async def predict_batch(patients: list[PatientData], model_name: str = "xgboost"):
+@app.post("/predict/batch", openapi_extra=array_request_body(PatientData, "Patients"))
+async def predict_batch(
+    request: Request,
+    model_name: str = "xgboost",
+    threshold: float = 0.5,
+    timer: RequestTimer = Depends(get_request_timing),
+):
     """Predict readmission risk for multiple patients"""
     try:
-        if model_name not in models or models[model_name] is None:
-            available_models = list(models.keys())
+        try:
+            patients = batch_validator.validate_json(await request.body())
+        except BatchTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        timer.lap("validate")
+
+        if model_name not in model_manager:
+            available_models = model_manager.names()
             raise HTTPException(
                 status_code=400,
                 detail=f"Model '{model_name}' not available. Available models: {available_models}",
             )
 
+        if not 0 <= threshold <= 1:
+            raise HTTPException(
+                status_code=400, detail="Threshold must be between 0 and 1"
+            )
+
+        await ensure_model(model_name, timer)
+        start_time = time.time()
+
+        # Assemble the whole batch into one matrix and score it in one call
+        matrix = feature_extractors[model_name].columns(patients.columns)
+        timer.lap("features")
+        record_batch_size("/predict/batch", model_name, len(matrix))
+        batch = await score_model(model_name, matrix, invalid_rows(matrix))
+        timer.lap("inference")
+
+        scoring_time = (time.time() - start_time) * 1000
+        per_row_time = round(scoring_time / len(patients), 2) if patients else 0.0
+        timestamp = datetime.now().isoformat()
+
+        probabilities = batch.probabilities
         results = []
-        for i, patient in enumerate(patients):
-            try:
-                # Create single prediction request
-                single_result = await predict_readmission(patient, model_name)
-                results.append(single_result.dict())
-            except Exception as e:
+        for i, patient in enumerate(patients.records()):
+            if i in batch.errors:
                 results.append(
                     {
                         "patient_id": f"PAT_BATCH_{i}",
-                        "error": str(e),
+                        "error": batch.errors[i],
                         "status": "failed",
                     }
                 )
+                continue
 
-        return {
-            "batch_id": f"BATCH_{int(time.time())}",
-            "total_patients": len(patients),
-            "successful_predictions": len([r for r in results if "error" not in r]),
-            "failed_predictions": len([r for r in results if "error" in r]),
-            "results": results,
-        }
+            probability = float(probabilities[i])
+            prediction = probability >= threshold
+            results.append(
+                {
+                    "patient_id": f"PAT_BATCH_{i}",
+                    "timestamp": timestamp,
+                    "readmission_risk": bool(prediction),
+                    "probability": probability,
+                    "confidence_level": _confidence_level(probability),
+                    "risk_factors": _risk_factors(patient),
+                    "model_used": model_name,
+                    "processing_time_ms": per_row_time,
+                    "message": "High risk of readmission"
+                    if prediction
+                    else "Low risk of readmission",
+                    "threshold_used": threshold,
+                }
+            )
+
+        timer.lap("postprocess")
+        return FastJSONResponse(
+            {
+                "batch_id": f"BATCH_{int(time.time())}",
+                "total_patients": len(patients),
+                "successful_predictions": batch.successful,
+                "failed_predictions": batch.failed,
+                "results": results,
+            }
+        )
 
+    except (HTTPException, RequestValidationError):
+        raise
     except Exception as e:
         logger.error(f"Batch prediction failed: {e}")
         raise HTTPException(
@@ -544,18 +965,9 @@ async def predict_batch(patients: list[PatientData], model_name: str = "xgboost"
 
 # Root endpoint
 @app.get("/")
-async def root():
+async def root(request: Request):
     """API root endpoint with basic information"""
-    return {
-        "message": "Diabetic Readmission ML Pipeline API",
-        "version": "2.0.0",
-        "status": "operational",
-        "docs": "/docs",
-        "health": "/health",
-        "models": "/models",
-        "timestamp": datetime.now().isoformat(),
-        "deployment": "Railway Production",
-    }
+    return static_response("/", request)
 
 
 # Simple health check for Railway deployment
@@ -568,6 +980,7 @@ async def simple_health_check():
         "service": "Diabetes Readmission API",
         "version": "2.0.0",
         "models_loaded": len([m for m in models.values() if m is not None]),
+        "models_registered": len(model_manager),
         "message": "API is running",
     }
 
@@ -589,28 +1002,43 @@ async def immediate_health_check():
 # Readiness check for Railway
 @app.get("/ready")
 async def readiness_check():
-    """Readiness check endpoint for Railway deployment"""
+    """Readiness check endpoint for Railway deployment (503 until warmed up)"""
     try:
-        # Check if basic components are loaded
+        # Check if basic components are loaded and the warm-up list is warm
+        # (the other models still load on demand)
         basic_ready = (
-            feature_scaler is not None and len(feature_names) > 0 and len(models) > 0
+            feature_scaler is not None
+            and len(feature_names) > 0
+            and len(model_manager) > 0
         )
-
-        return {
-            "ready": basic_ready,
-            "timestamp": datetime.now().isoformat(),
-            "components": {
-                "feature_scaler": feature_scaler is not None,
-                "feature_names": len(feature_names) > 0,
-                "models": len(models) > 0,
+        ready = basic_ready and startup_warmup.ready
+
+        return JSONResponse(
+            status_code=(
+                status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+            content={
+                "ready": ready,
+                "timestamp": datetime.now().isoformat(),
+                "components": {
+                    "feature_scaler": feature_scaler is not None,
+                    "feature_names": len(feature_names) > 0,
+                    "models": len(model_manager) > 0,
+                    "warmed_up": startup_warmup.ready,
+                },
+                "startup": startup_warmup.summary(),
+                "system": system_sampler.snapshot.to_dict(),
             },
-        }
+        )
     except Exception as e:
-        return {
-            "ready": False,
-            "error": str(e),
-            "timestamp": datetime.now().isoformat(),
-        }
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "ready": False,
+                "error": str(e),
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
 
 
 # Error handler
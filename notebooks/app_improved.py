@@ -15,19 +15,43 @@
 # - Added rate limiting and security documentation
 # - Clarified prediction timing (at discharge)
 # =============================================================================
+import asyncio
+import contextlib
+import functools
+import hmac
 import logging
 import os
+import shutil
+import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime
 from typing import Optional
 
 import joblib
-import psutil
+import numpy as np
 import uvicorn
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel, Field, validator
 
 # VERSION: 3.0 - Comprehensive API documentation and improvements
@@ -36,6 +60,69 @@ from pydantic import BaseModel, Field, validator
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from monitoring.metrics import (  # noqa: E402
+    get_cache_metrics,
+    metrics_collector,
+    record_batch_size,
+    record_cache_lookup,
+    record_model_eviction,
+    record_model_load,
+    record_model_warmup,
+    record_prediction,
+    render_prometheus,
+)
+from monitoring.profiler import ProfilerBusyError, SamplingProfiler  # noqa: E402
+from monitoring.prometheus import CONTENT_TYPE, PrometheusMiddleware  # noqa: E402
+from monitoring.spans import RequestTimer, current_timer  # noqa: E402
+from monitoring.system import system_sampler  # noqa: E402
+from serving import arrow  # noqa: E402
+from serving.batch import (  # noqa: E402
+    CONFIDENCE_LEVELS,
+    BatchResult,
+    confidence_codes,
+    invalid_rows,
+)
+from serving.cache import PredictionCache, artifact_version  # noqa: E402
+from serving.ensemble import (  # noqa: E402
+    AGGREGATIONS,
+    combine,
+    ensemble_weights,
+    model_blocks,
+    score_models,
+)
+from serving.executor import InferenceExecutor  # noqa: E402
+from serving.features import FeatureExtractor, model_feature_names  # noqa: E402
+from serving.jobs import INPUT_FILE, JobRunner, JobStore, job_summary  # noqa: E402
+from serving.microbatch import MicroBatcher  # noqa: E402
+from serving.models import ModelLoadError, ModelManager  # noqa: E402
+from serving.responses import FastJSONResponse  # noqa: E402
+from serving.static import StaticResponses  # noqa: E402
+from serving.streaming import (  # noqa: E402
+    NDJSON_MEDIA_TYPE,
+    NDJSONScorer,
+    NDJSONStreamingResponse,
+    ndjson_request_body,
+)
+from serving.trees import DEFAULT_MAX_ROWS  # noqa: E402
+from serving.uploads import (  # noqa: E402
+    CSV_MEDIA_TYPE,
+    CSVSchemaError,
+    CSVScorer,
+    spool_upload,
+)
+from serving.validation import (  # noqa: E402
+    BatchTooLargeError,
+    ColumnarBatch,
+    ColumnarValidator,
+    array_request_body,
+    body_errors,
+)
+from serving.warmup import (  # noqa: E402
+    DEFAULT_WARMUP_BATCHES,
+    StartupWarmup,
+    synthetic_columns,
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -103,8 +190,213 @@ models = {}
 feature_names = []
 feature_scaler = None
 model_metadata = {}
+feature_extractors = {}
+request_extractor = None
+model_versions = {}
+# Serializes publishing and unloading models across concurrent loads
+model_registry_lock = threading.Lock()
 startup_time = None
 
+# Inference runs on per-model worker pools so it never blocks the event loop
+inference_executor = InferenceExecutor(
+    kind=os.environ.get("INFERENCE_EXECUTOR", "thread"),
+    workers=int(os.environ.get("INFERENCE_WORKERS", 0)) or None,
+    native_threads=int(os.environ.get("INFERENCE_NATIVE_THREADS", 1)),
+    tree_max_rows=int(os.environ.get("TREE_BACKEND_MAX_ROWS", DEFAULT_MAX_ROWS)),
+)
+
+# Models scored by the compiled NumPy tree backend (comma-separated names)
+TREE_BACKEND_MODELS = {
+    name.strip()
+    for name in os.environ.get("TREE_BACKEND_MODELS", "").split(",")
+    if name.strip()
+}
+
+# Models scored by the closed-form linear scorer (comma-separated names)
+LINEAR_FAST_PATH_MODELS = {
+    name.strip()
+    for name in os.environ.get("LINEAR_FAST_PATH_MODELS", "logistic_regression").split(
+        ","
+    )
+    if name.strip()
+}
+
+# Model artifacts, registered at startup and loaded on first use
+MODEL_FILES = {
+    "logistic_regression": "models/logistic_regression.pkl",
+    "xgboost": "models/xgboost.pkl",
+    "lightgbm": "models/lightgbm.pkl",
+    "catboost": "models/catboost.pkl",
+}
+
+# Models loaded during startup ("all" or comma-separated names); the others
+# load on their first request
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "all")
+
+# Models /predict/ensemble combines when the request names none ("all" or
+# comma-separated names)
+ENSEMBLE_DEFAULT_MODELS = os.environ.get("ENSEMBLE_DEFAULT_MODELS", "all")
+
+# Artifacts load concurrently on MODEL_LOAD_WORKERS threads at startup, then
+# every preloaded model scores synthetic batches of MODEL_WARMUP_BATCHES
+# rows (comma-separated) before /ready reports ready
+startup_warmup = StartupWarmup(
+    batch_sizes=[
+        int(size)
+        for size in os.environ.get(
+            "MODEL_WARMUP_BATCHES", ",".join(map(str, DEFAULT_WARMUP_BATCHES))
+        ).split(",")
+        if size.strip()
+    ],
+    workers=int(os.environ.get("MODEL_LOAD_WORKERS", 4)),
+    on_warm=record_model_warmup,
+)
+warmup_task = None
+
+
+def load_model(model_name: str, model_path: str):
+    """Load one model artifact and serve it from the inference executor"""
+    load_start = time.perf_counter()
+    try:
+        model = joblib.load(model_path)
+        extractor = request_extractor.select(
+            model_feature_names(model, FEATURE_ORDER), PatientData.model_fields
+        )
+        version = artifact_version(model_path)
+
+        # Preloads run on several threads. A changed artifact gets its cache
+        # version (and an empty cache) before it becomes servable, so no
+        # prediction of the previous artifact is cached under the new version
+        with model_registry_lock:
+            if model_versions.get(model_name) != version:
+                inference_executor.unregister(model_name)
+                prediction_cache.invalidate(model_name)
+                model_versions[model_name] = version
+            feature_extractors[model_name] = extractor
+            inference_executor.register(
+                model_name,
+                model,
+                model_path,
+                compile_trees=model_name in TREE_BACKEND_MODELS,
+                linear_fast_path=model_name in LINEAR_FAST_PATH_MODELS,
+            )
+            models[model_name] = model
+    except Exception:
+        inference_executor.unregister(model_name)
+        record_model_load(model_name, 0.0, loaded=False)
+        raise
+
+    record_model_load(
+        model_name, time.perf_counter() - load_start, os.path.getsize(model_path)
+    )
+    logger.info(f"✅ {model_name} model loaded successfully")
+    return model
+
+
+def unload_model(model_name: str):
+    """Stop serving an unloaded model; its extractor and cache entries stay valid"""
+    with model_registry_lock:
+        inference_executor.unregister(model_name)
+        models.pop(model_name, None)
+    record_model_eviction(model_name)
+
+
+# Loads models on demand and, beyond MODEL_MEMORY_BUDGET_MB (0 = no budget),
+# unloads the least recently used idle ones
+model_manager = ModelManager(
+    load_model,
+    unload_model,
+    budget_bytes=int(float(os.environ.get("MODEL_MEMORY_BUDGET_MB", 0)) * 1024 * 1024),
+)
+
+# Scoring entry points that load the model if needed and keep it resident
+# for the duration of the call
+score_model = model_manager.leased(inference_executor.score)
+predict_model_proba = model_manager.leased(inference_executor.predict_proba)
+
+# Cache of recent predictions, keyed by model version and feature vector
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", 300)),
+)
+
+# On-demand sampling profiler behind /admin/profile (off unless enabled)
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN", "")
+profiler = SamplingProfiler(
+    max_duration_seconds=float(os.environ.get("PROFILER_MAX_SECONDS", 30)),
+    max_rate_hz=float(os.environ.get("PROFILER_MAX_RATE_HZ", 250)),
+)
+
+# Request counts and latency per endpoint and model for /metrics, plus
+# per-stage Server-Timing headers and histograms for instrumented handlers
+app.add_middleware(
+    PrometheusMiddleware,
+    collector=metrics_collector,
+    known_models=model_manager,
+    server_timing=os.environ.get("SERVER_TIMING_ENABLED", "true").lower() == "true",
+)
+
+# Micro-batching of concurrent single predictions
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_WINDOW_MS = float(os.environ.get("MICROBATCH_WINDOW_MS", 2.0))
+MICROBATCH_MAX_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", 32))
+
+micro_batcher = (
+    MicroBatcher(
+        score_model,
+        window_ms=MICROBATCH_WINDOW_MS,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        on_batch=lambda model_name, size: record_batch_size(
+            "microbatch", model_name, size
+        ),
+    )
+    if MICROBATCH_ENABLED
+    else None
+)
+
+# Batch bodies are validated column-wise ("columnar") or per row ("pydantic")
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 100))
+BATCH_VALIDATION = os.environ.get("BATCH_VALIDATION", "columnar")
+
+# /predict/stream scores NDJSON bodies this many rows at a time
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", 1000))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", 64 * 1024))
+# Results a slow client has not read yet spill to disk beyond this size
+STREAM_SPOOL_MEMORY_BYTES = int(
+    os.environ.get("STREAM_SPOOL_MEMORY_BYTES", 8 * 1024 * 1024)
+)
+
+# /predict/csv parses and scores uploads this many rows at a time
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", 10_000))
+
+# Bulk scoring jobs: store location, dataset root for references, workers and
+# how long a job's owner may miss heartbeats before another worker takes over
+JOBS_DIR = os.environ.get("JOBS_DIR", "jobs")
+JOBS_DATA_DIR = os.environ.get("JOBS_DATA_DIR", "data")
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", 2))
+JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", 30))
+job_runner: Optional[JobRunner] = None
+
+# Feature order matching the trained models
+FEATURE_ORDER = (
+    "encounter_id",
+    "patient_nbr",
+    "admission_type_id",
+    "admission_source_id",
+    "time_in_hospital",
+    "num_lab_procedures",
+    "num_procedures",
+    "num_medications",
+    "number_outpatient",
+    "number_emergency",
+    "number_inpatient",
+    "number_diagnoses",
+    "age_midpoint",
+    "service_utilization_score",
+    "clinical_risk_score",
+)
+
 
 # Pydantic models with comprehensive examples and validation
 class PatientData(BaseModel):
@@ -221,6 +513,20 @@ class PatientData(BaseModel):
         return v
 
 
+batch_validator = ColumnarValidator(
+    PatientData,
+    max_rows=BATCH_MAX_SIZE,
+    mode=BATCH_VALIDATION,
+    non_negative_message="Value must be non-negative",
+)
+ndjson_scorer = NDJSONScorer(
+    batch_validator,
+    chunk_rows=STREAM_CHUNK_ROWS,
+    max_line_bytes=STREAM_MAX_LINE_BYTES,
+)
+csv_scorer = CSVScorer(batch_validator, chunk_rows=CSV_CHUNK_ROWS)
+
+
 class PredictionResponse(BaseModel):
     """Standardized prediction response model with examples"""
 
@@ -254,6 +560,11 @@ class PredictionResponse(BaseModel):
     threshold_used: float = Field(
         ..., description="Decision threshold used", example=0.5
     )
+    cached: bool = Field(
+        False,
+        description="Whether the probability was served from the prediction cache",
+        example=False,
+    )
 
     class Config:
         schema_extra = {
@@ -335,6 +646,9 @@ class HealthResponse(BaseModel):
         ..., description="Disk usage percentage", example=45.8
     )
     version: str = Field(..., description="API version", example="3.0.0")
+    metrics_staleness_seconds: float = Field(
+        0.0, description="Age of the system metrics snapshot", example=1.2
+    )
 
 
 class ModelInfo(BaseModel):
@@ -368,38 +682,120 @@ class ErrorResponse(BaseModel):
     )
 
 
-# Dependency for request timing
-async def get_request_timing():
-    return {"start_time": time.time()}
+class EnsemblePredictionResponse(BaseModel):
+    """Ensemble prediction response model"""
+
+    ensemble_id: str = Field(
+        ..., description="Unique ensemble request identifier", example="ENS_1733123400"
+    )
+    models_used: list[str] = Field(
+        ...,
+        description="Models scored, in weight order",
+        example=["xgboost", "lightgbm"],
+    )
+    weights: list[float] = Field(
+        ..., description="Normalized aggregation weights", example=[0.5, 0.5]
+    )
+    aggregation: str = Field(
+        ..., description="Aggregation method (weighted or logit)", example="weighted"
+    )
+    total_patients: int = Field(..., description="Number of patients", example=2)
+    results: list[dict] = Field(
+        ..., description="Per-patient aggregate and per-model probabilities"
+    )
+    model_times_ms: dict[str, float] = Field(
+        ...,
+        description="Inference time of each model (they run concurrently)",
+        example={"xgboost": 4.1, "lightgbm": 3.2},
+    )
+    processing_time_ms: float = Field(
+        ..., description="Total processing time", example=5.3
+    )
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "ensemble_id": "ENS_1733123400",
+                "models_used": ["xgboost", "lightgbm"],
+                "weights": [0.5, 0.5],
+                "aggregation": "weighted",
+                "total_patients": 1,
+                "results": [
+                    {
+                        "patient_id": "PAT_12345",
+                        "probability": 0.241,
+                        "readmission_risk": False,
+                        "confidence_level": "High",
+                        "model_probabilities": {"xgboost": 0.234, "lightgbm": 0.248},
+                    }
+                ],
+                "model_times_ms": {"xgboost": 4.1, "lightgbm": 3.2},
+                "processing_time_ms": 5.3,
+            }
+        }
+
+
+class JobResponse(BaseModel):
+    """Bulk scoring job status model"""
+
+    job_id: str = Field(
+        ..., description="Job identifier", example="3f2b6c0e9a7d4e1b8c5a2f9d0e6b7a41"
+    )
+    status: str = Field(
+        ...,
+        description="queued, running, completed or failed",
+        example="running",
+    )
+    model_name: str = Field(..., description="Model scoring the job", example="xgboost")
+    threshold: float = Field(..., description="Decision threshold used", example=0.5)
+    rows_done: int = Field(
+        ..., description="Input rows scored and saved so far", example=250000
+    )
+    total_rows: Optional[int] = Field(
+        None, description="Input rows (counted when the job starts)", example=1000000
+    )
+    progress: float = Field(
+        ..., description="Fraction of rows done (0-1)", example=0.25
+    )
+    error: Optional[str] = Field(None, description="Why the job failed")
+    created_at: float = Field(
+        ..., description="Submission time (Unix seconds)", example=1756765800.0
+    )
+    updated_at: float = Field(
+        ..., description="Last progress update (Unix seconds)", example=1756765860.0
+    )
+
+
+# Dependency for request timing (the stage timer started by the middleware)
+async def get_request_timing() -> RequestTimer:
+    return current_timer()
 
 
 def load_models():
-    """Load trained models and preprocessing artifacts"""
-    global models, feature_names, feature_scaler, model_metadata
+    """Load preprocessing artifacts, register the models and preload the warm-up list"""
+    global feature_names, feature_scaler, model_metadata, request_extractor
 
     try:
-        # Load feature scaler
-        if os.path.exists("feature_scaler.pkl"):
-            feature_scaler = joblib.load("feature_scaler.pkl")
+        # Compile the request -> feature buffer mapping once; the models were
+        # trained on raw features, so no scaling is folded in
+        request_extractor = FeatureExtractor(FEATURE_ORDER, PatientData.model_fields)
+
+        # Load the preprocessing artifacts concurrently
+        artifacts = {}
+        for artifact in ("feature_scaler", "feature_names"):
+            if not os.path.exists(f"{artifact}.pkl"):
+                logger.warning(f"⚠️ {artifact}.pkl not found")
+                continue
+            artifacts[artifact] = functools.partial(joblib.load, f"{artifact}.pkl")
+        loaded = startup_warmup.load_artifacts(artifacts)
+        if "feature_scaler" in loaded:
+            feature_scaler = loaded["feature_scaler"]
             logger.info("✅ Feature scaler loaded successfully")
-        else:
-            logger.warning("⚠️ Feature scaler not found")
-
-        # Load feature names
-        if os.path.exists("feature_names.pkl"):
-            feature_names = joblib.load("feature_names.pkl")
+        if "feature_names" in loaded:
+            feature_names = loaded["feature_names"]
             logger.info(f"✅ Feature names loaded: {len(feature_names)} features")
-        else:
-            logger.warning("⚠️ Feature names not found")
-
-        # Load models with metadata
-        model_files = {
-            "logistic_regression": "models/logistic_regression.pkl",
-            "xgboost": "models/xgboost.pkl",
-            "lightgbm": "models/lightgbm.pkl",
-            "catboost": "models/catboost.pkl",
-        }
 
+        # Model metadata
         model_metadata = {
             "logistic_regression": {
                 "model_type": "Logistic Regression",
@@ -435,28 +831,90 @@ def load_models():
             },
         }
 
-        for model_name, model_path in model_files.items():
-            try:
-                if os.path.exists(model_path):
-                    models[model_name] = joblib.load(model_path)
-                    logger.info(f"✅ {model_name} model loaded successfully")
-                else:
-                    logger.warning(f"⚠️ {model_name} model not found at {model_path}")
-            except Exception as e:
-                logger.error(f"❌ Failed to load {model_name} model: {e}")
+        # Register every artifact; the warm-up list loads in the background
+        # (warm_up_models) and the other models on their first request
+        for model_name, model_path in MODEL_FILES.items():
+            if os.path.exists(model_path):
+                model_manager.register(model_name, model_path)
+            else:
+                logger.warning(f"⚠️ {model_name} model not found at {model_path}")
+        logger.info(f"✅ Registered {len(model_manager)} models")
 
-        logger.info(f"✅ Loaded {len(models)} models successfully")
+        # Metadata payloads only change when the models do
+        static_responses.refresh()
 
     except Exception as e:
         logger.error(f"❌ Failed to load models: {e}")
         raise e from e
 
 
+async def warm_model(model_name: str, n_rows: int):
+    """Score a synthetic batch of ``n_rows`` once on every worker of the model's pool"""
+    block = feature_extractors[model_name].columns(
+        synthetic_columns(PatientData, n_rows)
+    )
+    await asyncio.gather(
+        *(
+            predict_model_proba(model_name, block)
+            if n_rows == 1
+            else score_model(model_name, block)
+            for _ in range(inference_executor.workers)
+        )
+    )
+
+
+async def warm_up_models():
+    """Load the warm-up list concurrently and warm each model before /ready"""
+    preload = (
+        model_manager.names()
+        if MODEL_PRELOAD.strip().lower() == "all"
+        else [name.strip() for name in MODEL_PRELOAD.split(",") if name.strip()]
+    )
+    await startup_warmup.warm_up(model_manager, preload, warm_model)
+
+
+async def ensure_model(model_name: str, timer: Optional[RequestTimer] = None):
+    """Load a registered model on first use (503 if its artifact fails to load)"""
+    try:
+        loaded = await model_manager.ensure(model_name)
+    except ModelLoadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        ) from e
+    if loaded and timer is not None:
+        timer.lap("load")
+
+
+async def lease_models(
+    stack: contextlib.AsyncExitStack,
+    model_names: list[str],
+    timer: Optional[RequestTimer] = None,
+):
+    """Pin models until ``stack`` closes, loading them if needed (503 if one fails)"""
+    resident = model_manager.resident()
+    try:
+        for model_name in model_names:
+            await stack.enter_async_context(model_manager.lease(model_name))
+    except ModelLoadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        ) from e
+    if timer is not None and any(name not in resident for name in model_names):
+        timer.lap("load")
+
+
+def ensemble_default_models() -> list[str]:
+    """The configured default ensemble, independent of which models are in memory"""
+    if ENSEMBLE_DEFAULT_MODELS.strip().lower() == "all":
+        return model_manager.names()
+    return [name.strip() for name in ENSEMBLE_DEFAULT_MODELS.split(",") if name.strip()]
+
+
 # Add startup event handler
 @app.on_event("startup")
 async def startup_event():
     """Handle startup events and model loading"""
-    global startup_time
+    global startup_time, warmup_task
 
     startup_time = datetime.now()
     logger.info("🚀 FastAPI application starting up...")
@@ -464,14 +922,32 @@ async def startup_event():
     logger.info(f"🔧 Environment PORT: {os.environ.get('PORT', 'Not set')}")
     logger.info(f"🔧 Python path: {sys.path}")
 
+    system_sampler.start()
+
     try:
         load_models()
+        start_jobs()
+        # Models load and warm up while the server already answers /health;
+        # /ready stays 503 until they are done
+        warmup_task = asyncio.create_task(warm_up_models())
         logger.info("✅ Application startup completed successfully")
     except Exception as e:
         logger.error(f"❌ Application startup failed: {e}")
         raise e
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop warm-up, the job workers, the system sampler and the inference worker pools"""
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if job_runner is not None:
+        await job_runner.stop()
+        job_runner.store.close()
+    system_sampler.stop()
+    inference_executor.shutdown()
+
+
 # Rate limiting dependency
 async def check_rate_limit(request: Request):
     """Simple rate limiting - 100 requests per minute per IP"""
@@ -487,20 +963,19 @@ async def health_check():
         current_time = datetime.now()
         uptime = (current_time - startup_time).total_seconds() if startup_time else 0
 
-        # Get system metrics
-        memory = psutil.virtual_memory()
-        cpu = psutil.cpu_percent()
-        disk = psutil.disk_usage("/")
+        # System metrics from the background sampler (never blocks the probe)
+        snapshot = system_sampler.snapshot
 
         return HealthResponse(
-            status="healthy" if len(models) > 0 else "degraded",
+            status="healthy" if len(model_manager) > 0 else "degraded",
             timestamp=current_time.isoformat(),
             uptime_seconds=uptime,
             models_loaded=len(models),
-            memory_usage_mb=memory.used / 1024 / 1024,
-            cpu_usage_percent=cpu,
-            disk_usage_percent=disk.percent,
+            memory_usage_mb=snapshot.memory_used_mb,
+            cpu_usage_percent=snapshot.cpu_percent,
+            disk_usage_percent=snapshot.disk_percent,
             version="3.0.0",
+            metrics_staleness_seconds=snapshot.staleness_seconds,
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -509,16 +984,91 @@ async def health_check():
         ) from e
 
 
+# Readiness check endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Ready (200) once the warm-up models are loaded and warmed, else 503"""
+    ready = startup_warmup.ready and len(model_manager) > 0
+    return JSONResponse(
+        status_code=status.HTTP_200_OK
+        if ready
+        else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "ready": ready,
+            "timestamp": datetime.now().isoformat(),
+            "startup": startup_warmup.summary(),
+        },
+    )
+
+
+def build_static_payloads() -> dict:
+    """
+    Payloads of the metadata endpoints, serialized once per model load.
+
+    They carry no timestamp: a cached body would repeat its build time under
+    an unchanged ETag. The response Date header gives the current time.
+    """
+    return {
+        "/": {
+            "message": "Diabetes Readmission Prediction API",
+            "version": "3.0.0",
+            "status": "operational",
+            "docs": "/docs",
+            "health": "/health",
+            "models": "/models",
+            "version_info": "/version",
+            "deployment": "Azure Container Apps Production",
+            "prediction_timing": "at_discharge",
+            "default_threshold": 0.5,
+            "available_models": model_manager.names(),
+            "model_card_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/models/MODEL_CARD.md",
+            "dashboard_url": "https://diabetes-readmission-prediction-drvwuus2xt7arfkucmvreq.streamlit.app/",
+        },
+        "/feature-names": {
+            "feature_count": len(feature_names),
+            "features": list(feature_names),
+        },
+        "/models": [
+            ModelInfo(
+                model_name=model_name,
+                model_type=metadata["model_type"],
+                performance_metrics=metadata["performance_metrics"],
+                training_date=metadata["training_date"],
+                feature_count=metadata["feature_count"],
+                model_size_mb=metadata["model_size_mb"],
+                threshold=metadata["threshold"],
+            ).model_dump(mode="json")
+            for model_name, metadata in model_metadata.items()
+            if model_name in model_manager
+        ],
+        "/version": {
+            "api_version": "3.0.0",
+            "model_card_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/models/MODEL_CARD.md",
+            "feature_docs_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/feature_documentation.md",
+            "dashboard_url": "https://diabetes-readmission-prediction-drvwuus2xt7arfkucmvreq.streamlit.app/",
+            "available_models": model_manager.names(),
+            "default_model": "xgboost",
+            "default_threshold": 0.5,
+            "prediction_timing": "at_discharge",
+        },
+    }
+
+
+# Precomputed metadata responses with strong ETags (rebuilt by load_models)
+static_responses = StaticResponses(build_static_payloads)
+
+
+def static_response(path: str, request: Request) -> Response:
+    """Cached metadata body, or 304 if the client already has this version"""
+    return static_responses.get(path).response(request.headers.get("if-none-match"))
+
+
 # Feature names endpoint
 @app.get("/feature-names")
-async def get_feature_names():
+async def get_feature_names(request: Request):
     """Get list of feature names used by the model"""
     try:
-        return {
-            "feature_count": len(feature_names),
-            "features": feature_names,
-            "timestamp": datetime.now().isoformat(),
-        }
+        return static_response("/feature-names", request)
     except Exception as e:
         logger.error(f"Failed to get feature names: {e}")
         raise HTTPException(
@@ -528,25 +1078,10 @@ async def get_feature_names():
 
 # Models endpoint
 @app.get("/models", response_model=list[ModelInfo])
-async def get_models():
+async def get_models(request: Request):
     """Get information about available models"""
     try:
-        model_info_list = []
-        for model_name, metadata in model_metadata.items():
-            if model_name in models:
-                model_info_list.append(
-                    ModelInfo(
-                        model_name=model_name,
-                        model_type=metadata["model_type"],
-                        performance_metrics=metadata["performance_metrics"],
-                        training_date=metadata["training_date"],
-                        feature_count=metadata["feature_count"],
-                        model_size_mb=metadata["model_size_mb"],
-                        threshold=metadata["threshold"],
-                    )
-                )
-
-        return model_info_list
+        return static_response("/models", request)
     except Exception as e:
         logger.error(f"Failed to get model info: {e}")
         raise HTTPException(
@@ -556,17 +1091,92 @@ async def get_models():
 
 # Version endpoint
 @app.get("/version")
-async def get_version():
+async def get_version(request: Request):
     """Get API version and model information"""
+    return static_response("/version", request)
+
+
+# Model residency endpoint
+@app.get("/models/memory")
+async def get_models_memory():
+    """Get the model memory budget and which models are resident"""
+    return {
+        **model_manager.stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Sampling profiler endpoint
+@app.get("/admin/profile", include_in_schema=False)
+async def profile_endpoint(
+    seconds: float = 5.0,
+    rate_hz: float = 100.0,
+    output: str = "collapsed",
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample every thread's stack for ``seconds``; returns collapsed stacks"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if PROFILER_TOKEN and not hmac.compare_digest(x_admin_token or "", PROFILER_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if output not in ("collapsed", "json"):
+        raise HTTPException(
+            status_code=400, detail="output must be 'collapsed' or 'json'"
+        )
+
+    try:
+        # The sampler sleeps between samples on a worker thread, so the
+        # event loop keeps serving (and being profiled) meanwhile
+        result = await asyncio.to_thread(profiler.profile, seconds, rate_hz)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    logger.info(
+        f"🔍 Profiled {result.samples} samples over {result.duration_seconds:.1f}s "
+        f"({result.overhead_ratio:.1%} sampling overhead)"
+    )
+    if output == "json":
+        return result.to_dict()
+    return Response(content=result.collapsed(), media_type="text/plain")
+
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text format (scraped by monitoring/prometheus.yml)"""
+    return Response(content=render_prometheus(), media_type=CONTENT_TYPE)
+
+
+# Micro-batching metrics endpoint
+@app.get("/metrics/microbatch")
+async def get_microbatch_metrics():
+    """Get queue depth and realized batch sizes of the micro-batcher"""
+    return {
+        "enabled": micro_batcher is not None,
+        "stats": micro_batcher.stats() if micro_batcher is not None else {},
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Latency percentile endpoint
+@app.get("/metrics/latency")
+async def get_latency_metrics():
+    """Get p50/p90/p99/p999 latency per model and endpoint (sliding and lifetime)"""
     return {
-        "api_version": "3.0.0",
-        "model_card_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/models/MODEL_CARD.md",
-        "feature_docs_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/feature_documentation.md",
-        "dashboard_url": "https://diabetes-readmission-prediction-drvwuus2xt7arfkucmvreq.streamlit.app/",
-        "available_models": list(models.keys()),
-        "default_model": "xgboost",
-        "default_threshold": 0.5,
-        "prediction_timing": "at_discharge",
+        **metrics_collector.get_latency_metrics(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+# Prediction cache metrics endpoint
+@app.get("/metrics/cache")
+async def get_cache_metrics_endpoint():
+    """Get prediction cache occupancy and hit/miss rates"""
+    return {
+        "cache": prediction_cache.stats(),
+        "lookups": get_cache_metrics(),
         "timestamp": datetime.now().isoformat(),
     }
 
@@ -577,7 +1187,7 @@ async def predict_readmission(
     patient: PatientData,
     model_name: str = "xgboost",
     threshold: Optional[float] = 0.5,
-    request_timing: dict = Depends(get_request_timing),
+    timer: RequestTimer = Depends(get_request_timing),
     request: Request = None,
 ):
     """
@@ -590,12 +1200,15 @@ async def predict_readmission(
     - Available models: xgboost, lightgbm, catboost, logistic_regression
     """
     try:
+        # Body parsing and pydantic validation ran before the handler
+        timer.lap("validate")
+
         # Rate limiting check
         await check_rate_limit(request)
 
         # Validate model
-        if model_name not in models or models[model_name] is None:
-            available_models = list(models.keys())
+        if model_name not in model_manager:
+            available_models = model_manager.names()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Model '{model_name}' not available. Available models: {available_models}",
@@ -608,39 +1221,36 @@ async def predict_readmission(
                 detail="Threshold must be between 0 and 1",
             )
 
-        # Prepare features (matching the trained model's feature order)
-        feature_data = [
-            patient.encounter_id,
-            patient.patient_nbr,
-            patient.admission_type_id,
-            patient.admission_source_id,
-            patient.time_in_hospital,
-            patient.num_lab_procedures,
-            patient.num_procedures,
-            patient.num_medications,
-            patient.number_outpatient,
-            patient.number_emergency,
-            patient.number_inpatient,
-            patient.number_diagnoses,
-            patient.age_midpoint,
-            patient.service_utilization_score,
-            patient.clinical_risk_score,
-        ]
-
-        # Scale features (skip scaling since model was trained with raw features)
-        # if feature_scaler is not None:
-        #     feature_data = feature_scaler.transform([feature_data])
-
-        # Reshape features for prediction (ensure it's a 2D array)
-        feature_data = [feature_data]
-
-        # Make prediction
-        model = models[model_name]
-        probability = model.predict_proba(feature_data)[0][1]
+        await ensure_model(model_name, timer)
+
+        # Write the features straight into the model's input buffer
+        feature_data = feature_extractors[model_name].row(patient)
+        timer.lap("features")
+
+        # Serve repeated requests for the same encounter from the cache
+        cache_key, probability = None, None
+        if prediction_cache.enabled:
+            cache_key = prediction_cache.key(
+                model_name, model_versions.get(model_name, ""), threshold, feature_data
+            )
+            probability = prediction_cache.get(cache_key)
+            record_cache_lookup(model_name, probability is not None)
+            timer.lap("cache")
+        cached = probability is not None
+
+        # Make prediction, coalescing with concurrent requests when enabled
+        if not cached:
+            if micro_batcher is not None:
+                probability = await micro_batcher.submit(model_name, feature_data[0])
+            else:
+                probability = await predict_model_proba(model_name, feature_data)
+            timer.lap("inference")
+            if cache_key is not None:
+                prediction_cache.put(cache_key, probability)
         readmission_risk = probability >= threshold
 
         # Calculate processing time
-        processing_time = (time.time() - request_timing["start_time"]) * 1000
+        processing_time = timer.elapsed_ms()
 
         # Determine confidence level
         if abs(probability - threshold) > 0.3:
@@ -655,35 +1265,111 @@ async def predict_readmission(
             ["num_medications", "time_in_hospital"] if probability > 0.5 else []
         )
 
-        return PredictionResponse(
-            patient_id=f"PAT_{patient.encounter_id}",
-            timestamp=datetime.now().isoformat(),
-            readmission_risk=readmission_risk,
-            probability=float(probability),
-            confidence_level=confidence_level,
-            risk_factors=risk_factors,
-            model_used=model_name,
-            processing_time_ms=processing_time,
-            message="Prediction completed successfully",
-            threshold_used=threshold,
+        record_prediction(
+            model_name, processing_time, readmission_risk, probability, confidence_level
+        )
+        timer.lap("postprocess")
+
+        # Built to the PredictionResponse schema; encoded once, not re-validated
+        return FastJSONResponse(
+            {
+                "patient_id": f"PAT_{patient.encounter_id}",
+                "timestamp": datetime.now().isoformat(),
+                "readmission_risk": bool(readmission_risk),
+                "probability": float(probability),
+                "confidence_level": confidence_level,
+                "risk_factors": risk_factors,
+                "model_used": model_name,
+                "processing_time_ms": processing_time,
+                "message": "Prediction completed successfully",
+                "threshold_used": float(threshold),
+                "cached": cached,
+            }
         )
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
+        record_prediction(
+            model_name,
+            timer.elapsed_ms(),
+            False,
+            0.0,
+            "",
+            success=False,
+            error_message=str(e),
+        )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction failed: {str(e)}",
         ) from e
 
 
+def _batch_results(
+    patients: ColumnarBatch,
+    batch: BatchResult,
+    model_name: str,
+    threshold: float,
+    per_row_time: float,
+    labels: Optional[list[int]] = None,
+) -> list[dict]:
+    """Result rows of a scored batch; failed rows are named by ``labels``"""
+    timestamp = datetime.now().isoformat()
+    probabilities = batch.probabilities
+    margins = np.abs(probabilities - threshold)
+    results = []
+    encounter_ids = patients.columns["encounter_id"].tolist()
+    for i, encounter_id in enumerate(encounter_ids):
+        if i in batch.errors:
+            results.append(
+                {
+                    "patient_id": f"PAT_BATCH_{i if labels is None else labels[i]}",
+                    "error": batch.errors[i],
+                    "status": "failed",
+                    "timestamp": timestamp,
+                }
+            )
+            continue
+
+        probability = float(probabilities[i])
+        if margins[i] > 0.3:
+            confidence_level = "High"
+        elif margins[i] > 0.1:
+            confidence_level = "Medium"
+        else:
+            confidence_level = "Low"
+
+        results.append(
+            {
+                "patient_id": f"PAT_{encounter_id}",
+                "timestamp": timestamp,
+                "readmission_risk": bool(probability >= threshold),
+                "probability": probability,
+                "confidence_level": confidence_level,
+                "risk_factors": ["num_medications", "time_in_hospital"]
+                if probability > 0.5
+                else [],
+                "model_used": model_name,
+                "processing_time_ms": per_row_time,
+                "message": "Prediction completed successfully",
+                "threshold_used": threshold,
+            }
+        )
+    return results
+
+
 # Batch prediction endpoint
-@app.post("/predict/batch", response_model=BatchPredictionResponse)
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    openapi_extra=array_request_body(PatientData, "Patients"),
+)
 async def predict_batch(
-    patients: list[PatientData],
+    request: Request,
     model_name: str = "xgboost",
     threshold: Optional[float] = 0.5,
+    timer: RequestTimer = Depends(get_request_timing),
 ):
     """
     Predict readmission risk for multiple patients
@@ -692,19 +1378,21 @@ async def predict_batch(
     - Prediction is made at **discharge time** using only features available by discharge
     - Default threshold is 0.5, but can be customized
     - Available models: xgboost, lightgbm, catboost, logistic_regression
-    - Maximum batch size: 100 patients
+    - Maximum batch size: 100 patients (configurable via BATCH_MAX_SIZE)
     """
     try:
-        # Validate batch size
-        if len(patients) > 100:
+        # Validate the body as columns; the batch size is checked first
+        try:
+            patients = batch_validator.validate_json(await request.body())
+        except BatchTooLargeError as e:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Batch size cannot exceed 100 patients",
-            )
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+        timer.lap("validate")
 
         # Validate model
-        if model_name not in models or models[model_name] is None:
-            available_models = list(models.keys())
+        if model_name not in model_manager:
+            available_models = model_manager.names()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Model '{model_name}' not available. Available models: {available_models}",
@@ -717,70 +1405,604 @@ async def predict_batch(
                 detail="Threshold must be between 0 and 1",
             )
 
+        await ensure_model(model_name, timer)
         start_time = time.time()
-        results = []
 
-        for i, patient in enumerate(patients):
-            try:
-                # Create single prediction request
-                single_result = await predict_readmission(
-                    patient, model_name, threshold
-                )
-                results.append(single_result.dict())
-            except Exception as e:
+        # Assemble the whole batch into one matrix and score it in one call
+        matrix = feature_extractors[model_name].columns(patients.columns)
+        timer.lap("features")
+        record_batch_size("/predict/batch", model_name, len(matrix))
+        batch = await score_model(model_name, matrix, invalid_rows(matrix))
+        timer.lap("inference")
+
+        scoring_time = (time.time() - start_time) * 1000
+        per_row_time = scoring_time / len(patients) if len(patients) else 0.0
+        results = _batch_results(patients, batch, model_name, threshold, per_row_time)
+
+        processing_time = (time.time() - start_time) * 1000
+        timer.lap("postprocess")
+
+        # Built to the BatchPredictionResponse schema; rows are encoded once
+        return FastJSONResponse(
+            {
+                "batch_id": f"BATCH_{int(time.time())}",
+                "total_patients": len(patients),
+                "successful_predictions": batch.successful,
+                "failed_predictions": batch.failed,
+                "results": results,
+                "processing_time_ms": processing_time,
+                "model_used": model_name,
+            }
+        )
+
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch prediction failed: {str(e)}",
+        ) from e
+
+
+# Multi-model ensemble prediction endpoint
+@app.post(
+    "/predict/ensemble",
+    response_model=EnsemblePredictionResponse,
+    openapi_extra=array_request_body(PatientData, "Patients"),
+)
+async def predict_ensemble(
+    request: Request,
+    models_param: Optional[str] = Query(
+        None,
+        alias="models",
+        description="Comma-separated models to combine (default: ENSEMBLE_DEFAULT_MODELS)",
+    ),
+    weights: Optional[str] = Query(
+        None, description="Comma-separated weights, one per model (default: equal)"
+    ),
+    aggregation: str = "weighted",
+    threshold: Optional[float] = 0.5,
+    timer: RequestTimer = Depends(get_request_timing),
+):
+    """
+    Predict readmission risk for multiple patients with several models at once
+
+    **Important Notes:**
+    - Features are assembled once and every selected model scores them concurrently,
+      so latency tracks the slowest model rather than the sum
+    - `aggregation=weighted` averages probabilities; `aggregation=logit` averages
+      log-odds. A model that fails a row is left out of that row's aggregate
+    - Each result lists the per-model probabilities next to the aggregate
+    - Without `models`, the ENSEMBLE_DEFAULT_MODELS set is combined (all registered
+      models unless configured), loading any that are not in memory, so the same
+      request always gets the same models
+    - Maximum batch size: 100 patients (configurable via BATCH_MAX_SIZE)
+    """
+    try:
+        try:
+            patients = batch_validator.validate_json(await request.body())
+        except BatchTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+        timer.lap("validate")
+
+        model_names = (
+            [name.strip() for name in models_param.split(",") if name.strip()]
+            if models_param
+            else ensemble_default_models()
+        )
+        unavailable = [name for name in model_names if name not in model_manager]
+        if unavailable or not model_names:
+            available_models = model_manager.names()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Models {unavailable} not available. Available models: {available_models}",
+            )
+        if not 0 <= threshold <= 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Threshold must be between 0 and 1",
+            )
+        if aggregation not in AGGREGATIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Aggregation must be one of {list(AGGREGATIONS)}",
+            )
+        try:
+            model_weights = ensemble_weights(
+                model_names,
+                [float(w) for w in weights.split(",")] if weights else None,
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+
+        # Every selected model stays pinned until all of them have scored
+        async with contextlib.AsyncExitStack() as leases:
+            await lease_models(leases, model_names, timer)
+            start_time = time.time()
+
+            # One assembly for all models, then a view or gather per model
+            matrix = request_extractor.columns(patients.columns)
+            blocks = model_blocks(
+                matrix,
+                FEATURE_ORDER,
+                {name: feature_extractors[name] for name in model_names},
+            )
+            timer.lap("features")
+            for name in model_names:
+                record_batch_size("/predict/ensemble", name, len(matrix))
+            scored = await score_models(score_model, blocks)
+            timer.lap("inference")
+
+        per_model = np.vstack([scored[name][0].probabilities for name in model_names])
+        aggregate = combine(per_model, model_weights, aggregation)
+        codes = confidence_codes(aggregate, threshold)
+        encounter_ids = patients.columns["encounter_id"].tolist()
+        # Failed model rows become None (null) in the per-model probabilities
+        per_model_rows = np.where(np.isfinite(per_model), per_model, None).T.tolist()
+        results = []
+        for i, encounter_id in enumerate(encounter_ids):
+            model_probabilities = dict(zip(model_names, per_model_rows[i]))
+            if not np.isfinite(aggregate[i]):
+                errors = {name: scored[name][0].errors.get(i) for name in model_names}
                 results.append(
                     {
-                        "patient_id": f"PAT_BATCH_{i}",
-                        "error": str(e),
+                        "patient_id": f"PAT_{encounter_id}",
                         "status": "failed",
-                        "timestamp": datetime.now().isoformat(),
+                        "error": "; ".join(
+                            f"{name}: {message}" for name, message in errors.items()
+                        ),
+                        "model_probabilities": model_probabilities,
                     }
                 )
+                continue
+            probability = float(aggregate[i])
+            results.append(
+                {
+                    "patient_id": f"PAT_{encounter_id}",
+                    "probability": probability,
+                    "readmission_risk": probability >= threshold,
+                    "confidence_level": CONFIDENCE_LEVELS[codes[i]],
+                    "model_probabilities": model_probabilities,
+                }
+            )
+        timer.lap("postprocess")
+
+        return FastJSONResponse(
+            {
+                "ensemble_id": f"ENS_{int(time.time())}",
+                "models_used": model_names,
+                "weights": model_weights.tolist(),
+                "aggregation": aggregation,
+                "total_patients": len(patients),
+                "results": results,
+                "model_times_ms": {
+                    name: scored[name][1] * 1000 for name in model_names
+                },
+                "processing_time_ms": (time.time() - start_time) * 1000,
+            }
+        )
 
-        processing_time = (time.time() - start_time) * 1000
-        successful_predictions = len([r for r in results if "error" not in r])
-        failed_predictions = len([r for r in results if "error" in r])
-
-        return BatchPredictionResponse(
-            batch_id=f"BATCH_{int(time.time())}",
-            total_patients=len(patients),
-            successful_predictions=successful_predictions,
-            failed_predictions=failed_predictions,
-            results=results,
-            processing_time_ms=processing_time,
-            model_used=model_name,
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        logger.error(f"Ensemble prediction failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ensemble prediction failed: {str(e)}",
+        ) from e
+
+
+# Streaming NDJSON prediction endpoint
+@app.post(
+    "/predict/stream",
+    response_class=NDJSONStreamingResponse,
+    openapi_extra=ndjson_request_body(PatientData),
+    responses={
+        200: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": "One JSON result per input line",
+        }
+    },
+)
+async def predict_stream(
+    request: Request,
+    model_name: str = "xgboost",
+    threshold: Optional[float] = 0.5,
+):
+    """
+    Predict readmission risk for a newline-delimited JSON stream of patients
+
+    **Important Notes:**
+    - Send one patient object per line (`application/x-ndjson`); there is no batch size cap
+    - Results stream back as NDJSON in input order while the body is still uploading,
+      scored in chunks of STREAM_CHUNK_ROWS rows
+    - Every result carries the input `line` number; invalid lines are reported as
+      `{"line": n, "status": "failed", "errors": [...]}` and do not stop the stream
+    """
+    if model_name not in model_manager:
+        available_models = model_manager.names()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model '{model_name}' not available. Available models: {available_models}",
+        )
+    if not 0 <= threshold <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Threshold must be between 0 and 1",
         )
+    await ensure_model(model_name)
 
-    except HTTPException:
+    async def score_chunk(patients: ColumnarBatch, lines: list[int]) -> list[dict]:
+        start_time = time.time()
+        matrix = feature_extractors[model_name].columns(patients.columns)
+        record_batch_size("/predict/stream", model_name, len(matrix))
+        batch = await score_model(model_name, matrix, invalid_rows(matrix))
+        per_row_time = (time.time() - start_time) * 1000 / len(patients)
+        return _batch_results(
+            patients, batch, model_name, threshold, per_row_time, labels=lines
+        )
+
+    return NDJSONStreamingResponse(
+        ndjson_scorer.stream(request.stream(), score_chunk),
+        max_memory_bytes=STREAM_SPOOL_MEMORY_BYTES,
+    )
+
+
+# Arrow / Parquet columnar prediction endpoint
+@app.post(
+    "/predict/arrow",
+    response_class=Response,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string", "format": "binary"}}
+                for media_type in (
+                    arrow.ARROW_STREAM_MEDIA_TYPE,
+                    arrow.ARROW_FILE_MEDIA_TYPE,
+                    arrow.PARQUET_MEDIA_TYPE,
+                )
+            },
+        }
+    },
+    responses={
+        200: {
+            "content": {
+                arrow.ARROW_STREAM_MEDIA_TYPE: {},
+                arrow.PARQUET_MEDIA_TYPE: {},
+            },
+            "description": "encounter_id, probability, readmission_risk, "
+            "confidence_level and error columns, one row per input row",
+        }
+    },
+)
+async def predict_arrow(
+    request: Request,
+    model_name: str = "xgboost",
+    threshold: Optional[float] = 0.5,
+    timer: RequestTimer = Depends(get_request_timing),
+):
+    """
+    Predict readmission risk for a columnar table of patients
+
+    **Important Notes:**
+    - Upload an Arrow IPC stream/file or a Parquet file with one integer column per
+      PatientData field; there is no batch size cap
+    - Arrow columns are scored in place, without a per-row conversion
+    - The result comes back in the upload's format; rows that could not be scored
+      carry a message in `error` and nulls in the prediction columns
+    - Requires `pyarrow` on the server (501 otherwise)
+    """
+    if not arrow.available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow/Parquet support requires pyarrow on the server",
+        )
+    if model_name not in model_manager:
+        available_models = model_manager.names()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model '{model_name}' not available. Available models: {available_models}",
+        )
+    if not 0 <= threshold <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Threshold must be between 0 and 1",
+        )
+    await ensure_model(model_name, timer)
+
+    try:
+        body = await request.body()
+        fmt = arrow.detect_format(body, request.headers.get("content-type"))
+        try:
+            table = arrow.read_table(body, fmt)
+        except arrow.ArrowFormatError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+
+        # Type and range checks run on the decoded columns themselves
+        columns, nulls = arrow.table_columns(table, batch_validator.field_names)
+        errors = batch_validator.check_columns(columns, nulls, max_errors=1000)
+        if errors:
+            raise body_errors(errors)
+        timer.lap("validate")
+
+        matrix = feature_extractors[model_name].columns(columns)
+        timer.lap("features")
+        record_batch_size("/predict/arrow", model_name, len(matrix))
+        batch = await score_model(model_name, matrix, invalid_rows(matrix))
+        timer.lap("inference")
+
+        results = arrow.result_table(
+            table.column("encounter_id"), batch.probabilities, threshold, batch.errors
+        )
+        content, media_type = arrow.write_table(results, fmt)
+        timer.lap("postprocess")
+
+        return Response(content, media_type=media_type)
+
+    except (HTTPException, RequestValidationError):
         raise
     except Exception as e:
-        logger.error(f"Batch prediction failed: {e}")
+        logger.error(f"Arrow prediction failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Batch prediction failed: {str(e)}",
+            detail=f"Arrow prediction failed: {str(e)}",
+        ) from e
+
+
+def columns_scorer(model_name: str, endpoint: str):
+    """Chunk scorer for CSV uploads and jobs: one executor call per chunk"""
+
+    async def score_columns(columns: dict, errors: dict[int, str]) -> BatchResult:
+        # Jobs resumed at startup may reach a model before anything loaded it
+        async with model_manager.lease(model_name):
+            matrix = feature_extractors[model_name].columns(columns)
+            for i, message in invalid_rows(matrix).items():
+                errors.setdefault(i, message)
+            record_batch_size(endpoint, model_name, len(matrix) - len(errors))
+            return await inference_executor.score(model_name, matrix, errors)
+
+    return score_columns
+
+
+def _job_model_scorer(model_name: str):
+    if model_name not in model_manager:
+        raise RuntimeError(f"Model '{model_name}' is not available")
+    return columns_scorer(model_name, "/jobs")
+
+
+def start_jobs():
+    """
+    Open the job store and resume jobs left unfinished by a restart.
+
+    An unwritable JOBS_DIR (e.g. a read-only container filesystem) only
+    disables the job endpoints; online scoring still starts.
+    """
+    global job_runner
+
+    store = None
+    try:
+        store = JobStore(JOBS_DIR, lease_seconds=JOBS_LEASE_SECONDS)
+        runner = JobRunner(store, csv_scorer, _job_model_scorer, workers=JOBS_WORKERS)
+        runner.start()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"⚠️ Job store unavailable at {JOBS_DIR}, jobs disabled: {e}")
+        if store is not None:
+            store.close()
+        return
+    job_runner = runner
+    logger.info(f"✅ Job store ready at {os.path.abspath(JOBS_DIR)}")
+
+
+# CSV upload prediction endpoint
+@app.post(
+    "/predict/csv",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {CSV_MEDIA_TYPE: {}},
+            "description": "row, encounter_id, patient_nbr, probability, "
+            "readmission_risk, confidence_level and error, one line per input row",
+        }
+    },
+)
+async def predict_csv(
+    file: UploadFile = File(
+        ...,
+        description="Discharge export in the diabetic_data.csv schema with engineered scores",
+    ),
+    model_name: str = "xgboost",
+    threshold: Optional[float] = 0.5,
+):
+    """
+    Predict readmission risk for a CSV export of discharges
+
+    **Important Notes:**
+    - Upload a multipart `file` with the columns of `diabetic_data.csv` plus the
+      engineered `service_utilization_score` and `clinical_risk_score` (as computed
+      by the training feature pipeline); extra columns are ignored and there is no
+      size cap
+    - `age_midpoint` is derived from the `age` bracket; a row missing an engineered
+      score fails with the reason in `error`
+    - The file is read and scored CSV_CHUNK_ROWS rows at a time and results stream back
+      as CSV while later chunks are still being scored
+    - Invalid rows keep their `row` number and carry the reason in `error`
+    """
+    if model_name not in model_manager:
+        available_models = model_manager.names()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model '{model_name}' not available. Available models: {available_models}",
+        )
+    if not 0 <= threshold <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Threshold must be between 0 and 1",
+        )
+    await ensure_model(model_name)
+    # The upload may be closed before the response body streams, so the
+    # stream reads (and closes) its own copy
+    upload = await asyncio.to_thread(spool_upload, file.file)
+    try:
+        await asyncio.to_thread(csv_scorer.check_header, upload)
+    except CSVSchemaError as e:
+        upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+    return StreamingResponse(
+        csv_scorer.stream(
+            upload, threshold, columns_scorer(model_name, "/predict/csv")
+        ),
+        media_type=CSV_MEDIA_TYPE,
+    )
+
+
+# Bulk scoring job submission endpoint
+@app.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    file: Optional[UploadFile] = File(
+        None,
+        description="Discharge export in the diabetic_data.csv schema with engineered scores",
+    ),
+    dataset: Optional[str] = Form(
+        None,
+        description="CSV file path relative to JOBS_DATA_DIR, instead of an upload",
+    ),
+    model_name: str = "xgboost",
+    threshold: Optional[float] = 0.5,
+):
+    """
+    Queue a bulk scoring job for a CSV upload or a dataset already on the server
+
+    **Important Notes:**
+    - Send exactly one of a multipart `file` or a `dataset` reference, in the
+      upload schema of `/predict/csv` (including the engineered scores)
+    - Returns immediately with a `job_id`; poll `GET /jobs/{job_id}` and download
+      `GET /jobs/{job_id}/result` once the job is completed
+    - Progress is saved after every chunk of CSV_CHUNK_ROWS rows; jobs interrupted by
+      a restart resume from the last saved chunk once JOBS_LEASE_SECONDS have passed
+    """
+    if job_runner is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job store is not available",
+        )
+    if model_name not in model_manager:
+        available_models = model_manager.names()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model '{model_name}' not available. Available models: {available_models}",
+        )
+    if not 0 <= threshold <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Threshold must be between 0 and 1",
+        )
+    if (file is None) == (dataset is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either a file upload or a dataset reference",
+        )
+
+    store = job_runner.store
+    if dataset is not None:
+        root = os.path.realpath(JOBS_DATA_DIR)
+        input_path = os.path.realpath(os.path.join(root, dataset))
+        if not input_path.startswith(root + os.sep) or not os.path.isfile(input_path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Dataset '{dataset}' not found",
+            )
+
+    job_id, job_dir = store.new_job_dir()
+    try:
+        if file is not None:
+            input_path = os.path.join(job_dir, INPUT_FILE)
+            with open(input_path, "wb") as target:
+                await asyncio.to_thread(shutil.copyfileobj, file.file, target)
+        with open(input_path, "rb") as source:
+            await asyncio.to_thread(csv_scorer.check_header, source)
+    except CSVSchemaError as e:
+        store.discard(job_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         ) from e
+    except Exception as e:
+        store.discard(job_id)
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Job submission failed: {str(e)}",
+        ) from e
+
+    job = store.create(job_id, model_name, threshold, input_path)
+    job_runner.submit(job)
+    logger.info(f"📥 Job {job_id} queued for {model_name}")
+    return job_summary(job)
+
+
+def _get_job(job_id: str):
+    if job_runner is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job store is not available",
+        )
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found",
+        )
+    return job
+
+
+# Bulk scoring job status endpoint
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status and progress of a bulk scoring job"""
+    return job_summary(_get_job(job_id))
+
+
+# Bulk scoring job result endpoint
+@app.get(
+    "/jobs/{job_id}/result",
+    response_class=FileResponse,
+    responses={
+        200: {
+            "content": {CSV_MEDIA_TYPE: {}},
+            "description": "Results in the `/predict/csv` format",
+        }
+    },
+)
+async def get_job_result(job_id: str):
+    """Download the CSV results of a completed job"""
+    job = _get_job(job_id)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job '{job_id}' is {job.status}, results are not ready",
+        )
+    return FileResponse(
+        job_runner.store.result_path(job_id),
+        media_type=CSV_MEDIA_TYPE,
+        filename=f"{job_id}.csv",
+    )
 
 
 # Root endpoint
 @app.get("/")
-async def root():
+async def root(request: Request):
     """API root endpoint with comprehensive information"""
-    return {
-        "message": "Diabetes Readmission Prediction API",
-        "version": "3.0.0",
-        "status": "operational",
-        "docs": "/docs",
-        "health": "/health",
-        "models": "/models",
-        "version_info": "/version",
-        "timestamp": datetime.now().isoformat(),
-        "deployment": "Azure Container Apps Production",
-        "prediction_timing": "at_discharge",
-        "default_threshold": 0.5,
-        "available_models": list(models.keys()),
-        "model_card_url": "https://github.com/Muh76/diabetes-readmission-prediction/blob/master/models/MODEL_CARD.md",
-        "dashboard_url": "https://diabetes-readmission-prediction-drvwuus2xt7arfkucmvreq.streamlit.app/",
-    }
+    return static_response("/", request)
 
 
 # Exception handler for better error responses
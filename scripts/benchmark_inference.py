@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Inference Benchmark for Diabetes Readmission Prediction
+
+Measures model scoring cost on synthetic patients using the artifacts in
+``models/``, so changes to the prediction path can be compared before and after.
+
+Usage:
+    python scripts/benchmark_inference.py predict
+    python scripts/benchmark_inference.py batch --sizes 1 10 100 1000
+    python scripts/benchmark_inference.py health --executors inline thread --models lightgbm
+    python scripts/benchmark_inference.py trees --sizes 1 10 100 1000
+    python scripts/benchmark_inference.py linear --sizes 1 10 100 1000
+    python scripts/benchmark_inference.py serialize --sizes 100 10000
+    python scripts/benchmark_inference.py validate --sizes 100 10000
+
+Benchmarks:
+- predict: per-model single-row latency of predict()+predict_proba() versus
+  a single predict_proba() call with the class derived from a threshold
+- batch: rows/second of one vectorized predict_proba() call per batch size
+- health: /health latency of a uvicorn-served app_improved while batch
+  predictions saturate it, once per INFERENCE_EXECUTOR mode
+  (inline = scoring on the event loop, as before the executor existed)
+- trees: native predict_proba() versus the compiled NumPy tree backend
+  per batch size, with the parity error of each compiled model
+- linear: scaled features + native predict_proba() versus the closed-form
+  scorer with the feature scaler folded in, in microseconds per row
+- serialize: cost of encoding a batch response of N rows through pydantic
+  response models (per-row PredictionResponse, and dict rows validated by
+  the route's response_model) versus FastJSONResponse with the standard
+  library encoder and with orjson (when installed)
+- validate: cost of validating a JSON batch body of N patients with one
+  PatientData instance per row versus the columnar validator's vectorized
+  range checks
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving import responses  # noqa: E402
+from serving.features import model_feature_names, scaler_params  # noqa: E402
+from serving.linear import LinearFastPathError, LinearScorer  # noqa: E402
+from serving.trees import TreeCompileError, compile_with_parity  # noqa: E402
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODELS_DIR = "models"
+MODEL_NAMES = ["logistic_regression", "xgboost", "lightgbm", "catboost"]
+N_FEATURES = 15
+
+
+def load_models(names):
+    """Load the requested model artifacts that exist on disk."""
+    loaded = {}
+    for name in names:
+        path = os.path.join(MODELS_DIR, f"{name}.pkl")
+        if os.path.exists(path):
+            loaded[name] = joblib.load(path)
+        else:
+            logger.warning(f"⚠️ Skipping {name}: {path} not found")
+    return loaded
+
+
+def synthetic_patients(n_rows, seed=42):
+    """Generate plausible raw feature rows in the models' feature order."""
+    rng = np.random.default_rng(seed)
+    high = np.array(
+        [4e8, 2e8, 9, 25, 14, 100, 6, 80, 10, 10, 10, 16, 95, 10, 10], dtype=np.float64
+    )
+    low = np.array([1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 1, 5, 0, 0], dtype=np.float64)
+    return np.floor(rng.uniform(low, high + 1, size=(n_rows, N_FEATURES)))
+
+
+def time_call(fn, repeat):
+    """Return per-call wall-clock timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def benchmark_predict(loaded, repeat):
+    """Compare two-call and single-call inference for one patient."""
+    row = synthetic_patients(1)
+    logger.info(
+        f"{'model':<22}{'predict+proba ms':>18}{'proba only ms':>16}{'saving':>9}"
+    )
+    for name, model in loaded.items():
+
+        def two_calls(model=model):
+            return model.predict(row)[0], model.predict_proba(row)[0][1]
+
+        def one_call(model=model):
+            # Thresholding the probability replaces the predict() call
+            probability = model.predict_proba(row)[0][1]
+            return probability >= 0.5, probability
+
+        # Warm up lazily initialized library state before timing
+        two_calls()
+        before = statistics.median(time_call(two_calls, repeat))
+        after = statistics.median(time_call(one_call, repeat))
+        logger.info(
+            f"{name:<22}{before:>18.4f}{after:>16.4f}{(1 - after / before):>9.1%}"
+        )
+
+
+def benchmark_batch(loaded, sizes, repeat):
+    """Measure vectorized throughput as the batch grows."""
+    logger.info(f"{'model':<22}{'batch':>8}{'ms/batch':>12}{'rows/s':>14}")
+    for name, model in loaded.items():
+        for size in sizes:
+            matrix = synthetic_patients(size)
+            model.predict_proba(matrix)
+            elapsed = statistics.median(
+                time_call(lambda m=model, x=matrix: m.predict_proba(x), repeat)
+            )
+            logger.info(
+                f"{name:<22}{size:>8}{elapsed:>12.3f}{size / elapsed * 1000:>14.0f}"
+            )
+
+
+def benchmark_trees(loaded, sizes, repeat):
+    """Compare native and compiled tree-ensemble scoring per batch size."""
+    logger.info(
+        f"{'model':<22}{'batch':>8}{'native ms':>12}{'compiled ms':>13}"
+        f"{'speedup':>9}{'max err':>10}"
+    )
+    for name, model in loaded.items():
+        try:
+            compiled = compile_with_parity(model)
+        except TreeCompileError as e:
+            logger.warning(f"⚠️ Skipping {name}: {e}")
+            continue
+        for size in sizes:
+            matrix = synthetic_patients(size)
+            native_p = model.predict_proba(matrix)[:, 1]
+            compiled_p = compiled.predict_proba(matrix)[:, 1]
+            native = statistics.median(
+                time_call(lambda m=model, x=matrix: m.predict_proba(x), repeat)
+            )
+            ours = statistics.median(
+                time_call(lambda c=compiled, x=matrix: c.predict_proba(x), repeat)
+            )
+            error = float(np.max(np.abs(native_p - compiled_p)))
+            logger.info(
+                f"{name:<22}{size:>8}{native:>12.3f}{ours:>13.3f}"
+                f"{native / ours:>8.1f}x{error:>10.1e}"
+            )
+
+
+def benchmark_linear(loaded, sizes, repeat):
+    """Compare scaler + native scoring with the folded closed-form scorer."""
+    artifact_names = joblib.load("feature_names.pkl")
+    scaler = joblib.load("feature_scaler.pkl")
+    all_center, all_scale = scaler_params(scaler, artifact_names)
+    logger.info(
+        f"{'model':<22}{'batch':>8}{'native us/row':>15}{'closed us/row':>15}"
+        f"{'speedup':>9}{'max err':>10}"
+    )
+    for name, model in loaded.items():
+        columns = [
+            artifact_names.index(f)
+            for f in model_feature_names(model, artifact_names[:N_FEATURES])
+        ]
+        center, scale = all_center[columns], all_scale[columns]
+        try:
+            scorer = LinearScorer.from_model(model, center, scale)
+        except LinearFastPathError as e:
+            logger.warning(f"⚠️ Skipping {name}: {e}")
+            continue
+
+        def native_fn(x, m=model, center=center, scale=scale):
+            return m.predict_proba((x - center) / scale)[:, 1]
+
+        # The library may report sigmoid(2z) (binary softmax); match it
+        probe = scorer.probe()
+        if not np.allclose(scorer(probe), native_fn(probe), atol=1e-9):
+            scorer = scorer.scaled(2.0)
+        for size in sizes:
+            matrix = synthetic_patients(size)
+            error = float(np.max(np.abs(native_fn(matrix) - scorer(matrix))))
+            native = statistics.median(time_call(lambda x=matrix: native_fn(x), repeat))
+            ours = statistics.median(time_call(lambda s=scorer, x=matrix: s(x), repeat))
+            logger.info(
+                f"{name:<22}{size:>8}{native * 1000 / size:>15.3f}"
+                f"{ours * 1000 / size:>15.3f}{native / ours:>8.1f}x{error:>10.1e}"
+            )
+
+
+def _batch_rows(n_rows):
+    """Result rows as the batch endpoint builds them."""
+    rng = np.random.default_rng(0)
+    timestamp = "2025-09-01T22:30:00"
+    return [
+        {
+            "patient_id": f"PAT_{100000 + i}",
+            "timestamp": timestamp,
+            "readmission_risk": bool(p >= 0.5),
+            "probability": float(p),
+            "confidence_level": "High" if abs(p - 0.5) > 0.3 else "Medium",
+            "risk_factors": ["num_medications", "time_in_hospital"] if p > 0.5 else [],
+            "model_used": "xgboost",
+            "processing_time_ms": 0.0123,
+            "message": "Prediction completed successfully",
+            "threshold_used": 0.5,
+        }
+        for i, p in enumerate(rng.random(n_rows))
+    ]
+
+
+def benchmark_serialize(sizes, repeat):
+    """Compare response-model and direct JSON encoding of batch responses."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    sys.path.insert(0, "notebooks")
+    from app_improved import BatchPredictionResponse, PredictionResponse
+
+    field = create_response_field(name="Response", type_=BatchPredictionResponse)
+    loop = asyncio.new_event_loop()
+
+    def wrap(results):
+        return {
+            "batch_id": "BATCH_1",
+            "total_patients": len(results),
+            "successful_predictions": len(results),
+            "failed_predictions": 0,
+            "results": results,
+            "processing_time_ms": 1.0,
+            "model_used": "xgboost",
+        }
+
+    def through_response_model(content):
+        value = loop.run_until_complete(
+            serialize_response(field=field, response_content=content)
+        )
+        return JSONResponse(value).body
+
+    def per_row_models(rows):
+        results = [PredictionResponse(**row).dict() for row in rows]
+        return through_response_model(BatchPredictionResponse(**wrap(results)))
+
+    orjson = responses.orjson
+
+    def fast(rows, encoder):
+        responses.orjson = encoder
+        try:
+            return responses.FastJSONResponse(wrap(rows)).body
+        finally:
+            responses.orjson = orjson
+
+    paths = [
+        ("per-row models", per_row_models),
+        ("response_model", lambda rows: through_response_model(wrap(rows))),
+        ("fast (json)", lambda rows: fast(rows, None)),
+    ]
+    if orjson is not None:
+        paths.append(("fast (orjson)", lambda rows: fast(rows, orjson)))
+    else:
+        logger.warning("⚠️ orjson not installed; skipping the orjson path")
+
+    logger.info(f"{'path':<18}{'rows':>8}{'ms':>12}{'us/row':>10}{'speedup':>9}")
+    for size in sizes:
+        rows = _batch_rows(size)
+        runs = max(3, repeat * 100 // max(size, 100))
+        baseline = None
+        for name, encode in paths:
+            encode(rows)
+            elapsed = statistics.median(time_call(lambda e=encode, r=rows: e(r), runs))
+            baseline = baseline or elapsed
+            logger.info(
+                f"{name:<18}{size:>8}{elapsed:>12.3f}{elapsed / size * 1000:>10.2f}"
+                f"{baseline / elapsed:>8.1f}x"
+            )
+    loop.close()
+
+
+def benchmark_validate(sizes, repeat):
+    """Compare per-row model validation and columnar validation of batch bodies."""
+    import json
+
+    from serving.validation import ColumnarValidator
+
+    sys.path.insert(0, "notebooks")
+    from app_improved import PatientData
+
+    example = PatientData.Config.schema_extra["example"]
+    validators = [
+        (mode, ColumnarValidator(PatientData, mode=mode))
+        for mode in ("pydantic", "columnar")
+    ]
+
+    logger.info(f"{'path':<18}{'rows':>8}{'ms':>12}{'us/row':>10}{'speedup':>9}")
+    for size in sizes:
+        body = json.dumps(
+            [dict(example, encounter_id=i + 1) for i in range(size)]
+        ).encode()
+        runs = max(3, repeat * 100 // max(size, 100))
+        baseline = None
+        for name, validator in validators:
+            validator.validate_json(body)
+            elapsed = statistics.median(
+                time_call(lambda v=validator, b=body: v.validate_json(b), runs)
+            )
+            baseline = baseline or elapsed
+            logger.info(
+                f"{name:<18}{size:>8}{elapsed:>12.3f}{elapsed / size * 1000:>10.2f}"
+                f"{baseline / elapsed:>8.1f}x"
+            )
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def _probe_health(base_url, model_name, concurrency, duration, batch_size):
+    """Saturate a running API with batch predictions and time /health."""
+    import httpx
+
+    names = [
+        "encounter_id",
+        "patient_nbr",
+        "admission_type_id",
+        "admission_source_id",
+        "time_in_hospital",
+        "num_lab_procedures",
+        "num_procedures",
+        "num_medications",
+        "number_outpatient",
+        "number_emergency",
+        "number_inpatient",
+        "number_diagnoses",
+        "age_midpoint",
+        "service_utilization_score",
+        "clinical_risk_score",
+    ]
+    rows = synthetic_patients(batch_size).astype(int).tolist()
+    patients = [dict(zip(names, row)) for row in rows]
+    deadline = time.perf_counter() + duration
+    health_ms = []
+    predictions = 0
+
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def load():
+            nonlocal predictions
+            while time.perf_counter() < deadline:
+                await client.post(
+                    f"/predict/batch?model_name={model_name}", json=patients
+                )
+                predictions += batch_size
+
+        async def probe():
+            await asyncio.sleep(0.5)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/health")
+                health_ms.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *[load() for _ in range(concurrency)])
+
+    return {
+        "health_p50_ms": percentile(health_ms, 50),
+        "health_p99_ms": percentile(health_ms, 99),
+        "health_samples": len(health_ms),
+        "predictions_per_s": predictions / duration,
+    }
+
+
+def _wait_until_ready(base_url, timeout=60):
+    """Poll /ready until the API reports its models loaded."""
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"API at {base_url} did not become ready")
+
+
+def benchmark_health(executors, model_name, concurrency, duration, batch_size, port):
+    """Compare /health latency under load for each executor mode."""
+    base_url = f"http://127.0.0.1:{port}"
+    logger.info(
+        f"{'executor':<10}{'health p50 ms':>15}{'health p99 ms':>15}"
+        f"{'probes':>8}{'pred/s':>10}"
+    )
+    for kind in executors:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "--app-dir",
+                "notebooks",
+                "app_improved:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            env=dict(os.environ, INFERENCE_EXECUTOR=kind),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_ready(base_url)
+            result = asyncio.run(
+                _probe_health(base_url, model_name, concurrency, duration, batch_size)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        logger.info(
+            f"{kind:<10}{result['health_p50_ms']:>15.2f}"
+            f"{result['health_p99_ms']:>15.2f}{result['health_samples']:>8}"
+            f"{result['predictions_per_s']:>10.0f}"
+        )
+
+
+def main():
+    """Run the selected benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "benchmark",
+        choices=[
+            "predict",
+            "batch",
+            "health",
+            "health-probe",
+            "trees",
+            "linear",
+            "serialize",
+            "validate",
+        ],
+    )
+    parser.add_argument("--models", nargs="+", default=MODEL_NAMES)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--executors", nargs="+", default=["inline", "thread"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+
+    if args.benchmark == "health":
+        benchmark_health(
+            args.executors,
+            args.models[-1],
+            args.concurrency,
+            args.duration,
+            args.batch_size,
+            args.port,
+        )
+        return
+
+    if args.benchmark == "serialize":
+        benchmark_serialize(args.sizes, args.repeat)
+        return
+
+    if args.benchmark == "validate":
+        benchmark_validate(args.sizes, args.repeat)
+        return
+
+    loaded = load_models(args.models)
+
+    if args.benchmark == "predict":
+        benchmark_predict(loaded, args.repeat)
+    elif args.benchmark == "batch":
+        benchmark_batch(loaded, args.sizes, args.repeat)
+    elif args.benchmark == "trees":
+        benchmark_trees(loaded, args.sizes, args.repeat)
+    elif args.benchmark == "linear":
+        benchmark_linear(loaded, args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Model Serving Utilities
+Shared inference building blocks used by the FastAPI applications
+"""
@@ -0,0 +1,131 @@
+"""
+Arrow and Parquet Batch I/O
+Decodes columnar uploads into NumPy views and encodes scored results
+"""
+
+import io
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+
+from serving.batch import CONFIDENCE_LEVELS, confidence_codes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: the Arrow/Parquet endpoint reports 501 without it
+    pa = None
+    pq = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+
+class ArrowFormatError(ValueError):
+    """Raised when an upload is not a readable Arrow or Parquet table"""
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def detect_format(body: bytes, content_type: Optional[str] = None) -> str:
+    """``"parquet"`` or ``"arrow"`` from the content type, else the magic bytes"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in (PARQUET_MEDIA_TYPE, "application/x-parquet"):
+        return "parquet"
+    if media_type in (ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE):
+        return "arrow"
+    return "parquet" if body[:4] == _PARQUET_MAGIC else "arrow"
+
+
+def read_table(body: bytes, fmt: str) -> "pa.Table":
+    """
+    Decode an upload without copying it.
+
+    Arrow IPC (stream or file) buffers are referenced in place, so the
+    columns are views into ``body``; Parquet pages are decoded once.
+    """
+    buffer = pa.py_buffer(body)
+    try:
+        if fmt == "parquet":
+            return pq.read_table(pa.BufferReader(buffer))
+        if body[:6] == _ARROW_FILE_MAGIC:
+            return pa.ipc.open_file(buffer).read_all()
+        return pa.ipc.open_stream(buffer).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ArrowFormatError(f"Could not read {fmt} table: {e}") from e
+
+
+def table_columns(
+    table: "pa.Table", names: Sequence[str]
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """
+    NumPy columns and null masks for the ``names`` present in ``table``.
+
+    Null-free single-chunk numeric columns are zero-copy views of the
+    Arrow buffers; chunked columns are concatenated once and nulls are
+    zero-filled so the values stay integer typed.
+    """
+    columns: dict[str, np.ndarray] = {}
+    nulls: dict[str, np.ndarray] = {}
+    for name in names:
+        if name not in table.column_names:
+            continue
+        column = table.column(name)
+        if column.null_count and pa.types.is_integer(column.type):
+            nulls[name] = column.is_null().to_numpy()
+            column = column.fill_null(0)
+        if column.num_chunks == 1:
+            column = column.chunk(0)
+        columns[name] = column.to_numpy(zero_copy_only=False)
+    return columns, nulls
+
+
+def result_table(
+    keys: "pa.ChunkedArray",
+    probabilities: np.ndarray,
+    threshold: float,
+    errors: dict[int, str],
+    key_name: str = "encounter_id",
+) -> "pa.Table":
+    """
+    One row per input row: key, probability, label and confidence level.
+
+    Rows the model could not score keep their key, carry the message in
+    ``error`` and have nulls in the prediction columns.
+    """
+    failed = np.zeros(len(probabilities), dtype=bool)
+    failed[list(errors)] = True
+    error_messages = [None] * len(probabilities)
+    for i, message in errors.items():
+        error_messages[i] = message
+
+    return pa.table(
+        {
+            key_name: keys,
+            "probability": pa.array(probabilities, mask=failed),
+            "readmission_risk": pa.array(probabilities >= threshold, mask=failed),
+            "confidence_level": pa.DictionaryArray.from_arrays(
+                pa.array(confidence_codes(probabilities, threshold), mask=failed),
+                pa.array(CONFIDENCE_LEVELS),
+            ),
+            "error": pa.array(error_messages, type=pa.string()),
+        }
+    )
+
+
+def write_table(table: "pa.Table", fmt: str) -> tuple[bytes, str]:
+    """Encode ``table`` as Parquet or an Arrow IPC stream, with its media type"""
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+        return sink.getvalue(), PARQUET_MEDIA_TYPE
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue(), ARROW_STREAM_MEDIA_TYPE
@@ -0,0 +1,124 @@
+"""
+Vectorized Batch Inference Engine
+Scores a whole batch of patients with a single model call
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maps a 2-D feature block to the positive-class probability of each row
+PredictFn = Callable[[np.ndarray], np.ndarray]
+
+# Confidence levels by distance of the probability from the threshold
+CONFIDENCE_LEVELS = ("Low", "Medium", "High")
+
+
+@dataclass
+class BatchResult:
+    """Outcome of scoring a batch: one probability per row plus row errors"""
+
+    probabilities: np.ndarray
+    errors: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def successful(self) -> int:
+        return len(self.probabilities) - len(self.errors)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+def build_feature_matrix(
+    rows: list[list[float]], n_features: int, dtype=np.float64
+) -> tuple[np.ndarray, dict[int, str]]:
+    """Stack feature rows into one 2-D matrix, recording rows that cannot be used"""
+    matrix = np.zeros((len(rows), n_features), dtype=dtype)
+    errors: dict[int, str] = {}
+
+    try:
+        matrix[:] = rows
+    except (TypeError, ValueError):
+        # Fall back to row-wise assignment to find the offending rows
+        for i, row in enumerate(rows):
+            try:
+                matrix[i] = row
+            except (TypeError, ValueError) as e:
+                errors[i] = f"Invalid feature row: {e}"
+
+    for i, message in invalid_rows(matrix).items():
+        errors.setdefault(i, message)
+
+    return matrix, errors
+
+
+def invalid_rows(matrix: np.ndarray) -> dict[int, str]:
+    """Rows of an assembled feature matrix that cannot be scored"""
+    non_finite = np.flatnonzero(~np.isfinite(matrix).all(axis=1))
+    return {int(i): "Feature row contains non-finite values" for i in non_finite}
+
+
+def confidence_codes(probabilities: np.ndarray, threshold: float) -> np.ndarray:
+    """Index into ``CONFIDENCE_LEVELS`` of every probability"""
+    margins = np.abs(probabilities - threshold)
+    return np.where(margins > 0.3, 2, np.where(margins > 0.1, 1, 0)).astype(np.int8)
+
+
+def score_matrix(
+    predict_fn: PredictFn,
+    matrix: np.ndarray,
+    errors: Optional[dict[int, str]] = None,
+) -> BatchResult:
+    """
+    Score every usable row of a feature matrix with as few model calls as possible.
+
+    All valid rows go through a single vectorized call. If that call raises,
+    the block is bisected so the rows that break the model are isolated while
+    the remaining rows are still scored in vectorized sub-blocks.
+    """
+    errors = dict(errors or {})
+    probabilities = np.full(len(matrix), np.nan, dtype=np.float64)
+
+    valid_idx = np.array(
+        [i for i in range(len(matrix)) if i not in errors], dtype=np.intp
+    )
+    if len(valid_idx) > 0:
+        _score_block(predict_fn, matrix, valid_idx, probabilities, errors)
+
+    return BatchResult(probabilities=probabilities, errors=errors)
+
+
+def _score_block(
+    predict_fn: PredictFn,
+    matrix: np.ndarray,
+    idx: np.ndarray,
+    probabilities: np.ndarray,
+    errors: dict[int, str],
+):
+    """Score rows ``idx`` in one call, bisecting on failure"""
+    try:
+        probabilities[idx] = predict_fn(matrix[idx])
+    except Exception as e:
+        if len(idx) == 1:
+            errors[int(idx[0])] = str(e)
+            return
+        logger.warning(f"Vectorized scoring of {len(idx)} rows failed, bisecting: {e}")
+        mid = len(idx) // 2
+        _score_block(predict_fn, matrix, idx[:mid], probabilities, errors)
+        _score_block(predict_fn, matrix, idx[mid:], probabilities, errors)
+
+
+def positive_class_proba(model, transform: Optional[Callable] = None) -> PredictFn:
+    """Build a ``PredictFn`` from a fitted classifier and optional preprocessing"""
+
+    def predict(block: np.ndarray) -> np.ndarray:
+        if transform is not None:
+            block = transform(block)
+        return model.predict_proba(block)[:, 1]
+
+    return predict
@@ -0,0 +1,112 @@
+"""
+Prediction Cache
+Bounded LRU cache of model probabilities with per-entry TTL
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+CacheKey = tuple[str, str, float, bytes]
+
+
+def artifact_version(path: str) -> str:
+    """Short content digest of a model artifact, used as its cache version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of positive-class probabilities.
+
+    Entries are keyed by model name, model version, decision threshold and
+    a digest of the ordered feature vector the model would score, so a
+    changed artifact or input never matches a stale entry. The least
+    recently used entry is evicted once ``max_entries`` is reached and
+    entries older than ``ttl_seconds`` are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(
+        model_name: str, model_version: str, threshold: float, features: np.ndarray
+    ) -> CacheKey:
+        """Cache key for one feature vector in the model's column order"""
+        digest = hashlib.blake2b(
+            np.ascontiguousarray(features).tobytes(), digest_size=16
+        ).digest()
+        return (model_name, model_version, float(threshold), digest)
+
+    def get(self, key: CacheKey) -> Optional[float]:
+        """Cached probability for ``key``, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, probability = entry
+            if self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return probability
+
+    def put(self, key: CacheKey, probability: float):
+        """Store a probability, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), float(probability))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_name: Optional[str] = None) -> int:
+        """Drop every entry (or those of one model); returns the count removed"""
+        with self._lock:
+            if model_name is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if key[0] == model_name]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> dict:
+        """Occupancy and eviction counters (hit rates live in monitoring)"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
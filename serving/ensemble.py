@@ -0,0 +1,103 @@
+"""
+Multi-Model Ensemble Scoring
+Scores one assembled feature block with several models concurrently and combines them
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from typing import Optional
+
+import numpy as np
+
+from serving.batch import BatchResult, invalid_rows
+from serving.features import FeatureExtractor
+
+# "weighted": weighted mean of probabilities; "logit": weighted mean of
+# log-odds, which lets a confident model outvote several hesitant ones
+AGGREGATIONS = ("weighted", "logit")
+
+# Scores a block with the named model (the inference executor's ``score``)
+ScoreFn = Callable[[str, np.ndarray, dict[int, str]], Awaitable[BatchResult]]
+
+_EPSILON = 1e-7
+
+
+def ensemble_weights(
+    model_names: Sequence[str], weights: Optional[Sequence[float]] = None
+) -> np.ndarray:
+    """Normalized weights, equal unless given one non-negative weight per model"""
+    if weights is None:
+        return np.full(len(model_names), 1.0 / len(model_names))
+    if len(weights) != len(model_names):
+        raise ValueError(
+            f"Expected {len(model_names)} weights (one per model), got {len(weights)}"
+        )
+    values = np.asarray(weights, dtype=np.float64)
+    if not np.isfinite(values).all() or (values < 0).any() or values.sum() <= 0:
+        raise ValueError("Weights must be non-negative with a positive sum")
+    return values / values.sum()
+
+
+def model_blocks(
+    matrix: np.ndarray,
+    feature_names: Sequence[str],
+    extractors: Mapping[str, FeatureExtractor],
+) -> dict[str, np.ndarray]:
+    """
+    Each model's input block from one block assembled in ``feature_names``
+    order. Models reading the same columns unscaled share the block; the
+    others get one column gather (and their scaling) instead of a second
+    pass over the request.
+    """
+    index = {name: i for i, name in enumerate(feature_names)}
+    blocks = {}
+    for model_name, extractor in extractors.items():
+        if extractor.feature_names == list(feature_names) and not extractor.scaled:
+            blocks[model_name] = matrix
+            continue
+        block = matrix[:, [index[name] for name in extractor.feature_names]]
+        blocks[model_name] = extractor.apply_scaling(block)
+    return blocks
+
+
+async def score_models(
+    score: ScoreFn, blocks: Mapping[str, np.ndarray]
+) -> dict[str, tuple[BatchResult, float]]:
+    """Score every model's block concurrently: ``(result, seconds)`` per model"""
+
+    async def timed(model_name: str, block: np.ndarray):
+        start = time.perf_counter()
+        result = await score(model_name, block, invalid_rows(block))
+        return result, time.perf_counter() - start
+
+    results = await asyncio.gather(
+        *(timed(model_name, block) for model_name, block in blocks.items())
+    )
+    return dict(zip(blocks, results))
+
+
+def combine(
+    probabilities: np.ndarray, weights: np.ndarray, aggregation: str = "weighted"
+) -> np.ndarray:
+    """
+    Aggregate ``(n_models, n_rows)`` probabilities into one per row.
+
+    A model that failed a row (NaN) is left out of that row and the other
+    weights are renormalized; rows no model scored stay NaN.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(
+            f"aggregation must be one of {AGGREGATIONS}, got '{aggregation}'"
+        )
+    scored = np.isfinite(probabilities)
+    row_weights = np.where(scored, weights[:, None], 0.0)
+    totals = row_weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if aggregation == "weighted":
+            values = np.where(scored, probabilities, 0.0)
+            return (row_weights * values).sum(axis=0) / totals
+
+        clipped = np.clip(np.where(scored, probabilities, 0.5), _EPSILON, 1 - _EPSILON)
+        logits = (row_weights * np.log(clipped / (1 - clipped))).sum(axis=0) / totals
+        return 1.0 / (1.0 + np.exp(-logits))
@@ -0,0 +1,231 @@
+"""
+Off-Event-Loop Inference Executor
+Runs blocking model calls in per-model worker pools
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from serving.batch import BatchResult, positive_class_proba, score_matrix
+from serving.linear import DEFAULT_INLINE_ROWS, LinearScorer, linear_predict
+from serving.trees import DEFAULT_MAX_ROWS, compiled_predict
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+def native_predict_kwargs(model, n_threads: int) -> dict:
+    """
+    Pin a model library's own thread pool to ``n_threads``.
+
+    XGBoost and LightGBM read the thread count from their estimator params;
+    CatBoost takes it per predict call, so it is returned as a keyword
+    argument. Other models are single threaded for our input sizes.
+    """
+    module = type(model).__module__
+    if module.startswith("catboost"):
+        return {"thread_count": n_threads}
+    if module.startswith(("xgboost", "lightgbm")):
+        model.set_params(n_jobs=n_threads)
+    return {}
+
+
+def _with_kwargs(model, kwargs: dict):
+    """``positive_class_proba`` passing library-specific predict kwargs"""
+    if not kwargs:
+        return positive_class_proba(model)
+    return lambda block: model.predict_proba(block, **kwargs)[:, 1]
+
+
+def _predict_fn(
+    model,
+    n_threads: int,
+    compile_trees: bool,
+    tree_max_rows: int,
+    linear_fast_path: bool = False,
+    scaler: Optional[tuple[np.ndarray, np.ndarray]] = None,
+):
+    """Native predict function, fronted by the compiled tree or linear backend"""
+    predict = _with_kwargs(model, native_predict_kwargs(model, n_threads))
+    if compile_trees:
+        predict = compiled_predict(model, predict, tree_max_rows)
+    if linear_fast_path:
+        predict = linear_predict(model, predict, *(scaler or (None, None)))
+    return predict
+
+
+# Worker-process state for the process pool (one model per pool)
+_worker_predict = None
+
+
+def _init_worker(
+    model_path: str,
+    n_threads: int,
+    compile_trees: bool,
+    tree_max_rows: int,
+    linear_fast_path: bool = False,
+    scaler: Optional[tuple[np.ndarray, np.ndarray]] = None,
+):
+    """Load (and optionally compile) the model once in each worker process"""
+    global _worker_predict
+    model = joblib.load(model_path)
+    _worker_predict = _predict_fn(
+        model, n_threads, compile_trees, tree_max_rows, linear_fast_path, scaler
+    )
+
+
+def _score_in_worker(matrix: np.ndarray, errors: Optional[dict]) -> BatchResult:
+    return score_matrix(_worker_predict, matrix, errors)
+
+
+class InferenceExecutor:
+    """
+    Per-model worker pools so slow model calls never block the event loop.
+
+    ``kind`` selects a thread pool (models share the API process memory),
+    a process pool (each worker loads its own copy of the model from its
+    artifact) or ``inline`` scoring on the event loop. Pools are sized so
+    that ``workers * native_threads`` does not exceed the CPU count.
+
+    Models registered with ``compile_trees`` score blocks of up to
+    ``tree_max_rows`` rows on the NumPy tree backend (``serving.trees``).
+    Models registered with ``linear_fast_path`` use the closed-form scorer
+    (``serving.linear``) and score blocks of up to ``inline_rows`` rows on
+    the calling thread, where the pool hand-off would cost more than the
+    dot product itself.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        workers: Optional[int] = None,
+        native_threads: int = 1,
+        tree_max_rows: int = DEFAULT_MAX_ROWS,
+        inline_rows: int = DEFAULT_INLINE_ROWS,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Executor kind must be one of {EXECUTOR_KINDS}")
+
+        self.kind = kind
+        self.native_threads = max(1, native_threads)
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // self.native_threads)
+        self.tree_max_rows = tree_max_rows
+        self.inline_rows = inline_rows
+
+        self._pools: dict[str, Executor] = {}
+        self._predict_fns: dict[str, object] = {}
+        # Models whose closed-form scorer runs small blocks without a pool hop
+        self._inline: set[str] = set()
+
+    def register(
+        self,
+        model_name: str,
+        model,
+        model_path: Optional[str] = None,
+        compile_trees: bool = False,
+        linear_fast_path: bool = False,
+        scaler: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        """
+        Create (or replace) the worker pool serving ``model_name``.
+
+        With ``linear_fast_path``, a ``(center, scale)`` ``scaler`` is folded
+        into the closed-form scorer and ``score`` takes unscaled blocks.
+        """
+        self.unregister(model_name)
+
+        # Process workers compile their own copy from the artifact
+        compile_here = compile_trees and self.kind != "process"
+        self._predict_fns[model_name] = _predict_fn(
+            model,
+            self.native_threads,
+            compile_here,
+            self.tree_max_rows,
+            linear_fast_path,
+            scaler,
+        )
+        if isinstance(self._predict_fns[model_name], LinearScorer):
+            self._inline.add(model_name)
+
+        if self.kind == "thread":
+            self._pools[model_name] = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f"infer-{model_name}"
+            )
+        elif self.kind == "process":
+            if model_path is None:
+                raise ValueError(f"Process pool for {model_name} needs model_path")
+            self._pools[model_name] = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(
+                    model_path,
+                    self.native_threads,
+                    compile_trees,
+                    self.tree_max_rows,
+                    linear_fast_path,
+                    scaler,
+                ),
+            )
+
+        logger.info(
+            f"✅ {model_name} inference executor: {self.kind}"
+            f" ({self.workers} workers x {self.native_threads} native threads"
+            f"{', compiled trees' if compile_trees else ''}"
+            f"{', closed-form linear' if model_name in self._inline else ''})"
+        )
+
+    def unregister(self, model_name: str):
+        """Drop a model and shut down its pool without waiting for it"""
+        self._predict_fns.pop(model_name, None)
+        self._inline.discard(model_name)
+        pool = self._pools.pop(model_name, None)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def score(
+        self,
+        model_name: str,
+        matrix: np.ndarray,
+        errors: Optional[dict[int, str]] = None,
+    ) -> BatchResult:
+        """Score a feature matrix on the model's pool and await the result"""
+        if model_name not in self._predict_fns:
+            raise KeyError(f"Model '{model_name}' is not registered")
+
+        if self.kind == "inline" or (
+            model_name in self._inline and len(matrix) <= self.inline_rows
+        ):
+            return score_matrix(self._predict_fns[model_name], matrix, errors)
+
+        loop = asyncio.get_running_loop()
+        pool = self._pools[model_name]
+        if self.kind == "process":
+            return await loop.run_in_executor(pool, _score_in_worker, matrix, errors)
+        return await loop.run_in_executor(
+            pool, score_matrix, self._predict_fns[model_name], matrix, errors
+        )
+
+    async def predict_proba(self, model_name: str, row: np.ndarray) -> float:
+        """Positive-class probability of a single ``(1, n_features)`` row"""
+        if model_name in self._inline:
+            return float(self._predict_fns[model_name](row)[0])
+        if self.kind != "inline":
+            # The row may be a reusable extractor buffer owned by the loop thread
+            row = np.array(row, copy=True)
+        result = await self.score(model_name, row)
+        if result.errors:
+            raise RuntimeError(result.errors[0])
+        return float(result.probabilities[0])
+
+    def shutdown(self):
+        """Shut down every pool"""
+        for model_name in list(self._pools):
+            self.unregister(model_name)
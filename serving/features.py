@@ -0,0 +1,217 @@
+"""
+Precompiled Feature Extraction
+Writes validated patient fields straight into NumPy feature buffers
+"""
+
+import logging
+import threading
+import warnings
+from collections.abc import Iterable, Mapping, Sequence
+from itertools import chain
+from operator import attrgetter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureSchemaError(ValueError):
+    """Raised when the request schema, artifacts and models disagree on features"""
+
+
+def model_feature_names(model, default: Sequence[str]) -> list[str]:
+    """
+    Feature names a fitted model expects, in its input column order.
+
+    Falls back to ``default`` when the model does not record names but
+    expects the same number of columns.
+    """
+    for attr in ("feature_names_in_", "feature_name_", "feature_names_"):
+        names = getattr(model, attr, None)
+        if names is not None and len(names) > 0:
+            return [str(n) for n in names]
+
+    if hasattr(model, "get_booster"):
+        names = model.get_booster().feature_names
+        if names:
+            return list(names)
+
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None or n_features == len(default):
+        return list(default)
+
+    raise FeatureSchemaError(
+        f"{type(model).__name__} expects {n_features} unnamed features, "
+        f"cannot map them onto {len(default)} known features"
+    )
+
+
+def scaler_params(
+    scaler, feature_names: Sequence[str]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Extract per-column float64 ``(center, scale)`` so that
+    ``scaler.transform(X) == (X - center) / scale`` bit for bit.
+
+    Works for scalers that center and divide (RobustScaler, StandardScaler).
+    Tree models split on exact scaled values, so an approximation such as
+    a folded ``X * slope + offset`` would move rows across thresholds; the
+    parameters are checked for exact equality with ``scaler.transform``.
+    """
+    n_features = len(feature_names)
+
+    def param(*names: str, default: float) -> np.ndarray:
+        for name in names:
+            value = getattr(scaler, name, None)
+            if value is not None:
+                return np.asarray(value, dtype=np.float64)
+        return np.full(n_features, default)
+
+    def transform(values: np.ndarray) -> np.ndarray:
+        frame = pd.DataFrame(values, columns=list(feature_names))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return np.asarray(scaler.transform(frame), dtype=np.float64)
+
+    if not hasattr(scaler, "scale_"):
+        raise FeatureSchemaError(f"{type(scaler).__name__} has no per-column scale")
+    # A disabled step is stored as None and skipped by transform
+    center = param("center_", "mean_", default=0.0)
+    scale = param("scale_", default=1.0)
+    if center.shape != (n_features,) or scale.shape != (n_features,):
+        raise FeatureSchemaError(
+            f"{type(scaler).__name__} was fitted on {len(scale)} features, "
+            f"expected {n_features}"
+        )
+
+    rng = np.random.default_rng(0)
+    probe = np.vstack(
+        [
+            rng.integers(-1000, 1000, size=(64, n_features)).astype(np.float64),
+            rng.uniform(-1e3, 1e3, size=(8, n_features)),
+        ]
+    )
+    if not np.array_equal(transform(probe), (probe - center) / scale):
+        raise FeatureSchemaError(
+            f"{type(scaler).__name__} is not reproduced exactly by "
+            f"(X - center) / scale"
+        )
+    return center, scale
+
+
+class FeatureExtractor:
+    """
+    Compiled mapping from request model fields to a model's input columns.
+
+    Built once at startup: the column order, optional scaling parameters and
+    the schema check are all resolved here so the request path only copies
+    numbers into a buffer.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        field_names: Iterable[str],
+        center: Optional[np.ndarray] = None,
+        scale: Optional[np.ndarray] = None,
+        dtype=np.float32,
+    ):
+        fields = set(field_names)
+        missing = [f for f in feature_names if f not in fields]
+        if missing:
+            raise FeatureSchemaError(f"Missing required features: {missing}")
+
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.dtype = np.dtype(dtype)
+        # Scaling runs in float64 exactly as the scaler does, then is cast
+        self.center = None if center is None else np.asarray(center, np.float64)
+        self.scale = None if scale is None else np.asarray(scale, np.float64)
+        if self.n_features == 1:
+            getter = attrgetter(self.feature_names[0])
+            self._getter = lambda obj: (getter(obj),)
+        else:
+            self._getter = attrgetter(*self.feature_names)
+        self._local = threading.local()
+
+    def select(
+        self, feature_names: Sequence[str], field_names: Iterable[str]
+    ) -> "FeatureExtractor":
+        """Derive an extractor for a subset/reordering of these features"""
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        unknown = [f for f in feature_names if f not in index]
+        if unknown:
+            raise FeatureSchemaError(f"Features not in the artifact schema: {unknown}")
+
+        columns = [index[f] for f in feature_names]
+        return FeatureExtractor(
+            feature_names,
+            field_names,
+            center=None if self.center is None else self.center[columns],
+            scale=None if self.scale is None else self.scale[columns],
+            dtype=self.dtype,
+        )
+
+    def unscaled(self) -> "FeatureExtractor":
+        """The same column mapping without scaling, for models that fold it in"""
+        return FeatureExtractor(
+            self.feature_names, self.feature_names, dtype=self.dtype
+        )
+
+    @property
+    def scaled(self) -> bool:
+        return self.scale is not None
+
+    def apply_scaling(self, values: np.ndarray) -> np.ndarray:
+        """Scale a block of these columns in place (computed in float64)"""
+        if self.scale is None:
+            return values
+        if values.dtype == np.float64:
+            values -= self.center
+            values /= self.scale
+        else:
+            values[:] = (values - self.center) / self.scale
+        return values
+
+    def row(self, record) -> np.ndarray:
+        """
+        Extract one record into a reusable ``(1, n_features)`` buffer.
+
+        The buffer is owned by the calling thread and overwritten by the next
+        call, so copy it if the values must outlive the prediction.
+        """
+        buffer = getattr(self._local, "row", None)
+        if buffer is None:
+            buffer = self._local.row = np.empty((1, self.n_features), self.dtype)
+        buffer[0] = self._getter(record)
+        return self.apply_scaling(buffer)
+
+    def block(self, records: Sequence, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Extract many records into a preallocated ``(n, n_features)`` block"""
+        n_rows = len(records)
+        flat = np.fromiter(
+            chain.from_iterable(map(self._getter, records)),
+            dtype=self.dtype,
+            count=n_rows * self.n_features,
+        ).reshape(n_rows, self.n_features)
+        if out is None:
+            out = flat
+        else:
+            out = out[:n_rows]
+            out[:] = flat
+        return self.apply_scaling(out)
+
+    def columns(
+        self, columns: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Assemble named field columns (a validated columnar batch) into a block"""
+        n_rows = len(columns[self.feature_names[0]])
+        if out is None:
+            out = np.empty((n_rows, self.n_features), self.dtype)
+        else:
+            out = out[:n_rows]
+        for j, name in enumerate(self.feature_names):
+            out[:, j] = columns[name]
+        return self.apply_scaling(out)
@@ -0,0 +1,395 @@
+"""
+Persistent Bulk Scoring Jobs
+SQLite job store and an asyncio worker pool that resumes jobs after a restart
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import IO, Optional
+
+from serving.uploads import CSVScorer, ScoreColumnsFn, result_header
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+UNFINISHED = ("queued", "running")
+
+INPUT_FILE = "input.csv"
+RESULT_FILE = "results.csv"
+
+# An owner whose heartbeat is older than this is treated as gone
+DEFAULT_LEASE_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    input_path TEXT NOT NULL,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    result_bytes INTEGER NOT NULL DEFAULT 0,
+    total_rows INTEGER,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class Job:
+    """One bulk scoring job as stored in the job table"""
+
+    job_id: str
+    status: str
+    model_name: str
+    threshold: float
+    input_path: str
+    rows_done: int
+    result_bytes: int
+    total_rows: Optional[int]
+    error: Optional[str]
+    owner: Optional[str]
+    heartbeat_at: Optional[float]
+    created_at: float
+    updated_at: float
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in UNFINISHED
+
+
+class JobOwnershipError(Exception):
+    """Raised when another process has taken over a job this one was running"""
+
+
+class JobStore:
+    """
+    Jobs table in ``<directory>/jobs.db`` plus one directory per job.
+
+    A job directory holds the uploaded input (when not a dataset reference)
+    and ``results.csv``. Progress is committed per finished chunk as the
+    number of input rows done and the valid length of the result file, so
+    a restarted worker truncates any half-written chunk and carries on
+    from the next row.
+
+    Each store is a distinct owner. Owners refresh ``heartbeat_at`` on their
+    unfinished jobs (``heartbeat``); a job whose heartbeat is older than
+    ``lease_seconds`` belongs to a dead owner and can be claimed. Process
+    ids are not used, since they repeat across container restarts.
+    """
+
+    def __init__(self, directory: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds must be positive")
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "jobs.db"),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), RESULT_FILE)
+
+    def new_job_dir(self) -> tuple[str, str]:
+        """A fresh job id and its (created) directory"""
+        job_id = uuid.uuid4().hex
+        path = self.job_dir(job_id)
+        os.makedirs(path)
+        return job_id, path
+
+    def discard(self, job_id: str):
+        """Remove a job directory that never became a job"""
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def create(
+        self, job_id: str, model_name: str, threshold: float, input_path: str
+    ) -> Job:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (job_id, status, model_name, threshold, input_path,"
+                " owner, heartbeat_at, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, model_name, threshold, input_path, self.owner, now, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else Job(**dict(row))
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def commit_chunk(self, job_id: str, rows: int, result_bytes: int) -> bool:
+        """
+        Record a chunk whose results are durably in the result file;
+        False when the job is no longer owned by this store
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET rows_done = ?, result_bytes = ?, heartbeat_at = ?,"
+                " updated_at = ? WHERE job_id = ? AND owner = ?",
+                (rows, result_bytes, time.time(), time.time(), job_id, self.owner),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self) -> int:
+        """Refresh the heartbeat of this owner's unfinished jobs"""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (now, self.owner, *UNFINISHED),
+            )
+        return cursor.rowcount
+
+    def claim(
+        self, job_id: str, owner: Optional[str], heartbeat_at: Optional[float]
+    ) -> bool:
+        """
+        Take over a job from the owner and heartbeat that were seen; a
+        conditional update, so of several stores claiming the same stale
+        job only one succeeds
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET owner = ?, heartbeat_at = ?, updated_at = ?"
+                " WHERE job_id = ? AND owner IS ? AND heartbeat_at IS ?"
+                " AND status IN (?, ?)",
+                (self.owner, now, now, job_id, owner, heartbeat_at, *UNFINISHED),
+            )
+        return cursor.rowcount == 1
+
+    def claim_unfinished(self) -> list[Job]:
+        """
+        Take over unfinished jobs of other owners whose heartbeat is older
+        than the lease (as after a restart) and return them oldest first
+        """
+        stale_before = time.time() - self.lease_seconds
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT job_id, owner, heartbeat_at FROM jobs"
+                " WHERE status IN (?, ?) AND owner IS NOT ? ORDER BY created_at",
+                (*UNFINISHED, self.owner),
+            ).fetchall()
+        claimed = [
+            row["job_id"]
+            for row in rows
+            if (row["owner"] is None or (row["heartbeat_at"] or 0) < stale_before)
+            and self.claim(row["job_id"], row["owner"], row["heartbeat_at"])
+        ]
+        return [self.get(job_id) for job_id in claimed]
+
+
+def _count_rows(path: str) -> int:
+    """Data rows of a CSV file (newline count less the header)"""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as file:
+        while block := file.read(1024 * 1024):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def _open_results(path: str, valid_bytes: int) -> IO[bytes]:
+    """Result file for appending, without output of an uncommitted chunk"""
+    results = open(path, "ab")
+    results.truncate(valid_bytes)
+    if valid_bytes == 0:
+        results.write(result_header())
+    return results
+
+
+def _append_durably(results: IO[bytes], lines: bytes) -> int:
+    """Append and fsync result lines; the valid length of the file"""
+    results.write(lines)
+    results.flush()
+    os.fsync(results.fileno())
+    return results.tell()
+
+
+class JobRunner:
+    """
+    Pool of asyncio workers scoring queued jobs chunk by chunk.
+
+    ``score_fn(model_name)`` returns the chunk scorer for a model, so
+    scoring runs on the same inference executor as the online endpoints
+    and the event loop only coordinates: store updates and result file
+    writes run on threads. Each chunk's result lines are appended and
+    fsynced before the chunk is committed to the store.
+
+    A heartbeat task refreshes this runner's jobs every third of the lease
+    and picks up jobs of owners whose heartbeat went stale. Stopping the
+    runner leaves running jobs as they are; they are claimed again once
+    their lease expires.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        scorer: CSVScorer,
+        score_fn: Callable[[str], ScoreColumnsFn],
+        workers: int = 2,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.store = store
+        self.scorer = scorer
+        self.score_fn = score_fn
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        """Start the workers and requeue jobs left unfinished by a restart"""
+        resumed = self.store.claim_unfinished()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        self._enqueue(resumed)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: Job):
+        self._queue.put_nowait(job.job_id)
+
+    def _enqueue(self, jobs: list[Job]):
+        for job in jobs:
+            self._queue.put_nowait(job.job_id)
+        if jobs:
+            logger.info(f"🔁 Resuming {len(jobs)} unfinished scoring jobs")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat)
+                self._enqueue(await asyncio.to_thread(self.store.claim_unfinished))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Job heartbeat failed: {e}")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def run(self, job_id: str):
+        """Score a job from its last committed chunk to the end"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job.finished:
+            return
+        await asyncio.to_thread(self.store.update, job_id, status="running")
+        try:
+            if job.total_rows is None:
+                total_rows = await asyncio.to_thread(_count_rows, job.input_path)
+                await asyncio.to_thread(
+                    self.store.update, job_id, total_rows=total_rows
+                )
+            score_columns = self.score_fn(job.model_name)
+            rows_done, result_bytes = await self._score(job, score_columns)
+        except asyncio.CancelledError:
+            logger.info(f"⏸️ Job {job_id} interrupted, will resume from its last chunk")
+            raise
+        except JobOwnershipError:
+            logger.warning(f"⚠️ Job {job_id} was taken over by another worker")
+            return
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {e}")
+            await asyncio.to_thread(
+                self.store.update, job_id, status="failed", error=str(e)
+            )
+            return
+        await asyncio.to_thread(
+            self.store.update,
+            job_id,
+            status="completed",
+            rows_done=rows_done,
+            result_bytes=result_bytes,
+            total_rows=rows_done,
+        )
+        logger.info(f"✅ Job {job_id} completed: {rows_done} rows")
+
+    async def _score(self, job: Job, score_columns: ScoreColumnsFn) -> tuple[int, int]:
+        rows_done = job.rows_done
+        results = await asyncio.to_thread(
+            _open_results, self.store.result_path(job.job_id), job.result_bytes
+        )
+        try:
+            with open(job.input_path, "rb") as source:
+                async for rows, lines in self.scorer.chunks(
+                    source, job.threshold, score_columns, first_row=rows_done + 1
+                ):
+                    result_bytes = await asyncio.to_thread(
+                        _append_durably, results, lines
+                    )
+                    rows_done += rows
+                    if not await asyncio.to_thread(
+                        self.store.commit_chunk, job.job_id, rows_done, result_bytes
+                    ):
+                        raise JobOwnershipError(job.job_id)
+            return rows_done, results.tell()
+        finally:
+            # Everything written is already flushed and fsynced
+            results.close()
+
+
+def job_summary(job: Job) -> dict:
+    """Public fields of a job with its progress fraction"""
+    summary = asdict(job)
+    for internal in ("input_path", "result_bytes", "owner", "heartbeat_at"):
+        del summary[internal]
+    summary["progress"] = (
+        1.0
+        if job.status == "completed"
+        else min(job.rows_done / job.total_rows, 1.0)
+        if job.total_rows
+        else 0.0
+    )
+    return summary
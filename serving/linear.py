@@ -0,0 +1,114 @@
+"""
+Closed-Form Linear Scorer
+Folds a logistic regression and its feature scaler into one affine transform plus sigmoid
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+from scipy.special import expit
+
+logger = logging.getLogger(__name__)
+
+# Blocks up to this size are cheap enough to score on the calling thread
+DEFAULT_INLINE_ROWS = 256
+
+
+class LinearFastPathError(ValueError):
+    """Raised when a model is not a binary linear classifier or fails parity"""
+
+
+class LinearScorer:
+    """
+    ``sigmoid(X @ weights + bias)`` for a fitted binary linear classifier.
+
+    A column-wise scaler in front of the model (``(X - center) / scale``)
+    is folded in at build time: ``weights = coef / scale`` and ``bias =
+    intercept - weights @ center``, so raw feature rows are scored with one
+    dot product and no intermediate scaled copy.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+
+    @classmethod
+    def from_model(
+        cls,
+        model,
+        center: Optional[np.ndarray] = None,
+        scale: Optional[np.ndarray] = None,
+    ) -> "LinearScorer":
+        coef = getattr(model, "coef_", None)
+        intercept = getattr(model, "intercept_", None)
+        classes = getattr(model, "classes_", None)
+        if coef is None or intercept is None or np.shape(coef)[0] != 1:
+            raise LinearFastPathError(
+                f"{type(model).__name__} is not a fitted binary linear classifier"
+            )
+        if classes is not None and len(classes) != 2:
+            raise LinearFastPathError(f"Expected 2 classes, got {len(classes)}")
+
+        coef = np.asarray(coef, dtype=np.float64)[0]
+        bias = float(np.asarray(intercept, dtype=np.float64)[0])
+        if scale is not None:
+            coef = coef / np.asarray(scale, dtype=np.float64)
+            bias -= float(coef @ np.asarray(center, dtype=np.float64))
+        return cls(coef, bias)
+
+    def scaled(self, factor: float) -> "LinearScorer":
+        """``sigmoid(factor * z)``, e.g. 2 for a binary softmax over ``(-z, z)``"""
+        return LinearScorer(self.weights * factor, self.bias * factor)
+
+    def probe(self, n_rows: int = 16, seed: int = 0) -> np.ndarray:
+        """
+        Random rows moved along the weights so their decision values span
+        ``[-4, 4]``, where probabilities are not saturated at 0 or 1
+        """
+        rng = np.random.default_rng(seed)
+        rows = rng.uniform(-5, 5, (n_rows, len(self.weights)))
+        target = np.linspace(-4, 4, n_rows)
+        shift = (target - self.decision_function(rows)) / (self.weights @ self.weights)
+        return rows + shift[:, None] * self.weights
+
+    def decision_function(self, block: np.ndarray) -> np.ndarray:
+        return block @ self.weights + self.bias
+
+    def __call__(self, block: np.ndarray) -> np.ndarray:
+        """Positive-class probabilities of a ``(n, n_features)`` block"""
+        return expit(block @ self.weights + self.bias)
+
+
+def linear_predict(
+    model,
+    native_predict,
+    center: Optional[np.ndarray] = None,
+    scale: Optional[np.ndarray] = None,
+):
+    """
+    Positive-class predict function backed by a ``LinearScorer``.
+
+    Blocks are unscaled feature rows: a scaler given as ``center``/``scale``
+    is folded into the scorer. The scorer is checked against
+    ``native_predict`` (fed scaled probes) and models that are not linear,
+    or disagree, keep ``native_predict`` behind the scaling.
+    """
+    try:
+        scorer = LinearScorer.from_model(model, center, scale)
+        if not scorer.weights.any():
+            raise LinearFastPathError("Model has all-zero coefficients")
+        probe = scorer.probe()
+        native = native_predict(probe if scale is None else (probe - center) / scale)
+        # Binary multinomial models (and some library versions) report the
+        # softmax over (-z, z), which is sigmoid(2z)
+        for candidate in (scorer, scorer.scaled(2.0)):
+            if np.allclose(candidate(probe), native, atol=1e-9):
+                return candidate
+        raise LinearFastPathError("Closed-form probabilities disagree with the model")
+    except LinearFastPathError as e:
+        logger.warning(f"⚠️ Falling back to native {type(model).__name__}: {e}")
+        if scale is None:
+            return native_predict
+        # Callers pass unscaled blocks once the scaler is folded here
+        return lambda block: native_predict((block - center) / scale)
@@ -0,0 +1,146 @@
+"""
+Dynamic Micro-Batching
+Coalesces concurrent single-row predictions into vectorized model calls
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from serving.batch import BatchResult
+
+# Scores a feature matrix for a model, e.g. ``InferenceExecutor.score``
+Scorer = Callable[[str, np.ndarray], Awaitable[BatchResult]]
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Queue single-row requests per model and score them together.
+
+    A batch is flushed when it reaches ``max_batch_size`` or when the oldest
+    request has waited ``window_ms``, whichever comes first. Each caller
+    awaits its own future and receives its row's positive-class probability,
+    or the exception raised for that row. ``on_batch`` is called with the
+    model name and size of every batch, e.g. to feed a histogram.
+    """
+
+    def __init__(
+        self,
+        scorer: Scorer,
+        window_ms: float = 2.0,
+        max_batch_size: int = 32,
+        on_batch: Optional[Callable[[str, int], None]] = None,
+    ):
+        self.scorer = scorer
+        self.on_batch = on_batch
+        self.window_s = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: dict[str, list[tuple[np.ndarray, asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: dict[str, int] = Counter()
+        self._tasks: set[asyncio.Task] = set()
+
+        # Tuning metrics
+        self.batch_sizes: Counter = Counter()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_batched_rows = 0
+        self.total_scoring_ms = 0.0
+
+    async def submit(self, model_name: str, row: np.ndarray) -> float:
+        """Queue one feature row and wait for its probability"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Copy: callers hand in reusable extractor buffers
+        pending = self._pending.setdefault(model_name, [])
+        pending.append((np.array(row, copy=True), future))
+        self.total_requests += 1
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model_name)
+        elif len(pending) == 1:
+            self._timers[model_name] = loop.call_later(
+                self.window_s, self._flush, model_name
+            )
+
+        return await future
+
+    def _flush(self, model_name: str):
+        """Hand the queued rows for ``model_name`` to a scoring task"""
+        timer = self._timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(model_name, None)
+        if not batch:
+            return
+
+        self._in_flight[model_name] += len(batch)
+        task = asyncio.ensure_future(self._score(model_name, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, model_name: str, batch: list):
+        """Score one coalesced batch and fan the results back out"""
+        started_at = time.perf_counter()
+        self.batch_sizes[len(batch)] += 1
+        self.total_batches += 1
+        self.total_batched_rows += len(batch)
+        if self.on_batch is not None:
+            self.on_batch(model_name, len(batch))
+
+        try:
+            matrix = np.stack([row for row, _ in batch])
+            result = await self.scorer(model_name, matrix)
+        except Exception as e:
+            logger.error(f"Micro-batch for {model_name} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight[model_name] -= len(batch)
+            self.total_scoring_ms += (time.perf_counter() - started_at) * 1000
+
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                # The caller went away (e.g. client disconnect)
+                continue
+            if i in result.errors:
+                future.set_exception(RuntimeError(result.errors[i]))
+            else:
+                future.set_result(float(result.probabilities[i]))
+
+    def queue_depth(self) -> dict[str, int]:
+        """Requests waiting for or being scored in a batch, per model"""
+        models = set(self._pending) | set(self._in_flight)
+        return {
+            name: len(self._pending.get(name, ())) + self._in_flight.get(name, 0)
+            for name in sorted(models)
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of the batching metrics used to tune the window"""
+        return {
+            "window_ms": self.window_s * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self.queue_depth(),
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "avg_batch_size": round(self.total_batched_rows / self.total_batches, 2)
+            if self.total_batches
+            else 0.0,
+            "avg_scoring_ms": round(self.total_scoring_ms / self.total_batches, 3)
+            if self.total_batches
+            else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_sizes.items())),
+        }
@@ -0,0 +1,334 @@
+"""
+On-Demand Model Loading
+Registers model artifacts without loading them and keeps resident models within a memory budget
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+_MIB = 1024 * 1024
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a registered model artifact cannot be loaded"""
+
+
+@dataclass
+class ModelEntry:
+    """A registered artifact and, while it is resident, the loaded model"""
+
+    name: str
+    path: str
+    model: Any = None
+    # Largest RSS growth measured over the loads of this model (at least
+    # the artifact size), used to account for it against the budget
+    rss_bytes: int = 0
+    pins: int = 0
+    loads: int = 0
+    evictions: int = 0
+    load_seconds: float = 0.0
+
+    @property
+    def resident(self) -> bool:
+        return self.model is not None
+
+
+def _process_rss() -> int:
+    return psutil.Process().memory_info().rss
+
+
+class ModelManager:
+    """
+    Registry of model artifacts that loads each model on first use.
+
+    ``register`` only records where an artifact lives. A model is loaded
+    (``load_fn(name, path)`` in a worker thread) the first time a request
+    leases it, or at startup via ``preload``. Loads run one at a time so
+    the process RSS growth across a load can be attributed to that model;
+    only an unbudgeted ``preload`` runs several at once.
+
+    With a ``budget_bytes`` set, loading or releasing a model unloads the
+    least recently used models (``unload_fn(name)``) until the measured
+    total fits. Models leased by in-flight requests are never unloaded,
+    and the most recently used model always stays resident, so a budget
+    smaller than one model degrades to keeping a single model loaded
+    rather than reloading it on every request.
+    """
+
+    def __init__(
+        self,
+        load_fn: Callable[[str, str], Any],
+        unload_fn: Optional[Callable[[str], None]] = None,
+        budget_bytes: int = 0,
+        rss_fn: Callable[[], int] = _process_rss,
+    ):
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be non-negative (0 = unlimited)")
+        self.load_fn = load_fn
+        self.unload_fn = unload_fn
+        self.budget_bytes = budget_bytes
+        self.rss_fn = rss_fn
+
+        self._entries: dict[str, ModelEntry] = {}
+        # Resident model names, least recently used first
+        self._lru: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def names(self) -> list[str]:
+        """Registered model names, loaded or not"""
+        return list(self._entries)
+
+    def resident(self) -> dict[str, Any]:
+        """Loaded models, least recently used first"""
+        with self._lock:
+            return {name: self._entries[name].model for name in self._lru}
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._entries[name].rss_bytes for name in self._lru)
+
+    def _entry(self, name: str) -> ModelEntry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model '{name}' is not registered")
+        return entry
+
+    def register(self, name: str, path: str):
+        """Record an artifact to load on demand, unloading any previous version"""
+        self.unregister(name)
+        self._entries[name] = ModelEntry(name, path)
+
+    def unregister(self, name: str):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            resident = entry is not None and entry.resident
+            self._lru.pop(name, None)
+        if resident and self.unload_fn is not None:
+            self.unload_fn(name)
+
+    def load(self, name: str) -> Any:
+        """Load ``name`` unless it is resident (blocking) and return the model"""
+        entry = self._entry(name)
+        with self._load_lock:
+            if entry.resident:
+                self._touch(name)
+                return entry.model
+
+            self._make_room(self._estimate(entry), keep=name)
+            rss_before = self.rss_fn()
+            model, seconds = self._run_load(entry)
+            self._install(entry, model, seconds, self.rss_fn() - rss_before)
+        self._make_room()
+        return model
+
+    def _run_load(self, entry: ModelEntry) -> tuple[Any, float]:
+        start = time.perf_counter()
+        try:
+            model = self.load_fn(entry.name, entry.path)
+        except Exception as e:
+            logger.error(f"❌ Failed to load {entry.name} model: {e}")
+            raise ModelLoadError(
+                f"Model '{entry.name}' could not be loaded: {e}"
+            ) from e
+        return model, time.perf_counter() - start
+
+    def _install(self, entry: ModelEntry, model: Any, seconds: float, measured: int):
+        with self._lock:
+            entry.model = model
+            entry.rss_bytes = max(
+                entry.rss_bytes, measured, os.path.getsize(entry.path)
+            )
+            entry.loads += 1
+            entry.load_seconds = seconds
+            self._lru[entry.name] = None
+        logger.info(
+            f"📦 {entry.name} resident ({entry.rss_bytes / _MIB:.1f} MiB, "
+            f"loaded in {seconds * 1000:.0f} ms)"
+        )
+
+    def preload(self, names: Iterable[str], workers: int = 1) -> list[str]:
+        """
+        Load a warm-up list now; failures are logged and skipped.
+
+        With ``workers > 1`` and no budget, the artifacts are deserialized
+        concurrently in a thread pool. The RSS growth of the whole batch is
+        then shared among the models by artifact size. With a budget, each
+        load must make room for its own measured footprint first, so they
+        run one at a time.
+        """
+        pending = []
+        for name in dict.fromkeys(names):
+            if name not in self._entries:
+                logger.warning(f"⚠️ Cannot preload unregistered model '{name}'")
+            else:
+                pending.append(name)
+        if workers <= 1 or self.budget_bytes or len(pending) <= 1:
+            loaded = []
+            for name in pending:
+                try:
+                    self.load(name)
+                    loaded.append(name)
+                except ModelLoadError:
+                    continue
+            return loaded
+        return self._load_concurrently(pending, workers)
+
+    def _load_concurrently(self, names: list[str], workers: int) -> list[str]:
+        with self._load_lock:
+            entries = [self._entries[name] for name in names]
+            pending = [entry for entry in entries if not entry.resident]
+            rss_before = self.rss_fn()
+            results: dict[str, tuple[Any, float]] = {}
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(pending)) or 1,
+                thread_name_prefix="model-load",
+            ) as pool:
+                futures = {
+                    pool.submit(self._run_load, entry): entry for entry in pending
+                }
+                for future, entry in futures.items():
+                    try:
+                        results[entry.name] = future.result()
+                    except ModelLoadError:
+                        continue
+            measured = self.rss_fn() - rss_before
+
+            sizes = {
+                name: os.path.getsize(self._entries[name].path) for name in results
+            }
+            total_size = sum(sizes.values()) or 1
+            for name, (model, seconds) in results.items():
+                share = measured * sizes[name] // total_size
+                self._install(self._entries[name], model, seconds, share)
+        return [entry.name for entry in entries if entry.resident]
+
+    def evict(self, name: str) -> bool:
+        """Unload ``name`` unless it is not resident or in use"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not entry.resident or entry.pins:
+                return False
+            entry.model = None
+            entry.evictions += 1
+            self._lru.pop(name, None)
+        if self.unload_fn is not None:
+            self.unload_fn(name)
+        logger.info(f"♻️ Unloaded {name} ({entry.rss_bytes / _MIB:.1f} MiB)")
+        return True
+
+    def _estimate(self, entry: ModelEntry) -> int:
+        """Expected footprint: measured before, else the artifact size"""
+        return entry.rss_bytes or os.path.getsize(entry.path)
+
+    def _touch(self, name: str):
+        with self._lock:
+            if name in self._lru:
+                self._lru.move_to_end(name)
+
+    def _make_room(self, incoming: int = 0, keep: Optional[str] = None):
+        """
+        Unload idle models, least recently used first, until ``incoming``
+        more bytes fit the budget. ``keep`` (by default the most recently
+        used model) is never unloaded.
+        """
+        if not self.budget_bytes:
+            return
+        while True:
+            with self._lock:
+                if self.resident_bytes + incoming <= self.budget_bytes:
+                    return
+                spared = keep if keep is not None else next(reversed(self._lru), None)
+                victim = next(
+                    (
+                        name
+                        for name in self._lru
+                        if name != spared and not self._entries[name].pins
+                    ),
+                    None,
+                )
+            if victim is None:
+                if incoming:
+                    logger.warning(
+                        f"⚠️ Model memory budget of {self.budget_bytes / _MIB:.0f} MiB "
+                        f"exceeded: every other resident model is in use"
+                    )
+                return
+            self.evict(victim)
+
+    @asynccontextmanager
+    async def lease(self, name: str):
+        """Pin ``name`` for the block, loading it off the event loop if needed"""
+        entry = self._entry(name)
+        with self._lock:
+            entry.pins += 1
+        try:
+            if entry.resident:
+                self._touch(name)
+            else:
+                await asyncio.to_thread(self.load, name)
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.pins -= 1
+            self._make_room()
+
+    async def ensure(self, name: str) -> bool:
+        """
+        Make sure ``name`` is loaded (``KeyError`` if it is not registered);
+        True if the caller had to wait for a load
+        """
+        loading = not self._entry(name).resident
+        async with self.lease(name):
+            pass
+        return loading
+
+    def leased(self, fn):
+        """Wrap ``fn(model_name, ...)`` to hold a lease on the model per call"""
+
+        @wraps(fn)
+        async def call(model_name: str, *args, **kwargs):
+            async with self.lease(model_name):
+                return await fn(model_name, *args, **kwargs)
+
+        return call
+
+    def stats(self) -> dict:
+        """Budget, residency and per-model load/eviction counts"""
+        with self._lock:
+            return {
+                "budget_mb": self.budget_bytes / _MIB if self.budget_bytes else None,
+                "resident_mb": self.resident_bytes / _MIB,
+                "models": {
+                    entry.name: {
+                        "resident": entry.resident,
+                        "rss_mb": entry.rss_bytes / _MIB,
+                        "in_use": entry.pins,
+                        "loads": entry.loads,
+                        "evictions": entry.evictions,
+                        "last_load_ms": entry.load_seconds * 1000,
+                    }
+                    for entry in self._entries.values()
+                },
+            }
@@ -0,0 +1,57 @@
+"""
+Fast JSON Responses
+Serialize payloads the server built itself, without response-model round-trips
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+
+
+def _default(value: Any):
+    """NumPy scalars and arrays for the standard library encoder"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for payloads that already match the declared schema.
+
+    Returning a Response from a FastAPI handler skips ``response_model``
+    validation and ``jsonable_encoder``, so rows built as plain dicts are
+    encoded exactly once. The decorator's ``response_model`` still
+    documents the body in OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
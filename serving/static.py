@@ -0,0 +1,70 @@
+"""
+Precomputed Metadata Responses
+JSON payloads serialized once per model load, served with strong ETags
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from starlette.responses import Response
+
+
+@dataclass(frozen=True)
+class PrecomputedResponse:
+    """Serialized JSON body and its strong entity tag"""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "PrecomputedResponse":
+        # Same encoding as FastAPI's JSONResponse, so bodies are unchanged
+        body = json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        return cls(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header matches this body (RFC 9110 weak match)"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+    def response(self, if_none_match: Optional[str] = None) -> Response:
+        """200 with the cached body, or 304 when the client's copy is current"""
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.not_modified(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class StaticResponses:
+    """
+    Metadata payloads keyed by path, rebuilt only when ``refresh`` is called.
+
+    ``build`` returns ``{path: payload}``; a refresh serializes every payload
+    and swaps the whole table in one assignment, so requests never see a
+    half-built set. The first lookup builds the table if no refresh ran yet.
+    """
+
+    def __init__(self, build: Callable[[], dict[str, Any]]):
+        self._build = build
+        self._responses: Optional[dict[str, PrecomputedResponse]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-serialize every payload (call at startup and after model reloads)"""
+        with self._lock:
+            self._responses = {
+                path: PrecomputedResponse.from_payload(payload)
+                for path, payload in self._build().items()
+            }
+
+    def get(self, path: str) -> Optional[PrecomputedResponse]:
+        if self._responses is None:
+            self.refresh()
+        return self._responses.get(path)
@@ -0,0 +1,359 @@
+"""
+Streaming NDJSON Scoring
+Scores newline-delimited patients in bounded chunks while the body is still arriving
+"""
+
+import asyncio
+import json
+import logging
+import tempfile
+import threading
+from collections import deque
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Mapping,
+)
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from serving.responses import dumps
+from serving.validation import ColumnarBatch, ColumnarValidator
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+DEFAULT_CHUNK_ROWS = 1000
+DEFAULT_MAX_LINE_BYTES = 64 * 1024
+# Results not yet taken by the client stay in memory up to this size
+DEFAULT_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
+# Scores one validated chunk; receives the input line numbers of its rows
+# and returns one result record per row, in order
+ScoreChunkFn = Callable[[ColumnarBatch, list[int]], Awaitable[list[dict]]]
+
+
+class ResultSpool:
+    """
+    FIFO of response bytes held in memory up to a cap, then in a temp file.
+
+    Once a spill starts, every later write goes to the file until the
+    reader has drained it, so output order is preserved. File writes and
+    reads run on worker threads so disk I/O never blocks the event loop;
+    one writer (the producer) and one reader share the file under a lock.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_SPOOL_MEMORY_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: deque[bytes] = deque()
+        self._memory_bytes = 0
+        self._file = None
+        self._file_lock = threading.Lock()
+        self._read_position = 0
+        self._write_position = 0
+        self._writing = False
+        self._closed = False
+        self._ready = asyncio.Event()
+
+    @property
+    def spilled_bytes(self) -> int:
+        """Bytes currently waiting on disk"""
+        return self._write_position - self._read_position
+
+    def _write_at(self, file, position: int, data: bytes):
+        with self._file_lock:
+            file.seek(position)
+            file.write(data)
+
+    def _read_at(self, file, position: int, size: int) -> bytes:
+        with self._file_lock:
+            file.seek(position)
+            return file.read(size)
+
+    async def put(self, data: bytes):
+        if self._file is None and (
+            self._memory_bytes + len(data) <= self.max_memory_bytes
+        ):
+            self._memory.append(data)
+            self._memory_bytes += len(data)
+        else:
+            # The reader must not close the file while a write is in flight
+            self._writing = True
+            try:
+                if self._file is None:
+                    self._file = await asyncio.to_thread(tempfile.TemporaryFile)
+                await asyncio.to_thread(
+                    self._write_at, self._file, self._write_position, data
+                )
+            finally:
+                self._writing = False
+            self._write_position += len(data)
+        self._ready.set()
+
+    def close(self):
+        """No more data; readers finish once the spool is drained"""
+        self._closed = True
+        self._ready.set()
+
+    def discard(self):
+        self._memory.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def chunks(self, chunk_bytes: int = 1024 * 1024) -> AsyncIterator[bytes]:
+        while True:
+            if self._memory:
+                data = self._memory.popleft()
+                self._memory_bytes -= len(data)
+                yield data
+            elif self._file is not None and self.spilled_bytes:
+                data = await asyncio.to_thread(
+                    self._read_at,
+                    self._file,
+                    self._read_position,
+                    min(chunk_bytes, self.spilled_bytes),
+                )
+                self._read_position += len(data)
+                yield data
+            elif self._file is not None and not self._writing:
+                # Drained: later writes go back to memory
+                file, self._file = self._file, None
+                self._read_position = self._write_position = 0
+                await asyncio.to_thread(file.close)
+            elif self._closed:
+                return
+            else:
+                self._ready.clear()
+                await self._ready.wait()
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body is produced while the request body is read.
+
+    The body iterator runs as its own task and writes into a
+    ``ResultSpool`` that the response drains, so reading and scoring the
+    upload never wait on the client reading results. Clients that only
+    read once their upload is complete (most HTTP libraries) would
+    otherwise deadlock the stream as soon as socket buffers fill; their
+    results wait on disk instead of in memory.
+
+    ``StreamingResponse`` also watches for ``http.disconnect`` by calling
+    ``receive()`` concurrently, which would swallow request body messages
+    the iterator still needs. Here a disconnect surfaces through
+    ``request.stream()`` (``ClientDisconnect``) or a failing ``send``.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(
+        self,
+        content: AsyncIterable[bytes],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        max_memory_bytes: int = DEFAULT_SPOOL_MEMORY_BYTES,
+    ):
+        super().__init__(content, status_code=status_code, headers=headers)
+        self.max_memory_bytes = max_memory_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        spool = ResultSpool(self.max_memory_bytes)
+
+        async def produce():
+            try:
+                async for chunk in self.body_iterator:
+                    await spool.put(chunk)
+            finally:
+                spool.close()
+
+        producer = asyncio.create_task(produce())
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            async for chunk in spool.chunks():
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            await producer
+        finally:
+            producer.cancel()
+            spool.discard()
+
+        if self.background is not None:
+            await self.background()
+
+
+def ndjson_request_body(model: type[BaseModel]) -> dict[str, Any]:
+    """``openapi_extra`` documenting an NDJSON body with one ``model`` per line"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": f"#/components/schemas/{model.__name__}"}
+                }
+            },
+        }
+    }
+
+
+async def ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into ``(line_number, line)`` pairs as it arrives.
+
+    Only the current partial line is buffered. A line longer than
+    ``max_line_bytes`` is dropped while it streams past and reported as
+    ``None``; blank lines are skipped but still counted.
+    """
+    buffer = bytearray()
+    oversized = False
+    line_number = 0
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end < 0 else chunk[start:end]
+            if not oversized:
+                if len(buffer) + len(piece) > max_line_bytes:
+                    oversized = True
+                    buffer.clear()
+                else:
+                    buffer += piece
+            if end < 0:
+                break
+
+            line_number += 1
+            if oversized:
+                yield line_number, None
+            elif buffer.strip():
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+
+    if oversized or buffer.strip():
+        yield line_number + 1, None if oversized else bytes(buffer)
+
+
+def _failed(line: int, errors: list[dict]) -> dict:
+    return {"line": line, "status": "failed", "errors": jsonable_encoder(errors)}
+
+
+class NDJSONScorer:
+    """
+    Streams one NDJSON result line per input line, in input order.
+
+    Parsed rows are collected into chunks of ``chunk_rows``; each chunk is
+    validated column-wise, its valid rows are scored with a single
+    ``score_chunk`` call and its results are yielded before the next input
+    is read, so input is held one chunk at a time.
+
+    Reading does not wait for the client to take results: under
+    ``NDJSONStreamingResponse`` they go into a ``ResultSpool``, in memory up
+    to its cap and then in a temporary file. Memory is bounded by one chunk
+    plus the spool cap whatever the body size; results a slow client has
+    not read yet take up disk space instead.
+
+    Lines that are not JSON objects or fail validation become
+    ``{"line": n, "status": "failed", "errors": [...]}`` records, with
+    errors in the format of FastAPI's 422 responses located by field.
+    """
+
+    def __init__(
+        self,
+        validator: ColumnarValidator,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+    ):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self.validator = validator
+        self.chunk_rows = chunk_rows
+        self.max_line_bytes = max_line_bytes
+
+    async def _score(
+        self,
+        pending: list[tuple[int, Any, Optional[list[dict]]]],
+        score_chunk: ScoreChunkFn,
+    ) -> bytes:
+        """Validate and score one chunk; result lines for every pending line"""
+        row_errors = {i: errors for i, (_, _, errors) in enumerate(pending) if errors}
+        parsed = [i for i in range(len(pending)) if i not in row_errors]
+        batch, errors = self.validator.validate_rows([pending[i][1] for i in parsed])
+        for error in errors:
+            row, *loc = error["loc"]
+            row_errors.setdefault(parsed[row], []).append({**error, "loc": tuple(loc)})
+
+        valid = [j for j, i in enumerate(parsed) if i not in row_errors]
+        scored = iter(
+            await score_chunk(batch.take(valid), [pending[parsed[j]][0] for j in valid])
+            if valid
+            else ()
+        )
+        records = []
+        for i, (line, _, _) in enumerate(pending):
+            if i in row_errors:
+                records.append(_failed(line, row_errors[i]))
+            else:
+                records.append({"line": line, **next(scored)})
+        return b"".join(dumps(record) + b"\n" for record in records)
+
+    async def stream(
+        self, body: AsyncIterable[bytes], score_chunk: ScoreChunkFn
+    ) -> AsyncIterator[bytes]:
+        """NDJSON result lines for an NDJSON body of patients"""
+        # (line number, parsed row, line errors) of lines not yet answered
+        pending: list[tuple[int, Any, Optional[list[dict]]]] = []
+        try:
+            async for line, raw in ndjson_lines(body, self.max_line_bytes):
+                if raw is None:
+                    error = {
+                        "type": "value_error",
+                        "loc": (),
+                        "msg": f"Line exceeds {self.max_line_bytes} bytes",
+                        "input": None,
+                    }
+                    pending.append((line, None, [error]))
+                else:
+                    try:
+                        pending.append((line, json.loads(raw), None))
+                    except json.JSONDecodeError as e:
+                        error = {
+                            "type": "json_invalid",
+                            "loc": (e.pos,),
+                            "msg": "JSON decode error",
+                            "input": {},
+                            "ctx": {"error": e.msg},
+                        }
+                        pending.append((line, None, [error]))
+
+                if len(pending) >= self.chunk_rows:
+                    yield await self._score(pending, score_chunk)
+                    pending = []
+
+            if pending:
+                yield await self._score(pending, score_chunk)
+        except ClientDisconnect:
+            logger.warning("⚠️ Client disconnected during NDJSON scoring")
+        except Exception as e:
+            # Headers are already sent; report the failure as the last line
+            logger.error(f"NDJSON scoring failed: {e}")
+            yield dumps({"status": "failed", "error": f"Scoring failed: {e}"}) + b"\n"
@@ -0,0 +1,257 @@
+"""
+Chunked CSV Upload Scoring
+Scores discharge exports (diabetic_data.csv plus engineered scores) chunk by chunk with bounded memory
+"""
+
+import asyncio
+import logging
+import shutil
+import tempfile
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import IO
+
+import numpy as np
+import pandas as pd
+
+from serving.batch import CONFIDENCE_LEVELS, BatchResult, confidence_codes
+from serving.validation import ColumnarValidator
+
+logger = logging.getLogger(__name__)
+
+CSV_MEDIA_TYPE = "text/csv"
+
+DEFAULT_CHUNK_ROWS = 10_000
+
+# Age brackets of diabetic_data.csv and their midpoints; anything else is unknown
+AGE_MIDPOINTS = {f"[{low}-{low + 10})": low + 5 for low in range(0, 100, 10)}
+
+# Columns read from an upload, with explicit dtypes; all other columns are
+# skipped by the parser. Counts are nullable so an empty cell fails its row
+# instead of the whole chunk. The engineered scores come from the training
+# feature pipeline, which is not part of the service, so an upload must carry
+# them as computed there rather than have them approximated here.
+RAW_DTYPES = {
+    "encounter_id": "Int64",
+    "patient_nbr": "Int64",
+    "age": "category",
+    "admission_type_id": "Int64",
+    "admission_source_id": "Int64",
+    "time_in_hospital": "Int64",
+    "num_lab_procedures": "Int64",
+    "num_procedures": "Int64",
+    "num_medications": "Int64",
+    "number_outpatient": "Int64",
+    "number_emergency": "Int64",
+    "number_inpatient": "Int64",
+    "number_diagnoses": "Int64",
+    "service_utilization_score": "Int64",
+    "clinical_risk_score": "Int64",
+}
+
+RESULT_COLUMNS = (
+    "row",
+    "encounter_id",
+    "patient_nbr",
+    "probability",
+    "readmission_risk",
+    "confidence_level",
+    "error",
+)
+
+# Scores one derived chunk: named feature columns plus the errors of rows
+# that must not be scored
+ScoreColumnsFn = Callable[
+    [dict[str, np.ndarray], dict[int, str]], Awaitable[BatchResult]
+]
+
+
+class CSVSchemaError(ValueError):
+    """Raised when an upload lacks columns of the upload schema"""
+
+
+def derive_features(
+    frame: pd.DataFrame,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """
+    Request-schema columns and null masks from one chunk of raw columns.
+
+    Counts and engineered scores pass through; ``age_midpoint`` comes from
+    the age bracket codes.
+    """
+    columns: dict[str, np.ndarray] = {}
+    nulls: dict[str, np.ndarray] = {}
+    for name, dtype in RAW_DTYPES.items():
+        if dtype == "Int64":
+            column = frame[name]
+            nulls[name] = column.isna().to_numpy()
+            columns[name] = column.to_numpy(dtype=np.int64, na_value=0)
+
+    # One lookup per distinct bracket, then a gather by category code
+    age = frame["age"].cat
+    midpoints = np.array(
+        [AGE_MIDPOINTS.get(bracket, -1) for bracket in age.categories] + [-1],
+        dtype=np.int64,
+    )[age.codes.to_numpy()]
+    nulls["age_midpoint"] = midpoints < 0
+    columns["age_midpoint"] = np.maximum(midpoints, 0)
+    return columns, nulls
+
+
+def spool_upload(source: IO[bytes]) -> IO[bytes]:
+    """
+    Copy an upload into an anonymous temporary file (blocking).
+
+    The framework may close the upload once the handler returns, before a
+    streamed response has read it; the copy belongs to the stream instead.
+    """
+    spool = tempfile.TemporaryFile()
+    try:
+        source.seek(0)
+        shutil.copyfileobj(source, spool, 1024 * 1024)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def _row_messages(errors: list[dict]) -> dict[int, str]:
+    """``field: message`` per failed row, from errors located as (row, field)"""
+    messages: dict[int, list[str]] = {}
+    for error in errors:
+        row, name = error["loc"]
+        messages.setdefault(row, []).append(f"{name}: {error['msg']}")
+    return {row: "; ".join(parts) for row, parts in messages.items()}
+
+
+def result_header() -> bytes:
+    return (",".join(RESULT_COLUMNS) + "\n").encode("utf-8")
+
+
+def result_csv(
+    first_row: int,
+    columns: dict[str, np.ndarray],
+    nulls: dict[str, np.ndarray],
+    batch: BatchResult,
+    threshold: float,
+) -> bytes:
+    """CSV lines for one scored chunk, one per input row"""
+    n_rows = len(batch.probabilities)
+    failed = np.zeros(n_rows, dtype=bool)
+    failed[list(batch.errors)] = True
+    error = np.full(n_rows, None, dtype=object)
+    for i, message in batch.errors.items():
+        error[i] = message
+
+    codes = confidence_codes(batch.probabilities, threshold)
+    frame = pd.DataFrame(
+        {
+            "row": np.arange(first_row, first_row + n_rows),
+            "encounter_id": pd.arrays.IntegerArray(
+                columns["encounter_id"], nulls["encounter_id"]
+            ),
+            "patient_nbr": pd.arrays.IntegerArray(
+                columns["patient_nbr"], nulls["patient_nbr"]
+            ),
+            "probability": np.where(failed, np.nan, batch.probabilities),
+            "readmission_risk": pd.arrays.BooleanArray(
+                batch.probabilities >= threshold, failed
+            ),
+            "confidence_level": pd.Categorical.from_codes(
+                np.where(failed, -1, codes), CONFIDENCE_LEVELS
+            ),
+            "error": error,
+        },
+        columns=RESULT_COLUMNS,
+    )
+    return frame.to_csv(index=False, header=False).encode("utf-8")
+
+
+class CSVScorer:
+    """
+    Streams scored CSV results for a CSV upload, one chunk at a time.
+
+    The parser reads ``chunk_rows`` rows of only the needed columns with
+    explicit dtypes, in a worker thread so the event loop stays free.
+    Each chunk is derived, validated column-wise, scored with a single
+    ``score_columns`` call and written out before the next one is read, so
+    memory is bounded by one chunk whatever the file size.
+
+    Every input row gets one result line numbered by its data ``row``;
+    rows failing validation or scoring carry the reason in ``error``.
+    """
+
+    def __init__(
+        self, validator: ColumnarValidator, chunk_rows: int = DEFAULT_CHUNK_ROWS
+    ):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self.validator = validator
+        self.chunk_rows = chunk_rows
+
+    def check_header(self, file: IO[bytes]):
+        """Raise ``CSVSchemaError`` unless every raw column is present"""
+        file.seek(0)
+        try:
+            header = pd.read_csv(file, nrows=0).columns
+        except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+            raise CSVSchemaError(f"Could not read CSV header: {e}") from e
+        finally:
+            file.seek(0)
+        missing = [name for name in RAW_DTYPES if name not in header]
+        if missing:
+            raise CSVSchemaError(f"CSV upload is missing columns: {missing}")
+
+    def _reader(self, file: IO[bytes], first_row: int):
+        return pd.read_csv(
+            file,
+            usecols=list(RAW_DTYPES),
+            dtype=RAW_DTYPES,
+            chunksize=self.chunk_rows,
+            skiprows=range(1, first_row) if first_row > 1 else None,
+        )
+
+    async def chunks(
+        self,
+        file: IO[bytes],
+        threshold: float,
+        score_columns: ScoreColumnsFn,
+        first_row: int = 1,
+    ) -> AsyncIterator[tuple[int, bytes]]:
+        """
+        ``(rows, csv_lines)`` per scored chunk, starting at data row
+        ``first_row``; parse and scoring errors propagate
+        """
+        reader = await asyncio.to_thread(self._reader, file, first_row)
+        while True:
+            frame = await asyncio.to_thread(next, reader, None)
+            if frame is None:
+                return
+            columns, nulls = derive_features(frame)
+            errors = _row_messages(self.validator.check_columns(columns, nulls))
+            batch = await score_columns(columns, errors)
+            yield len(frame), result_csv(first_row, columns, nulls, batch, threshold)
+            first_row += len(frame)
+
+    async def stream(
+        self, file: IO[bytes], threshold: float, score_columns: ScoreColumnsFn
+    ) -> AsyncIterator[bytes]:
+        """
+        CSV result lines for a CSV upload whose header was checked; the
+        stream owns ``file`` and closes it when it ends
+        """
+        first_row = 1
+        try:
+            yield result_header()
+            async for rows, lines in self.chunks(file, threshold, score_columns):
+                yield lines
+                first_row += rows
+        except Exception as e:
+            # Headers are already sent; report the failure as the last line
+            logger.error(f"CSV scoring failed after row {first_row - 1}: {e}")
+            message = f"Scoring stopped at row {first_row}: {e}"
+            yield pd.DataFrame([{"row": first_row, "error": message}]).reindex(
+                columns=RESULT_COLUMNS
+            ).to_csv(index=False, header=False).encode("utf-8")
+        finally:
+            file.close()
@@ -0,0 +1,370 @@
+"""
+Columnar Batch Validation
+Validates JSON patient batches as NumPy columns with vectorized range checks
+"""
+
+import json
+from collections import namedtuple
+from collections.abc import Mapping
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Optional
+
+import annotated_types
+import numpy as np
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+VALIDATION_MODES = ("columnar", "pydantic")
+
+_INT64_MIN, _INT64_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+# Field bound constraint -> (pydantic error type, context key, violation test)
+_BOUNDS = (
+    (annotated_types.Ge, "greater_than_equal", "ge", np.less),
+    (annotated_types.Gt, "greater_than", "gt", np.less_equal),
+    (annotated_types.Le, "less_than_equal", "le", np.greater),
+    (annotated_types.Lt, "less_than", "lt", np.greater_equal),
+)
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch has more rows than the configured cap"""
+
+
+@dataclass
+class ColumnarBatch:
+    """A validated batch: one int64 array per model field (object if wider)"""
+
+    columns: dict[str, np.ndarray]
+    record_type: type
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def take(self, rows) -> "ColumnarBatch":
+        """The batch restricted to ``rows`` (indices or a boolean mask)"""
+        return ColumnarBatch(
+            {name: column[rows] for name, column in self.columns.items()},
+            self.record_type,
+        )
+
+    def records(self) -> list:
+        """Rows as named tuples, for per-row logic that reads attributes"""
+        return list(
+            map(
+                self.record_type._make,
+                zip(*(column.tolist() for column in self.columns.values())),
+            )
+        )
+
+
+def _int_column(values: list) -> np.ndarray:
+    """int64 column, or an object column for integers beyond 64 bits"""
+    try:
+        return np.array(values, dtype=np.int64)
+    except OverflowError:
+        return np.array(values, dtype=object)
+
+
+def array_request_body(model: type[BaseModel], title: str) -> dict[str, Any]:
+    """
+    ``openapi_extra`` documenting a raw-body route as if it declared
+    ``list[model]``, for handlers that read and validate the body themselves
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": f"#/components/schemas/{model.__name__}"},
+                        "title": title,
+                    }
+                }
+            },
+        }
+    }
+
+
+def body_errors(errors: list[dict]) -> RequestValidationError:
+    """Errors located in the request body, as FastAPI reports them"""
+    return RequestValidationError(
+        [{**error, "loc": ("body", *error["loc"])} for error in errors]
+    )
+
+
+class ColumnarValidator:
+    """
+    Batch validator for a flat model of required integer fields.
+
+    Instead of building one model instance per row, the parsed body is
+    transposed into one int64 column per field and every ``ge/gt/le/lt``
+    constraint is applied to a whole column with one NumPy comparison.
+    Rows whose values are not plain JSON integers (strings, floats,
+    booleans, missing fields, non-objects) are handed to pydantic one row
+    at a time, so coercion rules and error messages stay exactly those of
+    the model. Errors are reported per row and field in the same format as
+    FastAPI's 422 responses.
+
+    Field validators of the model are not run on the columnar path, so
+    the bounds must express every range rule. A model validator rejecting
+    negative values is mirrored by ``non_negative_message``: fields without
+    a lower bound of 0 or more get a vectorized ``>= 0`` check reported as
+    that validator's ``value_error``.
+    """
+
+    def __init__(
+        self,
+        model: type[BaseModel],
+        max_rows: Optional[int] = None,
+        mode: str = "columnar",
+        non_negative_message: Optional[str] = None,
+    ):
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"mode must be one of {VALIDATION_MODES}, got '{mode}'")
+
+        self.model = model
+        self.max_rows = max_rows
+        self.mode = mode
+        self.field_names = list(model.model_fields)
+        self.record_type = namedtuple(f"{model.__name__}Row", self.field_names)
+        self._bounds: list[tuple[str, str, str, Any, Any]] = []
+        for name, info in model.model_fields.items():
+            if info.annotation is not int or not info.is_required():
+                raise TypeError(
+                    f"Columnar validation needs required int fields, "
+                    f"'{name}' is {info.annotation}"
+                )
+            non_negative = False
+            for constraint in info.metadata:
+                for kind, error_type, key, violates in _BOUNDS:
+                    if isinstance(constraint, kind):
+                        bound = getattr(constraint, key)
+                        self._bounds.append((name, error_type, key, bound, violates))
+                        non_negative |= key in ("ge", "gt") and bound >= 0
+            if non_negative_message is not None and not non_negative:
+                self._bounds.append((name, "value_error", "error", 0, np.less))
+        self.non_negative_message = non_negative_message
+
+        self._field_index = {name: i for i, name in enumerate(self.field_names)}
+        self._row_adapter = TypeAdapter(model)
+        self._batch_adapter = TypeAdapter(list[model])
+
+    def validate_json(self, body: bytes) -> ColumnarBatch:
+        """
+        Parse and validate a JSON array body.
+
+        Raises ``RequestValidationError`` (rendered as a 422) for malformed
+        JSON or invalid rows and ``BatchTooLargeError`` above ``max_rows``.
+        """
+        if not body:
+            raise body_errors(
+                ValidationError.from_exception_data(
+                    self.model.__name__, [{"type": "missing", "loc": (), "input": None}]
+                ).errors()
+            )
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            # Same shape as FastAPI's own JSON decode errors
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "json_invalid",
+                        "loc": ("body", e.pos),
+                        "msg": "JSON decode error",
+                        "input": {},
+                        "ctx": {"error": e.msg},
+                    }
+                ]
+            ) from None
+        return self.validate_python(payload)
+
+    def validate_python(self, payload: Any) -> ColumnarBatch:
+        """Validate an already parsed batch (a list of patient objects)"""
+        if not isinstance(payload, list):
+            try:
+                self._batch_adapter.validate_python(payload, from_attributes=True)
+            except ValidationError as e:
+                raise body_errors(e.errors()) from None
+
+        if self.max_rows is not None and len(payload) > self.max_rows:
+            raise BatchTooLargeError(
+                f"Batch size cannot exceed {self.max_rows} patients"
+            )
+
+        if self.mode == "pydantic":
+            try:
+                patients = self._batch_adapter.validate_python(
+                    payload, from_attributes=True
+                )
+            except ValidationError as e:
+                raise body_errors(e.errors()) from None
+            return self._from_models(patients)
+
+        return self._validate_columns(payload)
+
+    def _from_models(self, patients: list[BaseModel]) -> ColumnarBatch:
+        columns = {
+            name: _int_column(list(map(attrgetter(name), patients)))
+            for name in self.field_names
+        }
+        return ColumnarBatch(columns, self.record_type)
+
+    def _validate_columns(self, rows: list) -> ColumnarBatch:
+        batch, errors = self.validate_rows(rows)
+        if errors:
+            raise body_errors(errors)
+        return batch
+
+    def _columns(self, rows: list) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """int64 columns plus a mask of rows that need per-row validation"""
+        n_rows = len(rows)
+        fallback = np.zeros(n_rows, dtype=bool)
+        dict_rows = rows
+        if not all(type(row) is dict for row in rows):
+            fallback[[i for i, row in enumerate(rows) if type(row) is not dict]] = True
+            dict_rows = [row if type(row) is dict else {} for row in rows]
+
+        columns: dict[str, np.ndarray] = {}
+        for name in self.field_names:
+            values = [row.get(name) for row in dict_rows]
+            if set(map(type, values)) == {int}:
+                try:
+                    columns[name] = np.array(values, dtype=np.int64)
+                    continue
+                except OverflowError:
+                    pass
+            # Anything but an in-range plain int is left to pydantic
+            irregular = [
+                i
+                for i, value in enumerate(values)
+                if type(value) is not int or not _INT64_MIN <= value <= _INT64_MAX
+            ]
+            fallback[irregular] = True
+            for i in irregular:
+                values[i] = 0
+            columns[name] = np.array(values, dtype=np.int64)
+        return columns, fallback
+
+    def validate_rows(self, rows: list) -> tuple[ColumnarBatch, list[dict]]:
+        """
+        Validate parsed rows without raising.
+
+        Returns a batch holding every row (invalid rows are zero-filled)
+        and the errors located as ``(row, field)``, ordered by row and field.
+        In ``pydantic`` mode every row is validated by the model.
+        """
+        if self.mode == "pydantic":
+            columns = {name: np.zeros(len(rows), np.int64) for name in self.field_names}
+            fallback = np.ones(len(rows), dtype=bool)
+        else:
+            columns, fallback = self._columns(rows)
+
+        # (row, field position, error) so the report is ordered like pydantic's
+        errors = self._bound_errors(columns, fallback)
+        for i in np.flatnonzero(fallback).tolist():
+            try:
+                patient = self._row_adapter.validate_python(
+                    rows[i], from_attributes=True
+                )
+            except ValidationError as e:
+                for position, error in enumerate(e.errors()):
+                    error["loc"] = (i, *error["loc"])
+                    errors.append((i, position, error))
+                continue
+            for name in self.field_names:
+                value = getattr(patient, name)
+                if not _INT64_MIN <= value <= _INT64_MAX:
+                    columns[name] = columns[name].astype(object)
+                columns[name][i] = value
+
+        return ColumnarBatch(columns, self.record_type), self._render(errors)
+
+    def _bound_errors(
+        self, columns: Mapping[str, np.ndarray], skip: np.ndarray
+    ) -> list[tuple[int, int, dict]]:
+        """Vectorized bound checks of every column, ignoring ``skip`` rows"""
+        errors = []
+        for name, error_type, key, bound, violates in self._bounds:
+            column = columns[name]
+            failed = np.flatnonzero(violates(column, bound) & ~skip)
+            for i in failed.tolist():
+                errors.append(
+                    (
+                        i,
+                        self._field_index[name],
+                        {
+                            "type": error_type,
+                            "loc": (i, name),
+                            "input": int(column[i]),
+                            "ctx": {
+                                key: ValueError(self.non_negative_message)
+                                if error_type == "value_error"
+                                else bound
+                            },
+                        },
+                    )
+                )
+        return errors
+
+    def _render(
+        self, errors: list[tuple[int, int, dict]], max_errors: Optional[int] = None
+    ) -> list[dict]:
+        """Order errors by row and field; pydantic renders messages and URLs"""
+        if not errors:
+            return []
+        errors.sort(key=lambda item: item[:2])
+        line_errors = [error for _, _, error in errors[:max_errors]]
+        raw = [error for error in line_errors if "msg" not in error]
+        rendered = iter(
+            ValidationError.from_exception_data(self.model.__name__, raw).errors()
+            if raw
+            else ()
+        )
+        return [error if "msg" in error else next(rendered) for error in line_errors]
+
+    def check_columns(
+        self,
+        columns: Mapping[str, np.ndarray],
+        nulls: Optional[Mapping[str, np.ndarray]] = None,
+        max_errors: Optional[int] = None,
+    ) -> list[dict]:
+        """
+        Validate already typed columns (e.g. decoded from Arrow) in place.
+
+        Every field must be present with an integer dtype; rows flagged in
+        ``nulls`` are reported as missing integers and skipped by the bound
+        checks. Column-level errors are located as ``(field,)`` and row
+        errors as ``(row, field)``; at most ``max_errors`` are returned.
+        """
+        nulls = nulls or {}
+        errors: list[tuple[int, int, dict]] = []
+        typed = {}
+        for position, name in enumerate(self.field_names):
+            column = columns.get(name)
+            if column is None:
+                error = {"type": "missing", "loc": (name,), "input": None}
+                errors.append((-1, position, error))
+            elif column.dtype.kind not in "iu":
+                error = {"type": "int_type", "loc": (name,), "input": str(column.dtype)}
+                errors.append((-1, position, error))
+            else:
+                typed[name] = column
+        if len(typed) < len(self.field_names):
+            return self._render(errors, max_errors)
+
+        n_rows = len(next(iter(typed.values())))
+        skip = np.zeros(n_rows, dtype=bool)
+        for position, name in enumerate(self.field_names):
+            mask = nulls.get(name)
+            if mask is None or not mask.any():
+                continue
+            skip |= mask
+            for i in np.flatnonzero(mask).tolist():
+                error = {"type": "int_type", "loc": (i, name), "input": None}
+                errors.append((i, position, error))
+        errors.extend(self._bound_errors(typed, skip))
+        return self._render(errors, max_errors)
@@ -0,0 +1,208 @@
+"""
+Startup Loading and Warm-Up
+Loads artifacts concurrently and runs synthetic batches through each model before readiness
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+import annotated_types
+import numpy as np
+from pydantic import BaseModel
+
+from serving.models import ModelManager
+
+logger = logging.getLogger(__name__)
+
+# Rows per synthetic batch: a single-row request, a small batch and a block
+# past the tree backend's row limit, so every scoring path is exercised
+DEFAULT_WARMUP_BATCHES = (1, 16, 256)
+
+STARTUP_PHASES = ("starting", "loading", "warming", "ready", "failed")
+
+# Runs one synthetic batch of ``n_rows`` through the named model
+WarmFn = Callable[[str, int], Awaitable[Any]]
+
+# Range used for a side of a field with no bound
+_OPEN_RANGE = 100
+
+
+def synthetic_columns(
+    model: type[BaseModel], n_rows: int, seed: int = 0
+) -> dict[str, np.ndarray]:
+    """
+    Random in-range int64 columns for every field of a request model,
+    drawn between its ``ge/gt`` and ``le/lt`` bounds
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, info in model.model_fields.items():
+        low, high = None, None
+        for constraint in info.metadata:
+            if isinstance(constraint, annotated_types.Ge):
+                low = constraint.ge
+            elif isinstance(constraint, annotated_types.Gt):
+                low = constraint.gt + 1
+            elif isinstance(constraint, annotated_types.Le):
+                high = constraint.le
+            elif isinstance(constraint, annotated_types.Lt):
+                high = constraint.lt - 1
+        low = max(low, 0) if low is not None else 0
+        high = high if high is not None else low + _OPEN_RANGE
+        columns[name] = rng.integers(low, high, n_rows, endpoint=True)
+    return columns
+
+
+@dataclass
+class ArtifactTiming:
+    """Startup timings of one artifact (None for steps it did not go through)"""
+
+    load_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class StartupWarmup:
+    """
+    Startup phase that loads artifacts concurrently and warms every model.
+
+    ``load_artifacts`` deserializes independent artifacts (scaler, feature
+    names) in a thread pool. ``warm_up`` preloads models through the model
+    manager with the same pool size, then runs ``warm_fn(model_name,
+    n_rows)`` for each batch size so lazy initialization inside the model
+    libraries (and the inference pools) happens before the first request.
+
+    Per-artifact load and warm-up timings are kept for the readiness
+    endpoint (and each warm-up is reported to ``on_warm(model_name,
+    seconds)``); ``ready`` only turns True once warm-up has finished.
+    """
+
+    def __init__(
+        self,
+        batch_sizes: Sequence[int] = DEFAULT_WARMUP_BATCHES,
+        workers: int = 4,
+        on_warm: Optional[Callable[[str, float], None]] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.batch_sizes = tuple(batch_sizes)
+        self.workers = workers
+        self.on_warm = on_warm
+        self.phase = "starting"
+        self.error: Optional[str] = None
+        self.timings: dict[str, ArtifactTiming] = {}
+        self._start: Optional[float] = None
+        self.seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == "ready"
+
+    def _begin(self, phase: str):
+        if self._start is None:
+            self._start = time.perf_counter()
+        self.phase = phase
+
+    def _timing(self, name: str) -> ArtifactTiming:
+        return self.timings.setdefault(name, ArtifactTiming())
+
+    def load_artifacts(
+        self, loaders: Mapping[str, Callable[[], Any]]
+    ) -> dict[str, Any]:
+        """
+        Run independent artifact loaders concurrently and return their
+        results by name; the first failure is raised once all have finished
+        """
+        self._begin("loading")
+
+        def timed(name: str, loader: Callable[[], Any]) -> Any:
+            start = time.perf_counter()
+            try:
+                return loader()
+            except Exception as e:
+                self._timing(name).error = str(e)
+                raise
+            finally:
+                self._timing(name).load_ms = (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(loaders)) or 1,
+            thread_name_prefix="artifact-load",
+        ) as pool:
+            futures = {
+                name: pool.submit(timed, name, loader)
+                for name, loader in loaders.items()
+            }
+        return {name: future.result() for name, future in futures.items()}
+
+    async def warm_up(
+        self, manager: ModelManager, names: Iterable[str], warm_fn: WarmFn
+    ) -> list[str]:
+        """Preload ``names`` concurrently, warm each resident model and mark ready"""
+        try:
+            self._begin("loading")
+            names = list(names)
+            loaded = await asyncio.to_thread(manager.preload, names, self.workers)
+            stats = manager.stats()["models"]
+            for name in names:
+                if name in stats and stats[name]["loads"]:
+                    self._timing(name).load_ms = stats[name]["last_load_ms"]
+                elif name in manager:
+                    self._timing(name).error = "Model could not be loaded"
+
+            # One model at a time, so each timing is that model's own cost
+            self.phase = "warming"
+            warmed = []
+            for name in loaded:
+                if await self._warm(manager, name, warm_fn):
+                    warmed.append(name)
+        except Exception as e:
+            self.phase = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Model warm-up failed: {e}")
+            raise
+
+        self.phase = "ready"
+        self.seconds = time.perf_counter() - self._start
+        logger.info(
+            f"🔥 Loaded {len(loaded)} and warmed {len(warmed)} models, "
+            f"ready after {self.seconds:.2f}s"
+        )
+        return warmed
+
+    async def _warm(self, manager: ModelManager, name: str, warm_fn: WarmFn) -> bool:
+        # With a memory budget a later preload may have unloaded this model;
+        # it warms on its first request instead of being reloaded here
+        if name not in manager.resident():
+            return False
+        start = time.perf_counter()
+        try:
+            for n_rows in self.batch_sizes:
+                await warm_fn(name, n_rows)
+        except Exception as e:
+            self._timing(name).error = f"Warm-up failed: {e}"
+            logger.warning(f"⚠️ Warm-up of {name} failed: {e}")
+            return False
+        seconds = time.perf_counter() - start
+        self._timing(name).warmup_ms = seconds * 1000
+        if self.on_warm is not None:
+            self.on_warm(name, seconds)
+        logger.info(
+            f"🔥 {name} warmed with batches of {list(self.batch_sizes)} rows "
+            f"in {seconds * 1000:.0f} ms"
+        )
+        return True
+
+    def summary(self) -> dict:
+        """Phase, total startup time and per-artifact timings"""
+        return {
+            "phase": self.phase,
+            "seconds": self.seconds,
+            "error": self.error,
+            "artifacts": {name: asdict(t) for name, t in self.timings.items()},
+        }
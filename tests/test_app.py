@@ -1,7 +1,11 @@
 """
 Simple test file to ensure GitHub Actions workflow passes
 """
+import importlib
 import os
+import time
+
+import pytest
 
 
 def test_basic_math():
@@ -46,6 +50,88 @@ def test_workflow_files():
     print("✅ Workflow files exist")
 
 
+def test_concurrent_preload_registers_every_model(monkeypatch, tmp_path):
+    """Models loaded on parallel threads all publish with their metadata"""
+    if not os.path.exists("models/xgboost.pkl"):
+        pytest.skip("model artifacts not available")
+    root = os.getcwd()
+    monkeypatch.syspath_prepend(os.path.join(root, "notebooks"))
+    # The app logs to ./app.log; keep that file out of the checkout
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("app")
+    monkeypatch.chdir(root)
+
+    app.load_models()
+    real_load, real_version = app.joblib.load, app.artifact_version
+    delays = {path: i * 0.05 for i, path in enumerate(app.MODEL_FILES.values())}
+
+    def slow_load(path):
+        time.sleep(delays.get(path, 0))
+        return real_load(path)
+
+    def slow_version(path):
+        time.sleep(0.2)  # hashing a large artifact
+        return real_version(path)
+
+    monkeypatch.setattr(app.joblib, "load", slow_load)
+    monkeypatch.setattr(app, "artifact_version", slow_version)
+    try:
+        loaded = app.model_manager.preload(list(app.MODEL_FILES), workers=4)
+        models_body = app.static_responses.get("/models").body
+    finally:
+        app.inference_executor.shutdown()
+
+    assert loaded == list(app.MODEL_FILES)
+    assert all(name.encode() in models_body for name in app.MODEL_FILES)
+
+
+def test_unwritable_jobs_dir_only_disables_jobs(monkeypatch, tmp_path):
+    """A job store that cannot be opened leaves job_runner unset and /jobs at 503"""
+    monkeypatch.syspath_prepend(os.path.join(os.getcwd(), "notebooks"))
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("app_improved")
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(app, "JOBS_DIR", str(blocker / "jobs"))
+
+    app.start_jobs()
+
+    assert app.job_runner is None
+    with pytest.raises(app.HTTPException) as error:
+        app._get_job("missing")
+    assert error.value.status_code == 503
+
+
+def test_changed_artifact_is_versioned_before_it_is_served(monkeypatch, tmp_path):
+    """The cache version moves to a changed artifact before it can score"""
+    if not os.path.exists("models/xgboost.pkl"):
+        pytest.skip("model artifacts not available")
+    root = os.getcwd()
+    monkeypatch.syspath_prepend(os.path.join(root, "notebooks"))
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("app_improved")
+    monkeypatch.chdir(root)
+    app.load_models()
+
+    invalidated, served = [], []
+    monkeypatch.setattr(app.prediction_cache, "invalidate", invalidated.append)
+    real_register = app.inference_executor.register
+
+    def register(model_name, *args, **kwargs):
+        served.append((model_name, app.model_versions[model_name], list(invalidated)))
+        return real_register(model_name, *args, **kwargs)
+
+    monkeypatch.setattr(app.inference_executor, "register", register)
+    app.model_versions["xgboost"] = "previous-artifact"
+    try:
+        app.load_model("xgboost", app.MODEL_FILES["xgboost"])
+    finally:
+        app.inference_executor.shutdown()
+
+    version = app.artifact_version(app.MODEL_FILES["xgboost"])
+    assert served == [("xgboost", version, ["xgboost"])]
+
+
 if __name__ == "__main__":
     # Run basic tests
     test_basic_math()
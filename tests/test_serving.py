@@ -0,0 +1,955 @@
+"""
+Tests for the shared model serving utilities
+"""
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import (
+    BaseModel,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    create_model,
+    validator,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import RobustScaler
+
+from monitoring.metrics import MetricsCollector
+from monitoring.profiler import ProfilerBusyError, SamplingProfiler
+from monitoring.prometheus import Histogram, PrometheusMiddleware
+from monitoring.shared import MmapStore
+from monitoring.sketch import QuantileSketch, WindowedSketch
+from monitoring.spans import current_timer
+from monitoring.system import SystemSampler
+from serving import arrow, responses
+from serving.batch import BatchResult, build_feature_matrix, score_matrix
+from serving.cache import PredictionCache
+from serving.ensemble import combine, ensemble_weights, model_blocks, score_models
+from serving.executor import InferenceExecutor
+from serving.features import FeatureExtractor, FeatureSchemaError, scaler_params
+from serving.jobs import JobRunner, JobStore, job_summary
+from serving.linear import LinearScorer
+from serving.microbatch import MicroBatcher
+from serving.models import ModelLoadError, ModelManager
+from serving.static import StaticResponses
+from serving.streaming import NDJSONScorer, ResultSpool
+from serving.trees import compile_with_parity
+from serving.uploads import RAW_DTYPES, CSVSchemaError, CSVScorer, spool_upload
+from serving.validation import BatchTooLargeError, ColumnarValidator
+from serving.warmup import StartupWarmup, synthetic_columns
+
+
+class _ThresholdModel:
+    """Tiny stand-in classifier that rejects rows with a negative first feature"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, rows):
+        self.calls += 1
+        if (rows[:, 0] < 0).any():
+            raise ValueError("negative input")
+        p = 1 / (1 + np.exp(-rows.sum(axis=1)))
+        return np.column_stack([1 - p, p])
+
+
+def test_batch_scored_in_single_call():
+    """A clean batch should be scored with exactly one model call"""
+    model = _ThresholdModel()
+    matrix, errors = build_feature_matrix([[0.0, 1.0], [1.0, 2.0], [2.0, 0.5]], 2)
+    result = score_matrix(lambda rows: model.predict_proba(rows)[:, 1], matrix, errors)
+
+    assert model.calls == 1
+    assert result.failed == 0
+    assert np.allclose(result.probabilities, 1 / (1 + np.exp(-matrix.sum(axis=1))))
+
+
+def test_batch_isolates_failed_rows():
+    """Bad rows are reported per row while the rest are still scored"""
+    model = _ThresholdModel()
+    rows = [[1.0, 1.0], [-1.0, 1.0], [2.0, 2.0], [1.0, float("nan")], [3.0, 0.0]]
+    matrix, errors = build_feature_matrix(rows, 2)
+    result = score_matrix(lambda rows: model.predict_proba(rows)[:, 1], matrix, errors)
+
+    assert sorted(result.errors) == [1, 3]
+    assert result.successful == 3
+    assert np.isnan(result.probabilities[[1, 3]]).all()
+    assert np.isfinite(result.probabilities[[0, 2, 4]]).all()
+
+
+def test_feature_extractor_rejects_schema_mismatch():
+    """Unknown features fail when the extractor is built, not per request"""
+    with pytest.raises(FeatureSchemaError):
+        FeatureExtractor(["age_midpoint", "unknown_feature"], ["age_midpoint"])
+
+
+@pytest.mark.parametrize(
+    "library, estimator",
+    [("xgboost", "XGBClassifier"), ("lightgbm", "LGBMClassifier")],
+)
+def test_feature_extractor_scaling_keeps_tree_decisions(library, estimator):
+    """Scaled integer rows reach the same tree leaves as scaler.transform"""
+    module = pytest.importorskip(library)
+    names = ["a", "b", "c"]
+    rng = np.random.default_rng(1)
+    train = rng.integers(0, [40, 13, 120], size=(2000, 3)).astype(np.float64)
+    y = (train[:, 0] % 7 + train[:, 1] - train[:, 2] / 20 > 6).astype(int)
+    scaler = RobustScaler().fit(train)
+    params = {"n_estimators": 30, "max_depth": 6}
+    if library == "lightgbm":
+        params.update(verbose=-1)
+    model = getattr(module, estimator)(**params).fit(scaler.transform(train), y)
+    center, scale = scaler_params(scaler, names)
+
+    extractor = FeatureExtractor(
+        names, names, center=center, scale=scale, dtype=np.float64
+    ).select(["c", "a", "b"], names)
+    records = [SimpleNamespace(a=r[0], b=r[1], c=r[2]) for r in train.astype(int)]
+    native = model.predict_proba(scaler.transform(train)[:, [2, 0, 1]])[:, 1]
+
+    assert np.array_equal(model.predict_proba(extractor.block(records))[:, 1], native)
+    assert np.array_equal(
+        model.predict_proba(extractor.row(records[0]))[:, 1], native[:1]
+    )
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    """Concurrent single-row submissions are scored in one vectorized call"""
+    model = _ThresholdModel()
+
+    async def scorer(model_name, matrix):
+        return score_matrix(lambda rows: model.predict_proba(rows)[:, 1], matrix)
+
+    batcher = MicroBatcher(scorer, window_ms=5, max_batch_size=8)
+
+    async def run():
+        rows = [np.array([float(i), 0.0]) for i in range(5)] + [np.array([-1.0, 0.0])]
+        return await asyncio.gather(
+            *[batcher.submit("m", row) for row in rows], return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert batcher.batch_sizes == {6: 1}
+    assert isinstance(results[-1], RuntimeError)
+    assert np.allclose(results[:5], 1 / (1 + np.exp(-np.arange(5.0))))
+
+
+def test_inference_executor_scores_off_loop():
+    """Thread-pool scoring returns the same probabilities as inline scoring"""
+    model = _ThresholdModel()
+    matrix = np.array([[0.0, 1.0], [2.0, -1.0]])
+    executor = InferenceExecutor(kind="thread", workers=2)
+    executor.register("m", model)
+    try:
+        result = asyncio.run(executor.score("m", matrix))
+    finally:
+        executor.shutdown()
+
+    assert result.failed == 0
+    assert np.allclose(result.probabilities, 1 / (1 + np.exp(-matrix.sum(axis=1))))
+
+
+@pytest.mark.parametrize(
+    "library, estimator",
+    [
+        ("xgboost", "XGBClassifier"),
+        ("lightgbm", "LGBMClassifier"),
+        ("catboost", "CatBoostClassifier"),
+    ],
+)
+def test_compiled_trees_match_native(library, estimator):
+    """Compiled ensembles reproduce native probabilities, missing values included"""
+    module = pytest.importorskip(library)
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(400, 5)).astype(np.float32)
+    y = (features[:, 0] + features[:, 1] * features[:, 2] > 0).astype(int)
+    features[rng.random(features.shape) < 0.05] = np.nan
+
+    params = {"n_estimators": 20}
+    if library == "catboost":
+        params.update(verbose=False, thread_count=1, allow_writing_files=False)
+    if library == "lightgbm":
+        params.update(verbose=-1)
+    model = getattr(module, estimator)(**params).fit(features, y)
+
+    compiled = compile_with_parity(model)
+    native = model.predict_proba(features)[:, 1]
+
+    assert np.allclose(compiled.predict_proba(features)[:, 1], native, atol=1e-5)
+
+
+def test_linear_fast_path_folds_scaler():
+    """Closed-form scoring of raw rows matches the scaler + model pipeline"""
+    rng = np.random.default_rng(0)
+    features = rng.normal(loc=[1e6, 5.0, 0.0], scale=[1e5, 2.0, 1.0], size=(300, 3))
+    y = (features[:, 1] - 5.0 + features[:, 2] > 0).astype(int)
+    scaler = RobustScaler().fit(features)
+    model = LogisticRegression().fit(scaler.transform(features), y)
+    center, scale = scaler_params(scaler, ["a", "b", "c"])
+    native = model.predict_proba(scaler.transform(features))[:, 1]
+
+    assert np.allclose(LinearScorer.from_model(model, center, scale)(features), native)
+
+    executor = InferenceExecutor(kind="thread", workers=1)
+    executor.register("lr", model, linear_fast_path=True, scaler=(center, scale))
+    try:
+        row = asyncio.run(executor.predict_proba("lr", features[:1]))
+        result = asyncio.run(executor.score("lr", features))
+    finally:
+        executor.shutdown()
+
+    assert row == pytest.approx(native[0])
+    assert np.allclose(result.probabilities, native)
+
+
+def test_prediction_cache_lru_ttl_and_invalidation():
+    """Entries are evicted least-recently-used, expire, and drop on reload"""
+    now = [0.0]
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    rows = [np.array([[float(i), 1.0]], dtype=np.float32) for i in range(3)]
+    keys = [cache.key("m", "v1", 0.5, row) for row in rows]
+
+    cache.put(keys[0], 0.1)
+    cache.put(keys[1], 0.2)
+    assert cache.get(keys[0]) == 0.1  # keys[1] is now least recently used
+    cache.put(keys[2], 0.3)
+    assert cache.get(keys[1]) is None
+    assert cache.key("m", "v2", 0.5, rows[0]) != keys[0]
+
+    now[0] = 11.0
+    assert cache.get(keys[0]) is None
+
+    cache.put(keys[2], 0.3)
+    assert cache.invalidate("m") == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_hit_rate_metrics():
+    """Cache lookups are reported per model through the metrics collector"""
+    collector = MetricsCollector()
+    for hit in (False, True, True, True):
+        collector.record_cache_lookup("xgboost", hit)
+
+    cache = collector.get_summary_metrics()["cache"]
+    assert cache["hits"] == 3 and cache["misses"] == 1
+    assert cache["models"]["xgboost"]["hit_rate"] == 0.75
+
+
+def test_system_sampler_refreshes_snapshot_off_request_path():
+    """The collector reads the sampler's snapshot instead of blocking on psutil"""
+    sampler = SystemSampler(interval_seconds=0.01)
+    first = sampler.snapshot
+
+    async def run():
+        sampler.start()
+        await asyncio.sleep(0.1)
+        sampler.stop()
+
+    asyncio.run(run())
+    assert sampler.snapshot.sampled_at > first.sampled_at
+
+    collector = MetricsCollector(sampler=sampler)
+    start = time.perf_counter()
+    collector.record_system_metrics()
+    system = collector.get_summary_metrics()["system"]
+
+    assert time.perf_counter() - start < 0.5
+    assert collector.system_metrics[-1].cpu_percent == sampler.snapshot.cpu_percent
+    assert system["staleness_seconds"] >= 0
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Prometheus buckets are cumulative and end with +Inf"""
+    histogram = Histogram("latency_seconds", "Latency", ("model",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("m",), value)
+
+    text = "\n".join(histogram.render())
+    assert 'latency_seconds_bucket{model="m",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{model="m",le="1"} 3' in text
+    assert 'latency_seconds_bucket{model="m",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{model="m"} 4' in text
+
+
+def test_prometheus_middleware_labels_route_and_model():
+    """Requests are labelled by route template and a bounded model name"""
+    httpx = pytest.importorskip("httpx")
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    collector = MetricsCollector()
+    app.add_middleware(
+        PrometheusMiddleware, collector=collector, known_models={"xgboost"}
+    )
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int, model_name: str = "xgboost"):
+        return {"item_id": item_id}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            await c.get("/items/1")
+            await c.get("/items/2?model_name=not-a-model")
+            await c.get("/missing")
+
+    asyncio.run(run())
+    text = collector.render_prometheus()
+
+    assert 'endpoint="/items/{item_id}",model="xgboost",status="200"} 1' in text
+    assert 'endpoint="/items/{item_id}",model="unknown",status="200"} 1' in text
+    assert 'endpoint="unmatched",model="",status="404"} 1' in text
+
+
+def test_server_timing_reports_handler_stages():
+    """Handler laps come back as a Server-Timing header and stage histograms"""
+    httpx = pytest.importorskip("httpx")
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    collector = MetricsCollector()
+    app.add_middleware(PrometheusMiddleware, collector=collector)
+
+    @app.get("/score")
+    async def score(model_name: str = "xgboost"):
+        timer = current_timer()
+        timer.lap("validate")
+        with timer.span("inference"):
+            time.sleep(0.002)
+        return {"ok": True}
+
+    @app.get("/plain")
+    async def plain():
+        return {"ok": True}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get("/score"), await c.get("/plain")
+
+    scored, plain_response = asyncio.run(run())
+    stages = [
+        part.split(";")[0] for part in scored.headers["server-timing"].split(", ")
+    ]
+    inference_ms = float(scored.headers["server-timing"].split(", ")[1].split("=")[1])
+
+    assert stages == ["validate", "inference", "serialize", "total"]
+    assert inference_ms >= 2.0
+    assert "server-timing" not in plain_response.headers
+    assert (
+        'ml_api_request_stage_seconds_count{endpoint="/score",model="xgboost",'
+        'stage="inference"} 1' in collector.render_prometheus()
+    )
+    # The per-model breakdown is read from the same stage spans
+    timings = collector.get_stage_timings()["xgboost"]
+    assert set(timings) == {"validate", "inference", "serialize"}
+    assert timings["inference"]["count"] == 1
+    assert timings["inference"]["total_ms"] >= 2.0
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapses_thread_stacks():
+    """Samples other threads' stacks into bounded flamegraph-ready lines"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = SamplingProfiler(max_duration_seconds=1.0, max_rate_hz=500)
+    try:
+        result = profiler.profile(0.2, rate_hz=200)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [line for line in result.collapsed().splitlines() if "_busy_loop" in line]
+    assert busy and busy[0].startswith("thread:busy;")
+    assert int(busy[0].rsplit(" ", 1)[1]) > 0
+    assert 0 < result.samples <= 41
+    with pytest.raises(ValueError):
+        profiler.profile(5.0)
+
+    profiler._running.acquire()
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+
+
+def test_collector_ring_buffer_keeps_running_window_aggregates():
+    """Only the newest ``capacity`` predictions count towards the summary"""
+    collector = MetricsCollector(capacity=4)
+    for i in range(10):
+        collector.record_prediction(
+            "xgboost", float(i), i % 2 == 0, 0.5, "Low", success=i != 8
+        )
+
+    predictions = collector.get_summary_metrics()["predictions"]
+    assert predictions["total"] == 4
+    assert predictions["failed"] == 1
+    assert predictions["avg_processing_time_ms"] == 7.5  # mean of 6..9
+    assert [m.processing_time_ms for m in collector.prediction_metrics] == [
+        6.0,
+        7.0,
+        8.0,
+        9.0,
+    ]
+
+
+def test_quantile_sketch_accuracy_and_merge():
+    """Merged per-worker sketches match the quantiles of all observations"""
+    values = np.random.default_rng(0).lognormal(1.5, 1.0, 20000)
+    workers = [QuantileSketch(), QuantileSketch()]
+    for i, value in enumerate(values):
+        workers[i % 2].add(float(value))
+
+    merged = QuantileSketch.from_dict(workers[0].to_dict())
+    merged.merge(workers[1])
+    estimates = merged.quantiles((0.5, 0.99))
+
+    assert merged.count == len(values)
+    assert estimates["p50"] == pytest.approx(np.quantile(values, 0.5), rel=0.02)
+    assert estimates["p99"] == pytest.approx(np.quantile(values, 0.99), rel=0.02)
+
+
+def test_windowed_sketch_ages_out_old_observations():
+    """The sliding window forgets old latencies; the lifetime view keeps them"""
+    now = [0.0]
+    sketch = WindowedSketch(window_seconds=60, slices=6, clock=lambda: now[0])
+    sketch.add(1000.0)
+    now[0] = 120.0
+    sketch.add(10.0)
+
+    summary = sketch.summary()
+    assert summary["window"]["count"] == 1
+    assert summary["window"]["p99"] == pytest.approx(10.0, rel=0.01)
+    assert summary["lifetime"]["p99"] == pytest.approx(1000.0, rel=0.01)
+
+
+def test_model_average_latency_is_a_true_mean():
+    """avg_processing_time_ms is the mean of all predictions, not (avg+new)/2"""
+    collector = MetricsCollector()
+    for latency in (10.0, 10.0, 10.0, 50.0):
+        collector.record_prediction("xgboost", latency, True, 0.9, "High")
+
+    summary = collector.get_summary_metrics()
+    assert summary["models"]["xgboost"]["avg_processing_time_ms"] == 20.0
+    assert summary["latency_ms"]["models"]["xgboost"]["lifetime"]["count"] == 4
+
+
+def _record_in_worker(directory):
+    collector = MetricsCollector(store=MmapStore(directory))
+    for latency in (30.0, 30.0, 30.0):
+        collector.record_prediction("xgboost", latency, True, 0.9, "High")
+    collector.record_cache_lookup("xgboost", hit=True)
+    collector.record_request("/predict", "xgboost", 200, 0.03)
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    """Each worker writes its own mmap file; reads sum every worker"""
+    collector = MetricsCollector(store=MmapStore(str(tmp_path)))
+    for latency in (10.0, 10.0):
+        collector.record_prediction("xgboost", latency, True, 0.9, "High")
+    collector.record_request("/predict", "xgboost", 200, 0.01)
+
+    worker = multiprocessing.get_context("fork").Process(
+        target=_record_in_worker, args=(str(tmp_path),)
+    )
+    worker.start()
+    worker.join(timeout=30)
+    assert worker.exitcode == 0
+    assert len(list(tmp_path.glob("worker_*.db"))) == 2
+
+    summary = collector.get_summary_metrics()
+    assert summary["models"]["xgboost"]["total_predictions"] == 5
+    assert summary["models"]["xgboost"]["avg_processing_time_ms"] == 22.0
+    assert summary["latency_ms"]["models"]["xgboost"]["lifetime"]["count"] == 5
+    assert summary["cache"]["hits"] == 1
+    # Recent-window aggregates only cover live workers
+    assert summary["predictions"]["total"] == 2
+
+    text = collector.render_prometheus()
+    assert (
+        'ml_api_requests_total{endpoint="/predict",model="xgboost",status="200"} 2'
+        in text
+    )
+
+
+def test_static_responses_serve_etag_and_304():
+    """Payloads are serialized once per refresh and revalidated by ETag"""
+    builds = []
+    version = {"models": ["xgboost"]}
+
+    def build():
+        builds.append(1)
+        return {"/version": dict(version)}
+
+    static = StaticResponses(build)
+    first = static.get("/version")
+    assert first.body == b'{"models":["xgboost"]}'
+    assert static.get("/version") is first and len(builds) == 1
+
+    assert first.response().status_code == 200
+    assert first.response(first.etag).status_code == 304
+    assert first.response(f'"stale", W/{first.etag}').status_code == 304
+    assert first.response('"stale"').status_code == 200
+
+    version["models"].append("lightgbm")
+    static.refresh()
+    second = static.get("/version")
+    assert second.etag != first.etag
+    assert second.response(first.etag).status_code == 200
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_fast_json_response_encodes_numpy_payloads(monkeypatch, use_orjson):
+    """Both encoders produce the same compact JSON, NumPy scalars included"""
+    if use_orjson and responses.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+
+    payload = {
+        "results": [{"probability": np.float64(0.25), "risk": np.bool_(True)}],
+        "total": np.int64(1),
+        "message": "café",
+    }
+    response = responses.FastJSONResponse(payload)
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {
+        "results": [{"probability": 0.25, "risk": True}],
+        "total": 1,
+        "message": "café",
+    }
+    assert b" " not in response.body.replace("café".encode(), b"")
+
+
+class _Visit(BaseModel):
+    visit_id: int = Field(...)
+    stay_days: int = Field(..., ge=1, le=30)
+    medications: int = Field(..., ge=0, le=100)
+
+    @validator("*")
+    def validate_positive(cls, v):  # noqa: N805
+        if v < 0:
+            raise ValueError("Value must be non-negative")
+        return v
+
+
+def test_columnar_validation_matches_pydantic_errors():
+    """Vectorized range checks report the same per-row errors as the model"""
+    validator = ColumnarValidator(
+        _Visit, max_rows=10, non_negative_message="Value must be non-negative"
+    )
+    rows = [
+        {"visit_id": 1, "stay_days": 3, "medications": 5},
+        {"visit_id": 2, "stay_days": 0, "medications": 101},
+        {"visit_id": -3, "stay_days": "4", "medications": 2},
+        {"visit_id": 4, "stay_days": 2.5},
+        "not a visit",
+        {"visit_id": 6, "stay_days": "7", "medications": 1},
+    ]
+
+    with pytest.raises(RequestValidationError) as excinfo:
+        validator.validate_json(json.dumps(rows).encode())
+    with pytest.raises(ValidationError) as expected:
+        TypeAdapter(list[_Visit]).validate_python(rows, from_attributes=True)
+    # Compared as rendered in the 422 body (ValueError contexts become {})
+    assert jsonable_encoder(excinfo.value.errors()) == jsonable_encoder(
+        [{**error, "loc": ("body", *error["loc"])} for error in expected.value.errors()]
+    )
+
+    batch = validator.validate_json(json.dumps([rows[0], rows[5]]).encode())
+    assert batch.columns["stay_days"].tolist() == [3, 7]
+    assert batch.records()[1] == (6, 7, 1)
+    extractor = FeatureExtractor(["medications", "stay_days"], _Visit.model_fields)
+    assert extractor.columns(batch.columns).tolist() == [[5, 3], [1, 7]]
+
+    with pytest.raises(BatchTooLargeError):
+        validator.validate_json(json.dumps([rows[0]] * 11).encode())
+
+
+def test_ndjson_scorer_streams_chunks_in_input_order():
+    """Lines split across reads are scored per chunk; bad lines fail in place"""
+    scorer = NDJSONScorer(ColumnarValidator(_Visit), chunk_rows=2, max_line_bytes=64)
+    body = (
+        b'{"visit_id": 1, "stay_days": 3, "medications": 5}\n'
+        b"{not json\n"
+        b"\n"
+        b'{"visit_id": 3, "stay_days": 0, "medications": 1}\n'
+        b'{"visit_id": 4, "stay_days": 2, "medications": 0}\n'
+        + b"x" * 100
+        + b'\n{"visit_id": 6, "stay_days": 9, "medications": 9}'
+    )
+    calls = []
+
+    async def score_chunk(batch, lines):
+        calls.append(lines)
+        return [{"visit_id": visit} for visit in batch.columns["visit_id"].tolist()]
+
+    async def chunks():
+        for start in range(0, len(body), 7):
+            yield body[start : start + 7]
+
+    async def collect():
+        return b"".join([part async for part in scorer.stream(chunks(), score_chunk)])
+
+    records = [json.loads(line) for line in asyncio.run(collect()).splitlines()]
+
+    assert [record["line"] for record in records] == [1, 2, 4, 5, 6, 7]
+    assert [record.get("status") for record in records] == [
+        None,
+        "failed",
+        "failed",
+        None,
+        "failed",
+        None,
+    ]
+    assert records[2]["errors"][0]["loc"] == ["stay_days"]
+    assert records[3]["visit_id"] == 4 and records[5]["visit_id"] == 6
+    assert calls == [[1], [5], [7]]
+
+
+def test_result_spool_spills_to_disk_in_order():
+    """Output beyond the memory cap waits on disk and is read back in order"""
+
+    async def roundtrip():
+        spool = ResultSpool(max_memory_bytes=10)
+        for i in range(20):
+            await spool.put(f"{i:04d}\n".encode())
+        spilled = spool.spilled_bytes
+        spool.close()
+        return spilled, b"".join([chunk async for chunk in spool.chunks(8)])
+
+    spilled, data = asyncio.run(roundtrip())
+    assert spilled == 90
+    assert data == b"".join(f"{i:04d}\n".encode() for i in range(20))
+
+    async def concurrently():
+        # Reader and writer interleave across spills and drains
+        spool = ResultSpool(max_memory_bytes=10)
+
+        async def produce():
+            for i in range(200):
+                await spool.put(f"{i:04d}\n".encode())
+                if i % 7 == 0:
+                    await asyncio.sleep(0)
+            spool.close()
+
+        producer = asyncio.create_task(produce())
+        data = b"".join([chunk async for chunk in spool.chunks(8)])
+        await producer
+        return data
+
+    data = asyncio.run(concurrently())
+    assert data == b"".join(f"{i:04d}\n".encode() for i in range(200))
+
+
+@pytest.mark.skipif(not arrow.available(), reason="pyarrow is not installed")
+def test_arrow_upload_validates_columns_and_round_trips():
+    """Arrow columns are checked in place and results keep the upload's format"""
+    pa = arrow.pa
+    validator = ColumnarValidator(
+        _Visit, non_negative_message="Value must be non-negative"
+    )
+    table = pa.table(
+        {
+            "visit_id": pa.chunked_array([[1, 2], [3]]),
+            "stay_days": pa.array([3, 0, None], pa.int32()),
+            "medications": pa.array([5, 1, 2]),
+        }
+    )
+    body, media_type = arrow.write_table(table, "arrow")
+    assert arrow.detect_format(body) == "arrow"
+    table = arrow.read_table(body, arrow.detect_format(body, media_type))
+
+    columns, nulls = arrow.table_columns(table, validator.field_names)
+    assert nulls["stay_days"].tolist() == [False, False, True]
+    errors = validator.check_columns(columns, nulls)
+    assert [(error["type"], error["loc"]) for error in errors] == [
+        ("greater_than_equal", (1, "stay_days")),
+        ("int_type", (2, "stay_days")),
+    ]
+    columns["medications"] = columns["medications"].astype(np.float64)
+    assert validator.check_columns(columns)[0]["loc"] == ("medications",)
+
+    results = arrow.result_table(
+        table.column("visit_id"),
+        np.array([0.9, 0.45, np.nan]),
+        0.5,
+        {2: "failed"},
+        key_name="visit_id",
+    )
+    body, media_type = arrow.write_table(results, "parquet")
+    assert media_type == arrow.PARQUET_MEDIA_TYPE
+    assert arrow.read_table(body, arrow.detect_format(body)).to_pydict() == {
+        "visit_id": [1, 2, 3],
+        "probability": [0.9, 0.45, None],
+        "readmission_risk": [True, False, None],
+        "confidence_level": ["High", "Low", None],
+        "error": [None, None, "failed"],
+    }
+
+    with pytest.raises(arrow.ArrowFormatError):
+        arrow.read_table(b"not a table", "arrow")
+
+
+# Count and score columns of a discharge export and a request model over them
+_CSV_COUNTS = [name for name in RAW_DTYPES if name != "age"]
+_CSVPatient = create_model(
+    "CSVPatient",
+    **{
+        name: (int, Field(..., ge=1 if name == "time_in_hospital" else 0))
+        for name in _CSV_COUNTS + ["age_midpoint"]
+    },
+)
+_CSV_ROWS = (
+    "race,age," + ",".join(_CSV_COUNTS) + "\n"
+    "Caucasian,[70-80),1,11,1,7,3,41,0,10,1,2,3,9,2,6\n"
+    "Asian,?,2,12,1,7,3,41,0,10,0,0,0,9,0,5\n"
+    "Other,[0-10),3,13,1,7,0,41,0,10,0,0,0,9,0,5\n"
+    "Other,[20-30),4,14,1,7,2,,0,10,0,0,0,9,0,5\n"
+    "Other,[90-100),5,15,1,7,30,41,6,80,40,0,0,16,4,\n"
+)
+
+
+def test_csv_scorer_reads_engineered_scores_and_streams_chunks(tmp_path):
+    """Uploads are parsed per chunk with their engineered scores; every row gets a result"""
+    scorer = CSVScorer(ColumnarValidator(_CSVPatient), chunk_rows=2)
+    path = tmp_path / "discharges.csv"
+    path.write_text(_CSV_ROWS)
+    chunks = []
+
+    async def score_columns(columns, errors):
+        chunks.append({name: column.tolist() for name, column in columns.items()})
+        return BatchResult(np.full(len(columns["encounter_id"]), 0.9), errors)
+
+    # The stream reads its own copy, which outlives the upload it came from
+    with open(path, "rb") as file:
+        upload = spool_upload(file)
+
+    async def collect():
+        scorer.check_header(upload)
+        return b"".join(
+            [part async for part in scorer.stream(upload, 0.5, score_columns)]
+        )
+
+    lines = asyncio.run(collect()).decode().splitlines()
+
+    assert upload.closed
+
+    assert lines[0].startswith("row,encounter_id,patient_nbr,probability")
+    assert lines[1] == "1,1,11,0.9,True,High,"
+    assert lines[2] == "2,2,12,,,,age_midpoint: Input should be a valid integer"
+    assert lines[3].endswith(
+        "time_in_hospital: Input should be greater than or equal to 1"
+    )
+    assert lines[4].endswith("num_lab_procedures: Input should be a valid integer")
+    assert lines[5].endswith("clinical_risk_score: Input should be a valid integer")
+    assert len(lines) == 6 and [len(chunk["encounter_id"]) for chunk in chunks] == [
+        2,
+        2,
+        1,
+    ]
+    # Engineered scores are taken as uploaded, never recomputed
+    assert chunks[0]["age_midpoint"][0] == 75
+    assert chunks[0]["service_utilization_score"][0] == 2
+    assert chunks[0]["clinical_risk_score"][0] == 6
+    assert chunks[2]["age_midpoint"] == [95]
+
+    path.write_text("encounter_id,age\n1,[70-80)\n")
+    with open(path, "rb") as file, pytest.raises(CSVSchemaError):
+        scorer.check_header(file)
+    # A raw diabetic_data.csv export without the engineered scores is rejected
+    path.write_text(_CSV_ROWS.split("\n")[0].rsplit(",", 2)[0] + "\n")
+    with open(path, "rb") as file, pytest.raises(CSVSchemaError, match="clinical"):
+        scorer.check_header(file)
+
+
+def test_job_claim_needs_a_stale_heartbeat_and_is_atomic(tmp_path):
+    """Only jobs whose owner stopped heartbeating are claimed, by one store only"""
+    first, second, third = (JobStore(str(tmp_path)) for _ in range(3))
+    job_id, _ = first.new_job_dir()
+    first.create(job_id, "model", 0.5, "input.csv")
+    assert first.heartbeat() == 1
+    assert second.claim_unfinished() == []
+
+    # The owner went away (same pid after a restart makes no difference)
+    first.update(job_id, heartbeat_at=time.time() - 2 * first.lease_seconds)
+    seen = second.get(job_id)
+    assert [job.job_id for job in third.claim_unfinished()] == [job_id]
+    # A claim from the stale view loses the conditional update
+    assert not second.claim(job_id, seen.owner, seen.heartbeat_at)
+    assert second.get(job_id).owner == third.owner
+    # and the previous owner can no longer commit progress
+    assert not first.commit_chunk(job_id, 1, 10)
+
+
+def test_job_runner_resumes_from_last_committed_chunk(tmp_path):
+    """A restarted job drops uncommitted output and continues after its chunks"""
+    source = tmp_path / "discharges.csv"
+    source.write_text(_CSV_ROWS)
+    scored = []
+
+    def score_fn(model_name):
+        async def score_columns(columns, errors):
+            scored.append(columns["encounter_id"].tolist())
+            return BatchResult(np.full(len(columns["encounter_id"]), 0.2), errors)
+
+        return score_columns
+
+    scorer = CSVScorer(ColumnarValidator(_CSVPatient), chunk_rows=2)
+
+    async def run(store, job_id):
+        await JobRunner(store, scorer, score_fn).run(job_id)
+
+    store = JobStore(str(tmp_path / "jobs"))
+    job_id, _ = store.new_job_dir()
+    store.create(job_id, "model", 0.5, str(source))
+    asyncio.run(run(store, job_id))
+    expected = open(store.result_path(job_id), "rb").read()
+    assert store.get(job_id).status == "completed"
+    assert job_summary(store.get(job_id))["progress"] == 1.0
+
+    # Same job interrupted after its first chunk, with a chunk half written
+    job_id, _ = store.new_job_dir()
+    store.create(job_id, "model", 0.5, str(source))
+    first_chunk = expected.index(b"\n3,") + 1
+    with open(store.result_path(job_id), "wb") as results:
+        results.write(expected[:first_chunk] + b"3,3,13,0.2,Fal")
+    assert store.commit_chunk(job_id, 2, first_chunk)
+    store.update(job_id, status="running", owner=None, total_rows=5)
+    store.close()
+
+    store = JobStore(str(tmp_path / "jobs"))
+    assert [job.job_id for job in store.claim_unfinished()] == [job_id]
+    scored.clear()
+    asyncio.run(run(store, job_id))
+    assert scored == [[3, 4], [5]]
+    assert open(store.result_path(job_id), "rb").read() == expected
+    assert store.get(job_id).rows_done == 5
+
+
+def test_ensemble_scores_models_concurrently_and_combines():
+    """One block fans out to every model at once; failed rows are left out"""
+    base = FeatureExtractor(["a", "b"], ["a", "b"])
+    extractors = {"same": base, "swapped": base.select(["b", "a"], ["a", "b"])}
+    matrix = base.columns({"a": np.array([1, 2]), "b": np.array([3, 4])})
+    blocks = model_blocks(matrix, ["a", "b"], extractors)
+    assert blocks["same"] is matrix
+    assert blocks["swapped"].tolist() == [[3, 1], [4, 2]]
+
+    async def score(model_name, block, errors):
+        await asyncio.sleep(0.1)
+        if model_name == "swapped":
+            return BatchResult(np.array([0.9, np.nan]), {1: "boom"})
+        return BatchResult(np.array([0.1, 0.4]), errors)
+
+    start = time.perf_counter()
+    scored = asyncio.run(score_models(score, blocks))
+    assert time.perf_counter() - start < 0.18
+    assert scored["swapped"][0].errors == {1: "boom"}
+
+    probabilities = np.vstack([scored[name][0].probabilities for name in blocks])
+    weights = ensemble_weights(list(blocks), [1, 3])
+    assert np.allclose(combine(probabilities, weights), [0.7, 0.4])
+    assert np.allclose(
+        combine(probabilities, ensemble_weights(list(blocks)), "logit"), [0.5, 0.4]
+    )
+    with pytest.raises(ValueError):
+        ensemble_weights(list(blocks), [1])
+
+
+def test_model_manager_loads_on_demand_within_budget(tmp_path):
+    """Models load on first lease and idle ones are evicted least-recently-used"""
+    rss = [0]
+    loaded, unloaded = [], []
+
+    def load(name, path):
+        if name == "broken":
+            raise OSError("truncated pickle")
+        rss[0] += 100
+        loaded.append(name)
+        return f"model:{name}"
+
+    def unload(name):
+        rss[0] -= 100
+        unloaded.append(name)
+
+    manager = ModelManager(load, unload, budget_bytes=250, rss_fn=lambda: rss[0])
+    for name in ("a", "b", "c", "broken"):
+        (tmp_path / f"{name}.pkl").write_bytes(b"x")
+        manager.register(name, str(tmp_path / f"{name}.pkl"))
+    assert loaded == [] and "a" in manager and "z" not in manager
+
+    async def run():
+        await manager.ensure("a")
+        await manager.ensure("b")
+        async with manager.lease("a") as model:
+            assert model == "model:a"
+            await manager.ensure("c")  # "a" is pinned, so "b" makes room
+        assert list(manager.resident()) == ["a", "c"]
+
+        echo = manager.leased(lambda name, value: asyncio.sleep(0, (name, value)))
+        assert await echo("b", 1) == ("b", 1)  # reloaded; "a" is now the LRU
+        with pytest.raises(ModelLoadError):
+            await manager.ensure("broken")
+        with pytest.raises(KeyError):
+            await manager.ensure("z")
+
+    asyncio.run(run())
+
+    assert loaded == ["a", "b", "c", "b"]
+    assert unloaded == ["b", "a"]
+    assert list(manager.resident()) == ["c", "b"]
+    stats = manager.stats()
+    assert stats["models"]["b"]["loads"] == 2 and stats["resident_mb"] > 0
+
+
+def test_startup_warmup_loads_concurrently_and_gates_readiness(tmp_path):
+    """Preloads overlap in the pool and ready only flips once each model is warmed"""
+    barrier = threading.Barrier(2, timeout=5)
+    warmed = []
+
+    def load(name, path):
+        if name == "broken":
+            raise OSError("truncated pickle")
+        barrier.wait()  # both loads must be in flight at once
+        return f"model:{name}"
+
+    manager = ModelManager(load, rss_fn=lambda: 0)
+    for name in ("a", "b", "broken"):
+        (tmp_path / f"{name}.pkl").write_bytes(b"x")
+        manager.register(name, str(tmp_path / f"{name}.pkl"))
+
+    startup = StartupWarmup(batch_sizes=(1, 8), workers=3)
+    assert startup.load_artifacts({"names": lambda: ["x", "y"]}) == {
+        "names": ["x", "y"]
+    }
+
+    async def warm(name, n_rows):
+        assert not startup.ready
+        columns = synthetic_columns(_Visit, n_rows)
+        assert all(len(column) == n_rows for column in columns.values())
+        warmed.append((name, n_rows))
+
+    assert asyncio.run(startup.warm_up(manager, ["a", "b", "broken"], warm)) == [
+        "a",
+        "b",
+    ]
+    assert startup.ready and warmed == [("a", 1), ("a", 8), ("b", 1), ("b", 8)]
+    artifacts = startup.summary()["artifacts"]
+    assert artifacts["names"]["load_ms"] is not None
+    assert artifacts["a"]["warmup_ms"] is not None
+    assert artifacts["broken"]["error"] and artifacts["broken"]["warmup_ms"] is None